@@ -9,8 +9,19 @@ from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 
 from autotriage.app.middleware.request_id import RequestIdMiddleware
-from autotriage.app.routes import cases, config, health, ingest, metrics, overview, replay
-from autotriage.storage.db import init_db
+from autotriage.app.middleware.response_cache import ResponseCacheMiddleware
+from autotriage.app.routes import (
+    cases,
+    config,
+    entities,
+    health,
+    ingest,
+    metrics,
+    overview,
+    replay,
+)
+from autotriage.config import load_effective_config
+from autotriage.storage.db import close_pools, init_db
 
 
 def create_app(static_dir: Path | None = None) -> FastAPI:
@@ -18,6 +29,7 @@ def create_app(static_dir: Path | None = None) -> FastAPI:
     async def lifespan(_: FastAPI) -> AsyncIterator[None]:
         init_db()
         yield
+        close_pools()
 
     app = FastAPI(
         title="AutoTriage",
@@ -26,11 +38,17 @@ def create_app(static_dir: Path | None = None) -> FastAPI:
         lifespan=lifespan,
     )
 
+    app.add_middleware(
+        ResponseCacheMiddleware,
+        prefixes=("/api/overview", "/api/cases", "/api/experiments"),
+        ttl_s=load_effective_config().response_cache_ttl_seconds,
+    )
     app.add_middleware(RequestIdMiddleware)
 
     app.include_router(health.router)
     app.include_router(ingest.router)
     app.include_router(cases.router, prefix="/api")
+    app.include_router(entities.router, prefix="/api")
     app.include_router(overview.router, prefix="/api")
     app.include_router(replay.router, prefix="/api")
     app.include_router(config.router, prefix="/api")
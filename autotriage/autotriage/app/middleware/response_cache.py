@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp
+
+from autotriage.metrics.prom import RESPONSE_CACHE_TOTAL
+from autotriage.storage.db import data_version
+
+CacheKey = tuple[str, tuple[tuple[str, str], ...]]
+
+
+@dataclass(frozen=True)
+class _Entry:
+    version: tuple[int, int]
+    stored_at: float
+    etag: str
+    body: bytes
+    media_type: str | None
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    # Read-through cache for the dashboard's polled GETs, keyed by path and query. An entry
+    # serves until any commit to the database (PRAGMA data_version moves) or until ttl_s has
+    # passed, since windows like time_range=24h move with the clock. Hits are answered without
+    # checking out a connection. Concurrent misses for the same key and data version run the
+    # route once. Every cacheable response carries a strong ETag of its body, and a matching
+    # If-None-Match gets 304.
+    def __init__(
+        self, app: ASGIApp, *, prefixes: tuple[str, ...], ttl_s: float, max_entries: int = 256
+    ) -> None:
+        super().__init__(app)
+        self._prefixes = prefixes
+        self._ttl_s = ttl_s
+        self._max_entries = max_entries
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        self._inflight: dict[tuple[CacheKey, tuple[int, int]], asyncio.Future[_Entry | None]] = {}
+
+    async def dispatch(
+        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        path = request.url.path
+        if (
+            self._ttl_s <= 0
+            or request.method != "GET"
+            or not any(path == p or path.startswith(p + "/") for p in self._prefixes)
+        ):
+            return await call_next(request)
+        key: CacheKey = (path, tuple(sorted(request.query_params.multi_items())))
+        # A SQLite call (and, the first time, a connect): kept off the event loop.
+        version = await asyncio.to_thread(data_version)
+        entry = self._entries.get(key)
+        if (
+            entry is not None
+            and entry.version == version
+            and time.monotonic() - entry.stored_at < self._ttl_s
+        ):
+            self._entries.move_to_end(key)
+            return self._respond(request, entry, "hit")
+
+        flight = (key, version)
+        pending = self._inflight.get(flight)
+        if pending is not None:
+            entry = await asyncio.shield(pending)
+            if entry is not None:
+                return self._respond(request, entry, "coalesced")
+            return await call_next(request)
+
+        future: asyncio.Future[_Entry | None] = asyncio.get_running_loop().create_future()
+        self._inflight[flight] = future
+        entry = None
+        try:
+            response = await call_next(request)
+            if response.status_code != 200:
+                return response
+            body = b"".join([chunk async for chunk in response.body_iterator])  # type: ignore[attr-defined]
+            etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+            entry = _Entry(
+                version=version,
+                stored_at=time.monotonic(),
+                etag=etag,
+                body=body,
+                media_type=response.media_type or response.headers.get("content-type"),
+            )
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            return self._respond(request, entry, "miss")
+        finally:
+            del self._inflight[flight]
+            future.set_result(entry)
+
+    def _respond(self, request: Request, entry: _Entry, result: str) -> Response:
+        # Misses are counted as such even when they end in a 304, so misses count route runs.
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        modified = not _etag_matches(request.headers.get("if-none-match"), entry.etag)
+        RESPONSE_CACHE_TOTAL.labels(
+            result if modified or result == "miss" else "not_modified"
+        ).inc()
+        if not modified:
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so a W/ prefix on the client's copy still matches.
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from autotriage.util import codec
+
+
+class FastJSONResponse(JSONResponse):
+    # JSONResponse rendered through util.codec (orjson when installed). The dashboard's read
+    # routes return it directly, so their bodies skip FastAPI's response validation and
+    # jsonable_encoder pass and are encoded once; content must already be JSON types.
+    def render(self, content: Any) -> bytes:
+        return codec.dumpb(content)
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
-import json
 import sqlite3
-from typing import Annotated, Any
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 
+from autotriage.app.responses import FastJSONResponse
 from autotriage.playbooks.catalog import recommended_actions_for_case
 from autotriage.storage.db import db_dependency
+from autotriage.storage.repositories.case_snapshots_repo import CaseSnapshotsRepository
 from autotriage.storage.repositories.cases_repo import CasesRepository
+from autotriage.storage.repositories.events_repo import EventsRepository
 
 router = APIRouter()
 
@@ -21,53 +23,52 @@ def list_cases(
     decision: str | None = Query(default=None),
     queue: str | None = Query(default=None),
     q: str | None = Query(default=None),
-) -> dict[str, object]:
+    limit: int = Query(default=200, ge=1, le=1000),
+    cursor: str | None = Query(default=None),
+    updated_since: str | None = Query(default=None),
+) -> FastJSONResponse:
     repo = CasesRepository(db)
-    cases = repo.list_cases(
-        time_range=time_range, severity_min=severity_min, decision=decision, queue=queue, q=q
-    )
-    return {"items": cases}
+    try:
+        page = repo.list_cases(
+            time_range=time_range,
+            severity_min=severity_min,
+            decision=decision,
+            queue=queue,
+            q=q,
+            limit=limit,
+            cursor=cursor,
+            updated_since=updated_since,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return FastJSONResponse({"items": page.items, "next_cursor": page.next_cursor})
 
 
 @router.get("/cases/{case_id}")
 def get_case(
-    case_id: str, db: Annotated[sqlite3.Connection, Depends(db_dependency)]
-) -> dict[str, object]:
-    repo = CasesRepository(db)
-    detail = repo.get_case_detail(case_id)
-    case = detail.get("case") or {}
-    scoring = {}
-    routing = {}
-    try:
-        scoring = json.loads(str(case.get("score_json") or "{}"))
-    except Exception:  # noqa: BLE001
-        scoring = {}
+    case_id: str,
+    db: Annotated[sqlite3.Connection, Depends(db_dependency)],
+    limit: int = Query(default=200, ge=1, le=1000),
+    cursor: str | None = Query(default=None),
+) -> FastJSONResponse:
+    # The case document comes from its snapshot; the timeline is paged, oldest event first.
+    doc = CaseSnapshotsRepository(db).get(case_id) or {}
     try:
-        routing = json.loads(str(case.get("routing_json") or "{}"))
-    except Exception:  # noqa: BLE001
-        routing = {}
-
-    timeline: list[dict[str, Any]] = []
-    enrichments: dict[str, Any] = {}
-    for ev in detail.get("timeline") or []:
-        ev = dict(ev)
-        try:
-            payload = json.loads(str(ev.get("payload_json") or "{}"))
-        except Exception:  # noqa: BLE001
-            payload = {}
-        ev["payload"] = payload
-        timeline.append(ev)
-        if ev.get("stage") == "enriched":
-            enrichments = payload.get("enrichments") or enrichments
-
-    actions = recommended_actions_for_case(case, detail.get("graph"))
-    return {
-        "case": case,
-        "timeline": timeline,
-        "graph": detail.get("graph"),
-        "ticket": detail.get("ticket"),
-        "enrichments": enrichments,
-        "scoring": scoring,
-        "routing": routing,
-        "recommended_actions": actions,
-    }
+        page = EventsRepository(db).case_timeline(case_id, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    case = doc.get("case") or {}
+    graph = doc.get("graph")
+    return FastJSONResponse(
+        {
+            "case": case,
+            "timeline": page.items,
+            "timeline_next_cursor": page.next_cursor,
+            "graph": graph,
+            "ticket": doc.get("ticket"),
+            "enrichments": doc.get("enrichments") or {},
+            "scoring": doc.get("scoring") or {},
+            "routing": doc.get("routing") or {},
+            "recommended_actions": recommended_actions_for_case(case, graph),
+        }
+    )
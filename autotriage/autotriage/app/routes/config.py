@@ -3,6 +3,7 @@ from __future__ import annotations
 from fastapi import APIRouter
 
 from autotriage.config import load_effective_config
+from autotriage.core.ruleset import get_ruleset
 
 router = APIRouter()
 
@@ -13,6 +14,7 @@ def get_config() -> dict[str, object]:
     return {
         "version": cfg.version,
         "rules_dir": str(cfg.rules_dir),
+        "ruleset_version": get_ruleset(cfg.rules_dir).version,
         "data_dir": str(cfg.data_dir),
         "dedup_window_seconds": cfg.dedup_window_seconds,
         "correlation_window_seconds": cfg.correlation_window_seconds,
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+
+from autotriage.config import load_effective_config
+from autotriage.storage.db import db_dependency
+from autotriage.storage.repositories.entity_frequency_repo import EntityFrequencyRepository
+
+router = APIRouter()
+
+
+@router.get("/entities/hot")
+def hot_entities(
+    db: Annotated[sqlite3.Connection, Depends(db_dependency)],
+    limit: int = Query(default=100, ge=1, le=1000),
+) -> dict[str, object]:
+    cfg = load_effective_config()
+    rows = (
+        EntityFrequencyRepository(db).hot(
+            int(time.time()) - cfg.hot_entity_window_seconds, cfg.hot_entity_threshold, limit
+        )
+        if cfg.hot_entity_threshold > 0
+        else []
+    )
+    return {
+        "threshold": cfg.hot_entity_threshold,
+        "window_seconds": cfg.hot_entity_window_seconds,
+        "items": [{"entity_type": t, "entity_value": v, "alerts": n} for t, v, n in rows],
+    }
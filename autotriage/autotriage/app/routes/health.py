@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 
-from autotriage.storage.db import get_db
+from autotriage.storage.db import get_pool
 from autotriage.version import __version__
 
 router = APIRouter()
@@ -15,9 +15,6 @@ def healthz() -> dict[str, str]:
 
 @router.get("/readyz")
 def readyz() -> dict[str, str]:
-    db = get_db()
-    try:
+    with get_pool().connection() as db:
         db.execute("SELECT 1")
-    finally:
-        db.close()
     return {"status": "ok", "db": "ok"}
@@ -8,33 +8,51 @@ from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
 
+from autotriage.doorbell import ring_soon
 from autotriage.metrics.prom import INGEST_IDEMPOTENT_HIT_TOTAL, INGEST_TOTAL
-from autotriage.storage.db import db_dependency
+from autotriage.storage.db import db_dependency, get_pool
 from autotriage.storage.repositories.alerts_repo import AlertsRepository
+from autotriage.util import codec
 
 router = APIRouter()
 
 
 def _compute_idempotency_key(payload: dict[str, Any]) -> str:
+    # Stays on the stdlib encoder: keys must not change with the installed JSON backend. The
+    # canonical form, not the received bytes, so a resent alert with its keys in another order
+    # or different whitespace still maps to the same ingest.
     blob = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
     return hashlib.sha256(blob).hexdigest()
 
 
+def _decode_payload(body: bytes) -> tuple[str, dict[str, Any]]:
+    # The body as text, stored as received, and parsed only to check it is one JSON object.
+    try:
+        text = body.decode("utf-8")
+        payload = codec.loads(text)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="alert payload must be JSON") from exc
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="alert payload must be an object")
+    return text, payload
+
+
 @router.post("/webhook/alerts", status_code=202)
 async def webhook_alerts(
     request: Request,
     db: Annotated[sqlite3.Connection, Depends(db_dependency)],
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
 ) -> dict[str, str]:
-    payload = await request.json()
-    if not isinstance(payload, dict):
-        raise HTTPException(status_code=400, detail="alert payload must be an object")
+    text, payload = _decode_payload(await request.body())
     key = idempotency_key or _compute_idempotency_key(payload)
     repo = AlertsRepository(db)
     ingest_id, hit = repo.insert_or_get_ingest(
-        idempotency_key=key, received_at=datetime.now(tz=UTC), raw_payload=payload
+        idempotency_key=key, received_at=datetime.now(tz=UTC), raw_payload=text
     )
     INGEST_TOTAL.inc()
     if hit:
         INGEST_IDEMPOTENT_HIT_TOTAL.inc()
+    else:
+        # The pool's path, resolved once, rather than reading the config on every alert.
+        ring_soon(get_pool().db_path)
     return {"ingest_id": ingest_id, "status": "accepted"}
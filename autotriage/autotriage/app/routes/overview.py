@@ -3,14 +3,38 @@ from __future__ import annotations
 import sqlite3
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 
+from autotriage.app.responses import FastJSONResponse
+from autotriage.config import load_effective_config
 from autotriage.storage.db import db_dependency
-from autotriage.storage.views.aggregates import overview_24h
+from autotriage.storage.repositories.rollups_repo import BUCKET_SECONDS
+from autotriage.storage.views.aggregates import overview as overview_stats
+from autotriage.storage.views.aggregates import overview_series
 
 router = APIRouter()
 
+_UNIT_SECONDS = {"m": 60, "h": 3600, "d": 86400}
+
 
 @router.get("/overview")
-def overview(db: Annotated[sqlite3.Connection, Depends(db_dependency)]) -> dict[str, object]:
-    return {"window": "24h", "stats": overview_24h(db)}
+def overview(
+    db: Annotated[sqlite3.Connection, Depends(db_dependency)],
+    window: str = Query(default="24h", pattern=r"^[1-9][0-9]*[mhd]$"),
+    series: bool = Query(default=False),
+    step: int = Query(default=BUCKET_SECONDS, ge=BUCKET_SECONDS, le=86400),
+) -> FastJSONResponse:
+    window_seconds = int(window[:-1]) * _UNIT_SECONDS[window[-1]]
+    retention = load_effective_config().rollup_retention_seconds
+    if window_seconds > retention:
+        raise HTTPException(
+            status_code=400, detail=f"window exceeds rollup retention ({retention}s)"
+        )
+    if step % BUCKET_SECONDS:
+        raise HTTPException(
+            status_code=400, detail=f"step must be a multiple of {BUCKET_SECONDS} seconds"
+        )
+    body: dict[str, object] = {"window": window, "stats": overview_stats(db, window_seconds)}
+    if series:
+        body["series"] = {"step": step, "points": overview_series(db, window_seconds, step)}
+    return FastJSONResponse(body)
@@ -7,6 +7,7 @@ from typing import Annotated, Any
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel, Field
 
+from autotriage.app.responses import FastJSONResponse
 from autotriage.metrics.experiments import ExperimentsService
 from autotriage.storage.db import db_dependency
 
@@ -31,14 +32,14 @@ def start_replay(
 @router.get("/experiments")
 def list_experiments(
     db: Annotated[sqlite3.Connection, Depends(db_dependency)],
-) -> dict[str, object]:
+) -> FastJSONResponse:
     svc = ExperimentsService(db)
-    return {"items": svc.list_experiments()}
+    return FastJSONResponse({"items": svc.list_experiments()})
 
 
 @router.get("/experiments/{experiment_id}")
 def get_experiment(
     experiment_id: str, db: Annotated[sqlite3.Connection, Depends(db_dependency)]
-) -> dict[str, object]:
+) -> FastJSONResponse:
     svc = ExperimentsService(db)
-    return svc.get_experiment(experiment_id)
+    return FastJSONResponse(svc.get_experiment(experiment_id))
@@ -5,3 +5,9 @@ async def run_worker() -> None:
     from autotriage.worker import worker_loop
 
     await worker_loop()
+
+
+def run_workers(workers: int, *, metrics_port: int | None = None) -> None:
+    from autotriage.worker_pool import run_worker_pool
+
+    run_worker_pool(workers, metrics_port=metrics_port)
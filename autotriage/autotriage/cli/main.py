@@ -10,9 +10,10 @@ from autotriage.cli.commands.ingest_file import ingest_file
 from autotriage.cli.commands.replay import replay
 from autotriage.cli.commands.report import report
 from autotriage.cli.commands.run_api import run_api
-from autotriage.cli.commands.run_worker import run_worker
+from autotriage.cli.commands.run_worker import run_worker, run_workers
 from autotriage.cli.commands.seed import seed
 from autotriage.config import load_effective_config
+from autotriage.core.ruleset import install_sighup_reload
 from autotriage.logging import configure_logging
 from autotriage.metrics.reporter import quick_counts
 from autotriage.storage.db import get_db
@@ -23,22 +24,36 @@ tools_app = typer.Typer(add_completion=False)
 
 
 @app.command()
-def run(mode: str = "all", host: str = "127.0.0.1", port: int = 8080) -> None:
+def run(
+    mode: str = "all",
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    workers: int = 1,
+    metrics_port: int = 0,
+) -> None:
     cfg = load_effective_config()
     configure_logging(cfg.log_level)
+    if workers < 1:
+        raise typer.BadParameter("workers must be >= 1")
+    install_sighup_reload()
     if mode == "api":
         run_api(host, port)
         return
     if mode == "worker":
-        asyncio.run(run_worker())
+        if workers > 1:
+            run_workers(workers, metrics_port=metrics_port or None)
+        else:
+            asyncio.run(run_worker())
         return
     if mode == "all":
 
         async def _all() -> None:
-            await asyncio.gather(
-                asyncio.to_thread(run_api, host, port),
-                run_worker(),
+            worker = (
+                asyncio.to_thread(run_workers, workers, metrics_port=metrics_port or None)
+                if workers > 1
+                else run_worker()
             )
+            await asyncio.gather(asyncio.to_thread(run_api, host, port), worker)
 
         asyncio.run(_all())
         return
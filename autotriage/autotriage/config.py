@@ -5,7 +5,7 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
-from autotriage.util.env import env_int, env_path, env_str, env_str_list
+from autotriage.util.env import env_bool, env_float, env_int, env_path, env_str, env_str_list
 
 
 @dataclass(frozen=True)
@@ -15,24 +15,71 @@ class AppConfig:
     data_dir: Path
     rules_dir: Path
     dedup_window_seconds: int
+    dedup_index: bool
+    fingerprint_strategy: str
+    dedup_bloom_bits: int
     correlation_window_seconds: int
+    correlation_index: bool
+    hot_entity_threshold: int
+    hot_entity_window_seconds: int
     enabled_enrichers: list[str]
     log_level: str
+    worker_batch_size: int
+    worker_transaction_size: int
+    worker_lease_seconds: int
+    worker_max_attempts: int
+    worker_doorbell: bool
+    db_pool_size: int
+    enrich_max_workers: int
+    enrich_deadline_seconds: float
+    enrich_l1_size: int
+    sweep_interval_seconds: float
+    rollup_retention_seconds: int
+    response_cache_ttl_seconds: float
+    db_cached_statements: int
+
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[1]
+_dotenv_loaded = False
 
 
 def load_effective_config() -> AppConfig:
-    load_dotenv()
-    project_root = Path(__file__).resolve().parents[1]
+    # .env only fills in variables that are not already set, so reading it once per process is
+    # enough; the environment itself is still read on every call.
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv()
+        _dotenv_loaded = True
+    project_root = _PROJECT_ROOT
     return AppConfig(
         version="0.1.0",
         db_path=env_path("AUTOTRIAGE_DB_PATH", project_root / "var" / "autotriage.db"),
         data_dir=env_path("AUTOTRIAGE_DATA_DIR", project_root / "data"),
         rules_dir=env_path("AUTOTRIAGE_RULES_DIR", project_root / "autotriage" / "rules"),
         dedup_window_seconds=env_int("AUTOTRIAGE_DEDUP_WINDOW_SECONDS", 600),
+        dedup_index=env_bool("AUTOTRIAGE_DEDUP_INDEX", True),
+        fingerprint_strategy=env_str("AUTOTRIAGE_FINGERPRINT_STRATEGY", "lp-blake2b-v1"),
+        dedup_bloom_bits=env_int("AUTOTRIAGE_DEDUP_BLOOM_BITS", 1 << 20),
         correlation_window_seconds=env_int("AUTOTRIAGE_CORRELATION_WINDOW_SECONDS", 3600),
+        correlation_index=env_bool("AUTOTRIAGE_CORRELATION_INDEX", True),
+        hot_entity_threshold=env_int("AUTOTRIAGE_HOT_ENTITY_THRESHOLD", 1000),
+        hot_entity_window_seconds=env_int("AUTOTRIAGE_HOT_ENTITY_WINDOW_SECONDS", 86400),
         enabled_enrichers=env_str_list(
             "AUTOTRIAGE_ENABLED_ENRICHERS",
             ["allowlist", "asset_context", "ip_reputation", "geo_asn", "whois"],
         ),
         log_level=env_str("AUTOTRIAGE_LOG_LEVEL", "INFO"),
+        worker_batch_size=env_int("AUTOTRIAGE_WORKER_BATCH_SIZE", 64),
+        worker_transaction_size=env_int("AUTOTRIAGE_WORKER_TRANSACTION_SIZE", 16),
+        worker_lease_seconds=env_int("AUTOTRIAGE_WORKER_LEASE_SECONDS", 60),
+        worker_max_attempts=env_int("AUTOTRIAGE_WORKER_MAX_ATTEMPTS", 5),
+        worker_doorbell=env_bool("AUTOTRIAGE_WORKER_DOORBELL", True),
+        db_pool_size=env_int("AUTOTRIAGE_DB_POOL_SIZE", 8),
+        enrich_max_workers=env_int("AUTOTRIAGE_ENRICH_MAX_WORKERS", 16),
+        enrich_deadline_seconds=env_float("AUTOTRIAGE_ENRICH_DEADLINE_SECONDS", 5.0),
+        enrich_l1_size=env_int("AUTOTRIAGE_ENRICH_L1_SIZE", 10_000),
+        sweep_interval_seconds=env_float("AUTOTRIAGE_SWEEP_INTERVAL_SECONDS", 60.0),
+        rollup_retention_seconds=env_int("AUTOTRIAGE_ROLLUP_RETENTION_SECONDS", 30 * 86400),
+        response_cache_ttl_seconds=env_float("AUTOTRIAGE_RESPONSE_CACHE_TTL_SECONDS", 5.0),
+        db_cached_statements=env_int("AUTOTRIAGE_DB_CACHED_STATEMENTS", 256),
     )
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import sqlite3
 
+from autotriage.storage.db import commit
+
 
 class MockSiemConnector:
     def __init__(self, db: sqlite3.Connection) -> None:
@@ -9,4 +11,4 @@ class MockSiemConnector:
 
     def ack_alert(self, ingest_id: str) -> None:
         self._db.execute("UPDATE alerts SET status = 'acked' WHERE ingest_id = ?", (ingest_id,))
-        self._db.commit()
+        commit(self._db)
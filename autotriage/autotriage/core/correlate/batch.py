@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import sqlite3
+import uuid
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from autotriage.core.correlate.heuristics import correlation_entities
+from autotriage.core.correlate.hot import HotEntities
+from autotriage.core.correlate.index import EntityCaseIndex, EntityKey
+from autotriage.core.models.alert import CanonicalAlert
+from autotriage.metrics.prom import CORRELATION_LOOKUPS_TOTAL
+from autotriage.storage.db import unit_of_work
+from autotriage.storage.repositories.case_entities_repo import CaseEntitiesRepository
+from autotriage.util import codec
+
+
+@dataclass(frozen=True)
+class CorrelationInput:
+    alert: CanonicalAlert
+    base_severity: int
+    decision: str
+    queue: str
+    score: dict[str, Any]
+    routing: dict[str, Any]
+
+
+@dataclass
+class _CaseWrite:
+    # What the batch does to one case: created by `creator` (None for an existing case), then
+    # updated by every alert in `alerts`, as (batch position, timestamp, alert).
+    created_at: str
+    creator: CorrelationInput | None
+    alerts: list[tuple[int, str, CorrelationInput]] = field(default_factory=list)
+
+
+class _UnionFind:
+    def __init__(self, n: int) -> None:
+        self._parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            # The earlier alert stays the root, so groups list alerts in batch order.
+            self._parent[max(ri, rj)] = min(ri, rj)
+
+
+def correlate_many(
+    db: sqlite3.Connection,
+    inputs: list[CorrelationInput],
+    *,
+    correlation_window_seconds: int,
+    index: EntityCaseIndex | None = None,
+    hot: HotEntities | None = None,
+) -> list[str]:
+    # Correlates a batch the way correlate_into_case would one alert at a time, in order, and
+    # like it under the write lock from lookup to writes, but with one lookup for the whole
+    # batch and executemany writes. Alerts sharing a lookup entity are grouped with union-find.
+    # Groups share no lookup entities, so no group changes what another finds, and each is
+    # replayed on its own against the newest existing case per entity. Within a group the replay
+    # is sequential: an alert joins the newest case holding any of its entities, including cases
+    # earlier alerts in the batch created or extended. Two groups can still join the same
+    # existing case, so per-case updates are applied in batch order. Alert i stands at now + i
+    # microseconds, so cases created in one batch keep the serial order.
+    with unit_of_work(db):
+        return _correlate(
+            db, inputs, correlation_window_seconds=correlation_window_seconds, index=index, hot=hot
+        )
+
+
+def _correlate(
+    db: sqlite3.Connection,
+    inputs: list[CorrelationInput],
+    *,
+    correlation_window_seconds: int,
+    index: EntityCaseIndex | None,
+    hot: HotEntities | None,
+) -> list[str]:
+    now = datetime.now(tz=UTC)
+    since = now - timedelta(seconds=correlation_window_seconds)
+    cutoff = since.isoformat()
+    stop = hot.current(db) if hot is not None else frozenset()
+    recorded: list[list[EntityKey]] = []
+    lookups: list[list[EntityKey]] = []
+    for item in inputs:
+        ents = correlation_entities(item.alert.entities)
+        recorded.append([(e.type.value, e.value) for e in ents])
+        lookups.append(
+            [(e.type.value, e.value) for e in ents if (e.type.value, e.value) not in stop]
+        )
+
+    groups = _UnionFind(len(inputs))
+    holder: dict[EntityKey, int] = {}
+    for i, pairs in enumerate(lookups):
+        for pair in pairs:
+            groups.union(i, holder.setdefault(pair, i))
+    members: dict[int, list[int]] = {}
+    for i in range(len(inputs)):
+        members.setdefault(groups.find(i), []).append(i)
+
+    wanted = list(holder)
+    if index is not None:
+        CORRELATION_LOOKUPS_TOTAL.labels("index").inc(len(inputs))
+        latest = index.latest(db, wanted, since)
+    else:
+        CORRELATION_LOOKUPS_TOTAL.labels("sql").inc(len(inputs))
+        latest = CaseEntitiesRepository(db).latest_cases(wanted, cutoff)
+
+    case_ids: list[str] = [""] * len(inputs)
+    writes: dict[str, _CaseWrite] = {}
+    for group in members.values():
+        for i in group:
+            stamp = (now + timedelta(microseconds=i)).isoformat()
+            best = max(
+                (latest[p] for p in lookups[i] if p in latest and latest[p][0] >= cutoff),
+                default=None,
+            )
+            if best is None:
+                case_id = str(uuid.uuid4())
+                writes[case_id] = _CaseWrite(created_at=stamp, creator=inputs[i])
+            else:
+                created_at, case_id = best
+                writes.setdefault(case_id, _CaseWrite(created_at=created_at, creator=None))
+            write = writes[case_id]
+            write.alerts.append((i, stamp, inputs[i]))
+            for pair in recorded[i]:
+                seen = latest.get(pair)
+                if seen is None or write.created_at > seen[0]:
+                    latest[pair] = (write.created_at, case_id)
+            case_ids[i] = case_id
+
+    _write(db, writes, case_ids, recorded, index)
+    if hot is not None:
+        hot.record(db, *recorded)
+    return case_ids
+
+
+def _write(
+    db: sqlite3.Connection,
+    writes: dict[str, _CaseWrite],
+    case_ids: list[str],
+    recorded: list[list[EntityKey]],
+    index: EntityCaseIndex | None,
+) -> None:
+    created: list[tuple[Any, ...]] = []
+    updated: list[tuple[Any, ...]] = []
+    for case_id, write in writes.items():
+        # The same end state as an INSERT by the creator followed by one UPDATE per alert.
+        _, updated_at, last = max(write.alerts, key=lambda a: a[0])
+        severity = max(item.base_severity for _, _, item in write.alerts)
+        if write.creator is not None:
+            first = write.creator
+            created.append(
+                (
+                    case_id,
+                    write.created_at,
+                    updated_at,
+                    severity,
+                    float(first.score.get("confidence", 0.5)),
+                    last.decision,
+                    last.queue,
+                    last.alert.title,
+                    codec.dumps(first.score),
+                    codec.dumps(first.routing),
+                )
+            )
+        else:
+            updated.append(
+                (updated_at, severity, last.decision, last.queue, last.alert.title, case_id)
+            )
+    db.executemany(
+        """
+        INSERT INTO cases (case_id, created_at, updated_at, severity, confidence, decision, queue, summary, score_json, routing_json)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        created,
+    )
+    db.executemany(
+        """
+        UPDATE cases
+        SET updated_at = ?, severity = MAX(severity, ?), decision = ?, queue = ?, summary = ?
+        WHERE case_id = ?
+        """,
+        updated,
+    )
+    rows = [
+        (case_id, t, v) for case_id, pairs in zip(case_ids, recorded, strict=True) for t, v in pairs
+    ]
+    CaseEntitiesRepository(db).add_many(rows)
+    if index is not None:
+        for case_id, pairs in zip(case_ids, recorded, strict=True):
+            index.record(db, case_id, writes[case_id].created_at, pairs, [])
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+from collections.abc import Collection, Iterable
 
 from autotriage.core.models.entities import Entity, EntityType
 
 
-def correlation_entities(entities: Iterable[Entity]) -> list[Entity]:
+def correlation_entities(
+    entities: Iterable[Entity], hot: Collection[tuple[str, str]] = ()
+) -> list[Entity]:
     keep = {
         EntityType.user,
         EntityType.host,
@@ -17,6 +19,6 @@ def correlation_entities(entities: Iterable[Entity]) -> list[Entity]:
     }
     out: list[Entity] = []
     for e in entities:
-        if e.type in keep and e.value:
+        if e.type in keep and e.value and (e.type.value, e.value) not in hot:
             out.append(e)
     return out
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from autotriage.metrics.prom import HOT_ENTITIES
+from autotriage.storage.repositories.entity_frequency_repo import EntityFrequencyRepository
+
+
+class HotEntities:
+    # Entities seen in at least `threshold` alerts over the trailing window, e.g. a shared NAT
+    # address or a service account. They chain unrelated alerts together, so correlation does
+    # not look cases up by them, though they are still recorded on the case. Counts are kept
+    # per hour in entity_frequency by every worker; each process re-reads the hot set every
+    # refresh_seconds, so an entity turns hot (or cools down) within that delay everywhere.
+    def __init__(self, threshold: int, window_seconds: int, refresh_seconds: float = 30.0) -> None:
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self._refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._hot: frozenset[tuple[str, str]] = frozenset()
+        self._loaded_at = float("-inf")
+
+    def current(self, db: sqlite3.Connection) -> frozenset[tuple[str, str]]:
+        now = time.monotonic()
+        if now - self._loaded_at < self._refresh_seconds:
+            return self._hot
+        with self._lock:
+            if now - self._loaded_at >= self._refresh_seconds:
+                rows = EntityFrequencyRepository(db).hot(
+                    int(time.time()) - self.window_seconds, self.threshold
+                )
+                self._hot = frozenset((t, v) for t, v, _ in rows)
+                self._loaded_at = now
+                HOT_ENTITIES.set(len(self._hot))
+        return self._hot
+
+    def record(self, db: sqlite3.Connection, *alerts: list[tuple[str, str]]) -> None:
+        # One list of correlation entities per alert; an alert counts once per entity.
+        entities = [entity for ents in alerts for entity in dict.fromkeys(ents)]
+        if entities:
+            EntityFrequencyRepository(db).bump(entities, int(time.time()))
+
+
+_TRACKERS: dict[tuple[Path, int, int], HotEntities] = {}
+_TRACKERS_LOCK = threading.Lock()
+
+
+def get_hot_entities(db_path: Path, threshold: int, window_seconds: int) -> HotEntities:
+    key = (db_path, threshold, window_seconds)
+    tracker = _TRACKERS.get(key)
+    if tracker is None:
+        with _TRACKERS_LOCK:
+            tracker = _TRACKERS.get(key)
+            if tracker is None:
+                tracker = HotEntities(threshold, window_seconds)
+                _TRACKERS[key] = tracker
+    return tracker
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from pathlib import Path
+
+from autotriage.storage.db import on_rollback, on_unit_of_work_end
+from autotriage.storage.repositories.case_entities_repo import CaseEntitiesRepository
+
+# (entity_type, entity_value)
+EntityKey = tuple[str, str]
+
+_EVICTION_SLACK = timedelta(seconds=1)
+
+
+class EntityCaseIndex:
+    # In-process map from a correlation entity to the most recently created case holding it,
+    # for cases created in the last window_seconds; it answers the correlation lookup without
+    # SQL. It follows case_entities the way FingerprintIndex follows fingerprints: this
+    # process's own rows are applied as they are written and undone if their savepoint or
+    # transaction rolls back, rows from other connections are tailed by rowid (once per unit
+    # of work), and a rolled-back transaction drops the map.
+    # Entries are kept roughly in case creation order and evicted from the front once their
+    # case falls out of the window.
+    def __init__(self, window_seconds: int) -> None:
+        self._window_seconds = window_seconds
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        # entity -> (case created_at, case_id); created_at as stored, an ISO-8601 UTC string.
+        self._latest: OrderedDict[EntityKey, tuple[str, str]] = OrderedDict()
+        self._horizon = ""
+        self._watermark = 0
+        self._warm = False
+        self._synced: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def warm(self, db: sqlite3.Connection) -> None:
+        with self._lock:
+            self._sync(db, CaseEntitiesRepository(db))
+
+    def find(
+        self, db: sqlite3.Connection, entities: list[EntityKey], since: datetime
+    ) -> tuple[str, str] | None:
+        # (case_id, created_at) of the newest case created at or after `since` that holds any
+        # of the entities, as CaseEntitiesRepository.latest_case picks it. Eviction trails
+        # `since` by a second, for threads that computed theirs a moment earlier.
+        latest = self.latest(db, entities, since)
+        best = max(latest.values(), default=None)
+        return (best[1], best[0]) if best is not None else None
+
+    def latest(
+        self, db: sqlite3.Connection, entities: list[EntityKey], since: datetime
+    ) -> dict[EntityKey, tuple[str, str]]:
+        # Per entity, (created_at, case_id) of its newest case created at or after `since`,
+        # as CaseEntitiesRepository.latest_cases returns them.
+        cutoff = since.isoformat()
+        out: dict[EntityKey, tuple[str, str]] = {}
+        with self._lock:
+            self._sync(db, CaseEntitiesRepository(db), since)
+            self._evict((since - _EVICTION_SLACK).isoformat())
+            for entity in entities:
+                hit = self._latest.get(entity)
+                if hit is not None and hit[0] >= cutoff:
+                    out[entity] = hit
+        return out
+
+    def record(
+        self,
+        db: sqlite3.Connection,
+        case_id: str,
+        created_at: str,
+        entities: list[EntityKey],
+        rowids: list[int],
+    ) -> None:
+        # Applies rows `db` just inserted; call after find() or latest() on the same
+        # connection. Rows whose rowids are not passed are picked up again by the next tail.
+        with self._lock:
+            replaced: list[tuple[EntityKey, tuple[str, str] | None]] = []
+            for entity in entities:
+                previous = self._latest.get(entity)
+                if self._apply(entity, case_id, created_at):
+                    replaced.append((entity, previous))
+            watermark = self._watermark
+            # A gap means another connection wrote in between; the next tail applies both.
+            for rowid in sorted(rowids):
+                if rowid == self._watermark + 1:
+                    self._watermark = rowid
+            if replaced or self._watermark != watermark:
+                on_rollback(db, partial(self._undo, replaced, watermark))
+
+    def _undo(
+        self, replaced: list[tuple[EntityKey, tuple[str, str] | None]], watermark: int
+    ) -> None:
+        with self._lock:
+            for entity, previous in reversed(replaced):
+                if previous is None:
+                    self._latest.pop(entity, None)
+                else:
+                    self._latest[entity] = previous
+            self._watermark = watermark
+
+    def _sync(
+        self, db: sqlite3.Connection, repo: CaseEntitiesRepository, since: datetime | None = None
+    ) -> None:
+        if not self._warm:
+            upto = repo.max_rowid()
+            if since is None:
+                since = datetime.fromtimestamp(time.time() - self._window_seconds, tz=UTC)
+            self._horizon = (since - _EVICTION_SLACK).isoformat()
+            for row in repo.rows_for_cases_since(self._horizon, upto):
+                self._apply_row(row)
+            self._watermark = upto
+            self._warm = True
+        key = id(db)
+        if key in self._synced:
+            return
+        for row in repo.rows_between(self._watermark):
+            self._apply_row(row)
+            self._watermark = int(row["rowid"])
+        if on_unit_of_work_end(db, partial(self._unit_of_work_ended, key)):
+            self._synced.add(key)
+
+    def _unit_of_work_ended(self, key: int, committed: bool) -> None:
+        with self._lock:
+            if committed:
+                self._synced.discard(key)
+            else:
+                self._reset()
+
+    def _apply_row(self, row: sqlite3.Row) -> None:
+        self._apply(
+            (str(row["entity_type"]), str(row["entity_value"])),
+            str(row["case_id"]),
+            str(row["created_at"]),
+        )
+
+    def _apply(self, entity: EntityKey, case_id: str, created_at: str) -> bool:
+        if created_at < self._horizon:
+            return False
+        current = self._latest.get(entity)
+        if current is None or created_at > current[0]:
+            self._latest[entity] = (created_at, case_id)
+            self._latest.move_to_end(entity)
+            return True
+        return False
+
+    def _evict(self, horizon: str) -> None:
+        if horizon <= self._horizon:
+            return
+        self._horizon = horizon
+        latest = self._latest
+        # An entity added to an older case can sit behind newer entries and outlive its
+        # case's window for a while; lookups check created_at, so it is never served.
+        while latest:
+            entity, (created_at, _) = next(iter(latest.items()))
+            if created_at >= horizon:
+                break
+            del latest[entity]
+
+
+_INDEXES: dict[tuple[Path, int], EntityCaseIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_entity_case_index(db_path: Path, window_seconds: int) -> EntityCaseIndex:
+    key = (db_path, window_seconds)
+    index = _INDEXES.get(key)
+    if index is None:
+        with _INDEXES_LOCK:
+            index = _INDEXES.get(key)
+            if index is None:
+                index = EntityCaseIndex(window_seconds)
+                _INDEXES[key] = index
+    return index
@@ -19,6 +19,10 @@ class Thresholds:
 
 def load_thresholds(rules_dir: Path) -> Thresholds:
     data = yaml.safe_load((rules_dir / "thresholds.yml").read_text(encoding="utf-8")) or {}
+    return parse_thresholds(data)
+
+
+def parse_thresholds(data: dict[str, Any]) -> Thresholds:
     d = data.get("decisioning") or {}
     return Thresholds(
         auto_close_max_severity=int(d.get("auto_close_max_severity", 25)),
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime
+from functools import partial
+from pathlib import Path
+
+from autotriage.core.fingerprint.strategies import Fingerprint
+from autotriage.metrics.prom import DEDUP_LOOKUPS_TOTAL
+from autotriage.storage.db import on_rollback, on_unit_of_work_end
+from autotriage.storage.repositories.fingerprints_repo import FingerprintsRepository
+
+
+class BloomFilter:
+    # Lives in one process only, so the interpreter's (per-process salted) string hash is
+    # enough; two halves of it drive the double hashing.
+    def __init__(self, bits: int, hashes: int = 4) -> None:
+        self._bits = max(64, bits)
+        self._hashes = hashes
+        self._array = bytearray((self._bits + 7) // 8)
+
+    def _positions(self, item: str) -> list[int]:
+        h = hash(item) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self._bits for i in range(self._hashes)]
+
+    def add(self, item: str) -> None:
+        array = self._array
+        for pos in self._positions(item):
+            array[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        array = self._array
+        return all(array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+# Ingest ids recorded for one fingerprint in one window, in insertion order.
+_Ingests = OrderedDict[str, None]
+
+
+def _fp_key(strategy: str, fp_hash: str) -> str:
+    # Fingerprints from different strategies never match, as in find_duplicate_of.
+    return f"{strategy}:{fp_hash}"
+
+
+class FingerprintIndex:
+    # In-process mirror of the fingerprints table for the dedup windows still open: the first
+    # ingest id per (window_start, strategy, fp_hash) is what later alerts are duplicates of, as
+    # find_duplicate_of orders them. Rows written by other connections are picked up by
+    # tailing the table by rowid before each decision; inside a unit of work, which holds the
+    # write lock throughout, once per transaction. Windows that started more than
+    # window_seconds ago are evicted and looked up in SQL instead, skipped when the Bloom
+    # filter (over every fingerprint seen) rules the fingerprint out. A fingerprint recorded
+    # in a savepoint that rolls back is taken out again; a rolled-back transaction drops the
+    # index, which is rebuilt from the table on next use.
+    def __init__(self, window_seconds: int, *, bloom_bits: int = 0) -> None:
+        self._window_seconds = window_seconds
+        self._bloom_bits = bloom_bits
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._windows: dict[str, tuple[float, dict[str, _Ingests]]] = {}
+        self._located: dict[str, tuple[str, str]] = {}
+        self._starts: dict[str, float] = {}
+        self._bloom = BloomFilter(self._bloom_bits) if self._bloom_bits > 0 else None
+        self._watermark = 0
+        self._horizon = 0.0
+        self._warm = False
+        self._synced: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._located)
+
+    def warm(self, db: sqlite3.Connection) -> None:
+        with self._lock:
+            self._sync(db, FingerprintsRepository(db))
+
+    def peek(self, db: sqlite3.Connection, fp: Fingerprint) -> str | None:
+        # What check_and_record would find, without recording fp or counting the lookup.
+        repo = FingerprintsRepository(db)
+        with self._lock:
+            self._sync(db, repo)
+            self._evict(time.time() - self._window_seconds)
+            return self._find(repo, fp)[0]
+
+    def check_and_record(
+        self, db: sqlite3.Connection, ingest_id: str, fp: Fingerprint
+    ) -> str | None:
+        repo = FingerprintsRepository(db)
+        window_start = fp.window_start.isoformat()
+        key = _fp_key(fp.strategy, fp.fp_hash)
+        with self._lock:
+            self._sync(db, repo)
+            self._evict(time.time() - self._window_seconds)
+            dup_of, source = self._find(repo, fp)
+            DEDUP_LOOKUPS_TOTAL.labels(source).inc()
+            previous = self._located.get(ingest_id)
+            watermark = self._watermark
+            rowid = repo.record(ingest_id, fp.strategy, fp.fp_hash, window_start)
+            self._apply(ingest_id, key, window_start)
+            # A gap means another connection wrote in between; the next tail applies both,
+            # in order.
+            if rowid == self._watermark + 1:
+                self._watermark = rowid
+            on_rollback(db, partial(self._undo, ingest_id, previous, watermark))
+        return dup_of
+
+    def _find(self, repo: FingerprintsRepository, fp: Fingerprint) -> tuple[str | None, str]:
+        # The first ingest recorded for fp, and where it was looked up.
+        window_start = fp.window_start.isoformat()
+        key = _fp_key(fp.strategy, fp.fp_hash)
+        if fp.window_start.timestamp() >= self._horizon:
+            entry = self._windows.get(window_start)
+            ingests = entry[1].get(key) if entry is not None else None
+            return (next(iter(ingests)) if ingests else None), "index"
+        if self._bloom is not None and f"{key}|{window_start}" not in self._bloom:
+            return None, "bloom"
+        return repo.first_ingest(fp.strategy, fp.fp_hash, window_start), "sql"
+
+    def _undo(self, ingest_id: str, previous: tuple[str, str] | None, watermark: int) -> None:
+        # Bloom filter bits stay set, which only costs a SQL lookup. A re-recorded ingest
+        # cannot be put back in its old place in its window, so that drops the index.
+        with self._lock:
+            if previous is not None:
+                self._reset()
+                return
+            self._remove(ingest_id)
+            self._watermark = watermark
+
+    def _sync(self, db: sqlite3.Connection, repo: FingerprintsRepository) -> None:
+        if not self._warm:
+            upto = repo.max_rowid()
+            self._horizon = time.time() - self._window_seconds
+            if self._bloom is None:
+                since = datetime.fromtimestamp(self._horizon - self._window_seconds, tz=UTC)
+                rows = repo.rows_from_window(since.isoformat(), upto)
+            else:
+                rows = repo.rows_between(0, upto)
+            for row in rows:
+                self._apply_row(row)
+            self._watermark = upto
+            self._warm = True
+        key = id(db)
+        if key in self._synced:
+            return
+        for row in repo.rows_between(self._watermark):
+            self._apply_row(row)
+            self._watermark = int(row["rowid"])
+        if on_unit_of_work_end(db, partial(self._unit_of_work_ended, key)):
+            self._synced.add(key)
+
+    def _unit_of_work_ended(self, key: int, committed: bool) -> None:
+        with self._lock:
+            if committed:
+                self._synced.discard(key)
+            else:
+                self._reset()
+
+    def _apply_row(self, row: sqlite3.Row) -> None:
+        self._apply(
+            str(row["ingest_id"]),
+            _fp_key(str(row["strategy"]), str(row["fp_hash"])),
+            str(row["window_start"]),
+        )
+
+    def _apply(self, ingest_id: str, key: str, window_start: str) -> None:
+        if self._bloom is not None:
+            self._bloom.add(f"{key}|{window_start}")
+        # INSERT OR REPLACE moved this ingest to the end of the table.
+        self._remove(ingest_id)
+        entry = self._windows.get(window_start)
+        if entry is None:
+            started = self._starts.get(window_start)
+            if started is None:
+                started = datetime.fromisoformat(window_start).timestamp()
+                self._starts[window_start] = started
+            if started < self._horizon:
+                return
+            entry = (started, {})
+            self._windows[window_start] = entry
+        entry[1].setdefault(key, OrderedDict())[ingest_id] = None
+        self._located[ingest_id] = (window_start, key)
+
+    def _remove(self, ingest_id: str) -> None:
+        located = self._located.pop(ingest_id, None)
+        if located is None:
+            return
+        entry = self._windows.get(located[0])
+        if entry is not None:
+            ingests = entry[1].get(located[1])
+            if ingests is not None:
+                ingests.pop(ingest_id, None)
+                if not ingests:
+                    del entry[1][located[1]]
+
+    def _evict(self, horizon: float) -> None:
+        if horizon < self._horizon + 1.0:
+            return
+        self._horizon = horizon
+        self._starts = {ws: started for ws, started in self._starts.items() if started >= horizon}
+        for window_start, (started, by_hash) in list(self._windows.items()):
+            if started < horizon:
+                del self._windows[window_start]
+                for ingests in by_hash.values():
+                    for ingest_id in ingests:
+                        self._located.pop(ingest_id, None)
+
+
+_INDEXES: dict[tuple[Path, int, int], FingerprintIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_fingerprint_index(db_path: Path, window_seconds: int, bloom_bits: int) -> FingerprintIndex:
+    key = (db_path, window_seconds, bloom_bits)
+    index = _INDEXES.get(key)
+    if index is None:
+        with _INDEXES_LOCK:
+            index = _INDEXES.get(key)
+            if index is None:
+                index = FingerprintIndex(window_seconds, bloom_bits=bloom_bits)
+                _INDEXES[key] = index
+    return index
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import struct
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
 from datetime import UTC, datetime, timedelta
 
 from autotriage.core.fingerprint.hasher import stable_hash
@@ -14,14 +17,121 @@ class Fingerprint:
     window_start: datetime
 
 
-def compute_fingerprint(alert: CanonicalAlert, dedup_window_seconds: int) -> Fingerprint:
-    window = timedelta(seconds=dedup_window_seconds)
-    ts = alert.ts.astimezone(UTC)
-    window_start = ts - timedelta(seconds=(ts.timestamp() % window.total_seconds()))
-    parts: dict[str, str] = {"vendor": alert.vendor, "type": alert.alert_type, "title": alert.title}
-    if alert.rule_id:
+@dataclass(frozen=True)
+class FieldSelection:
+    # Which alert fields make two alerts "the same". For each entity type one value is used:
+    # the greatest, which is what the original dict-based fingerprint ended up keeping.
+    title: bool = True
+    rule_id: bool = True
+    entity_types: tuple[str, ...] = ("domain", "dst_ip", "host", "src_ip", "user")
+    # Compiled once: entity type -> field tag, in encoding order.
+    tags: Mapping[str, int] = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        tags = {kind: tag for tag, kind in enumerate(self.entity_types, start=16)}
+        object.__setattr__(self, "tags", tags)
+
+
+DEFAULT_SELECTION = FieldSelection()
+
+Encoder = Callable[[CanonicalAlert, FieldSelection], str]
+
+_HEADER = struct.Struct(">BI")
+
+
+def _legacy_sha256(alert: CanonicalAlert, sel: FieldSelection) -> str:
+    parts: dict[str, str] = {"vendor": alert.vendor, "type": alert.alert_type}
+    if sel.title:
+        parts["title"] = alert.title
+    if sel.rule_id and alert.rule_id:
         parts["rule_id"] = alert.rule_id
     for e in sorted(alert.entities, key=lambda x: (x.type.value, x.value)):
-        if e.type.value in {"user", "host", "src_ip", "dst_ip", "domain"}:
+        if e.type.value in sel.entity_types:
             parts[f"{e.type.value}"] = e.value
-    return Fingerprint(strategy="default", fp_hash=stable_hash(parts), window_start=window_start)
+    return stable_hash(parts)
+
+
+def _lp_blake2b(alert: CanonicalAlert, sel: FieldSelection) -> str:
+    # Every field is written as a one-byte tag and a length-prefixed UTF-8 value, in tag
+    # order, so no two field sets encode to the same bytes.
+    tags = sel.tags
+    best: dict[int, str] = {}
+    for e in alert.entities:
+        tag = tags.get(e.type)
+        if tag is not None and (tag not in best or e.value > best[tag]):
+            best[tag] = e.value
+    best[0] = alert.vendor
+    best[1] = alert.alert_type
+    if sel.title:
+        best[2] = alert.title
+    if sel.rule_id and alert.rule_id:
+        best[3] = alert.rule_id
+    chunks: list[bytes] = []
+    for tag in sorted(best):
+        data = best[tag].encode("utf-8")
+        chunks.append(_HEADER.pack(tag, len(data)))
+        chunks.append(data)
+    return hashlib.blake2b(b"".join(chunks), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True)
+class FingerprintStrategy:
+    # name is stored with every fingerprint and is part of the dedup key, so it must change
+    # whenever the encoding or the default selection does. Selections are keyed by
+    # (vendor, alert_type), with "*" as a wildcard on either side.
+    name: str
+    encode: Encoder
+    selections: Mapping[tuple[str, str], FieldSelection] = field(default_factory=dict)
+    _resolved: dict[tuple[str, str], FieldSelection] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+
+    def selection(self, vendor: str, alert_type: str) -> FieldSelection:
+        key = (vendor, alert_type)
+        sel = self._resolved.get(key)
+        if sel is None:
+            sel = (
+                self.selections.get(key)
+                or self.selections.get((vendor, "*"))
+                or self.selections.get(("*", alert_type))
+                or DEFAULT_SELECTION
+            )
+            self._resolved[key] = sel
+        return sel
+
+    def fingerprint_hash(self, alert: CanonicalAlert) -> str:
+        return self.encode(alert, self.selection(alert.vendor, alert.alert_type))
+
+
+STRATEGIES: dict[str, FingerprintStrategy] = {}
+
+
+def register_strategy(strategy: FingerprintStrategy) -> None:
+    STRATEGIES[strategy.name] = strategy
+
+
+# "default" is the original JSON + SHA-256 encoding, kept so existing fingerprints keep
+# matching until their windows close.
+register_strategy(FingerprintStrategy(name="default", encode=_legacy_sha256))
+register_strategy(FingerprintStrategy(name="lp-blake2b-v1", encode=_lp_blake2b))
+
+DEFAULT_STRATEGY = "lp-blake2b-v1"
+
+
+def get_strategy(name: str) -> FingerprintStrategy:
+    strategy = STRATEGIES.get(name)
+    if strategy is None:
+        raise ValueError(f"unknown fingerprint strategy: {name}")
+    return strategy
+
+
+def compute_fingerprint(
+    alert: CanonicalAlert, dedup_window_seconds: int, strategy: str = DEFAULT_STRATEGY
+) -> Fingerprint:
+    window = timedelta(seconds=dedup_window_seconds)
+    ts = alert.ts.astimezone(UTC)
+    window_start = ts - timedelta(seconds=(ts.timestamp() % window.total_seconds()))
+    chosen = get_strategy(strategy)
+    return Fingerprint(
+        strategy=chosen.name, fp_hash=chosen.fingerprint_hash(alert), window_start=window_start
+    )
@@ -1,66 +1,259 @@
 from __future__ import annotations
 
 import sqlite3
+from collections.abc import Callable
+from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from typing import Any
 
 import structlog
 
-from autotriage.config import load_effective_config
+from autotriage.config import AppConfig, load_effective_config
 from autotriage.core.pipeline.stages import (
+    LeaseLost,
+    Lookahead,
     PipelineState,
+    look_ahead,
     stage_correlate,
+    stage_correlate_many,
     stage_dedup,
     stage_enrich,
     stage_finalize,
+    stage_finalize_many,
     stage_fingerprint,
     stage_normalize,
     stage_score_decide_route,
 )
+from autotriage.core.ruleset import get_ruleset
+from autotriage.storage.db import unit_of_work
+from autotriage.storage.repositories.alerts_repo import AlertsRepository
 from autotriage.storage.repositories.deadletter_repo import DeadletterRepository
 from autotriage.storage.repositories.events_repo import EventsRepository
 
 log = structlog.get_logger(__name__)
 
+Stage = Callable[[PipelineState], PipelineState]
+# A stage that can also take the whole batch at once; stages without one run per alert.
+BatchStage = Callable[[list[PipelineState]], list[PipelineState]]
 
-def process_ingest(
-    db: sqlite3.Connection, ingest_id: str, raw_payload: dict[str, Any]
-) -> PipelineState:
-    cfg = load_effective_config()
+
+@dataclass(frozen=True)
+class FailedIngest:
+    ingest_id: str
+    stage: str
+    error: Exception
+
+
+@dataclass
+class BatchOutcome:
+    processed: list[PipelineState] = field(default_factory=list)
+    failed: list[FailedIngest] = field(default_factory=list)
+    # Alerts whose lease went to another worker before they were processed or failed; they
+    # are left to it.
+    lost: list[FailedIngest] = field(default_factory=list)
+
+
+def _stages(
+    db: sqlite3.Connection, cfg: AppConfig, events: EventsRepository, owner: str | None
+) -> list[tuple[str, Stage, BatchStage | None]]:
+    # One rules snapshot per batch, so a reload never splits a batch across versions.
+    rules = get_ruleset(cfg.rules_dir)
+    return [
+        ("normalize", lambda st: stage_normalize(db, cfg, events, st), None),
+        ("fingerprint", lambda st: stage_fingerprint(db, cfg, events, st), None),
+        ("dedup", lambda st: stage_dedup(db, events, st), None),
+        (
+            "correlate",
+            lambda st: stage_correlate(db, cfg, events, st),
+            lambda states: stage_correlate_many(db, cfg, events, states),
+        ),
+        ("enrich", lambda st: stage_enrich(db, cfg, events, st), None),
+        ("score_decide_route", lambda st: stage_score_decide_route(db, rules, events, st), None),
+        (
+            "finalize",
+            lambda st: stage_finalize(db, events, st, owner),
+            lambda states: stage_finalize_many(db, events, states, owner),
+        ),
+    ]
+
+
+def _fail(
+    db: sqlite3.Connection,
+    events: EventsRepository,
+    st: PipelineState,
+    stage: str,
+    error: Exception,
+    owner: str | None,
+    outcome: BatchOutcome,
+) -> None:
+    failed = FailedIngest(ingest_id=st.ingest_id, stage=stage, error=error)
+    # Only while `owner` still holds the lease (None: the alert was never claimed); an alert
+    # claimed again by another worker is neither failed nor dead-lettered here.
+    if not AlertsRepository(db).mark_failed(st.ingest_id, repr(error), owner):
+        outcome.lost.append(failed)
+        return
+    DeadletterRepository(db).upsert(st.ingest_id, stage=stage, error=repr(error), payload=st.raw)
+    events.append(
+        stage="failed",
+        created_at=datetime.now(tz=UTC),
+        ingest_id=st.ingest_id,
+        case_id=None,
+        payload={"error": repr(error), "failed_stage": stage},
+    )
+    outcome.failed.append(failed)
+
+
+def _drop_lost(
+    db: sqlite3.Connection,
+    items: list[tuple[str, dict[str, Any]]],
+    owner: str | None,
+    outcome: BatchOutcome,
+) -> list[tuple[str, dict[str, Any]]]:
+    # Alerts whose lease `owner` no longer holds are left to their new owner without running a
+    # single stage: their events, case and status are its to write.
+    held = AlertsRepository(db).leased_to([ingest_id for ingest_id, _ in items], owner)
+    for ingest_id, _ in items:
+        if ingest_id not in held:
+            outcome.lost.append(
+                FailedIngest(ingest_id=ingest_id, stage="claim", error=LeaseLost(ingest_id))
+            )
+    return [item for item in items if item[0] in held]
+
+
+class _StageFailure(Exception):
+    def __init__(self, st: PipelineState, stage: str, error: Exception) -> None:
+        super().__init__(repr(error))
+        self.st = st
+        self.stage = stage
+        self.error = error
+
+
+def _run_stages(
+    db: sqlite3.Connection,
+    cfg: AppConfig,
+    events: EventsRepository,
+    items: list[tuple[str, dict[str, Any]]],
+    owner: str | None,
+    on_failure: Callable[[PipelineState, str, Exception], None],
+    ahead: dict[str, Lookahead] | None = None,
+) -> list[PipelineState]:
+    # Each stage runs over the whole batch, in order, before the next stage starts; an alert
+    # that fails a stage is handed to on_failure and dropped from the rest. A batch stage runs
+    # in a savepoint; if it fails, it is undone and the stage re-run per alert, so the failure
+    # is pinned on the alert that caused it.
+    ahead = ahead or {}
+    active = [
+        PipelineState(ingest_id=ingest_id, raw=raw, ahead=ahead.get(ingest_id))
+        for ingest_id, raw in items
+    ]
+    for stage_name, stage, batch_stage in _stages(db, cfg, events, owner):
+        if batch_stage is not None and len(active) > 1:
+            try:
+                with unit_of_work(db):
+                    active = batch_stage(active)
+                continue
+            except Exception:  # noqa: BLE001
+                log.warning("batch_stage_failed", stage=stage_name, exc_info=True)
+        survivors: list[PipelineState] = []
+        for st in active:
+            try:
+                survivors.append(stage(st))
+            except Exception as e:  # noqa: BLE001
+                on_failure(st, stage_name, e)
+        active = survivors
+    return active
+
+
+def _process_atomic(
+    db: sqlite3.Connection,
+    cfg: AppConfig,
+    events: EventsRepository,
+    items: list[tuple[str, dict[str, Any]]],
+    owner: str | None,
+    outcome: BatchOutcome,
+) -> list[PipelineState]:
+    # The sub-batch is one transaction. Failing alerts are set aside while the rest carry on;
+    # if there were any, everything is rolled back, they are dead-lettered on their own, and
+    # the sub-batch is re-run once without them. Only alerts that fail because of a failed one
+    # (say, one that would have opened their case) make for another run.
+    # Enrichment lookups happen first, without the write lock, and once for all the runs.
+    ahead = look_ahead(db, cfg, items)
+    failures: list[_StageFailure] = []
+
+    def set_aside(st: PipelineState, stage: str, error: Exception) -> None:
+        failures.append(_StageFailure(st, stage, error))
+
+    pending = list(items)
+    while pending:
+        failures.clear()
+        try:
+            with unit_of_work(db):
+                # Under the write lock, so no lease changes hands while the stages run.
+                pending = _drop_lost(db, pending, owner, outcome)
+                processed = _run_stages(db, cfg, events, pending, owner, set_aside, ahead)
+                if failures:
+                    raise failures[0]
+        except _StageFailure:
+            for f in failures:
+                log.error(
+                    "pipeline_failed",
+                    ingest_id=f.st.ingest_id,
+                    stage=f.stage,
+                    exc_info=f.error,
+                )
+                _fail(db, events, f.st, f.stage, f.error, owner, outcome)
+            failed = {f.st.ingest_id for f in failures}
+            pending = [item for item in pending if item[0] not in failed]
+            continue
+        return processed
+    return []
+
+
+def process_ingest_many(
+    db: sqlite3.Connection,
+    items: list[tuple[str, dict[str, Any]]],
+    *,
+    cfg: AppConfig | None = None,
+    atomic: bool = True,
+    owner: str | None = None,
+    between_transactions: Callable[[], object] | None = None,
+) -> BatchOutcome:
+    cfg = cfg or load_effective_config()
     events = EventsRepository(db)
-    st = PipelineState(ingest_id=ingest_id, raw=raw_payload)
-    current_stage = "ingested"
-    try:
-        current_stage = "normalize"
-        st = stage_normalize(db, cfg, events, st)
-        current_stage = "fingerprint"
-        st = stage_fingerprint(db, cfg, events, st)
-        current_stage = "dedup"
-        st = stage_dedup(db, events, st)
-        current_stage = "correlate"
-        st = stage_correlate(db, cfg, events, st)
-        current_stage = "enrich"
-        st = stage_enrich(db, cfg, events, st)
-        current_stage = "score_decide_route"
-        st = stage_score_decide_route(db, cfg, events, st)
-        current_stage = "finalize"
-        st = stage_finalize(db, events, st)
-        return st
-    except Exception as e:  # noqa: BLE001
-        DeadletterRepository(db).upsert(
-            ingest_id, stage=current_stage, error=repr(e), payload=raw_payload
-        )
-        events.append(
-            stage="failed",
-            created_at=datetime.now(tz=UTC),
-            ingest_id=ingest_id,
-            case_id=None,
-            payload={"error": repr(e), "failed_stage": current_stage},
-        )
-        db.execute(
-            "UPDATE alerts SET status = 'failed', last_error = ? WHERE ingest_id = ?",
-            (repr(e), ingest_id),
+    outcome = BatchOutcome()
+
+    if not atomic:
+        # Every repository call commits on its own; a failing alert keeps its partial writes.
+        def on_failure(st: PipelineState, stage: str, error: Exception) -> None:
+            _fail(db, events, st, stage, error, owner, outcome)
+            log.exception("pipeline_failed", ingest_id=st.ingest_id, stage=stage)
+
+        items = _drop_lost(db, items, owner, outcome)
+        outcome.processed = _run_stages(db, cfg, events, items, owner, on_failure)
+        return outcome
+
+    # Each sub-batch of cfg.worker_transaction_size alerts is one transaction, so the write lock
+    # is held for one sub-batch at a time and parallel workers take turns between them.
+    # between_transactions runs on this connection after each one, while it holds no lock.
+    size = max(1, cfg.worker_transaction_size)
+    for start in range(0, len(items), size):
+        outcome.processed += _process_atomic(
+            db, cfg, events, items[start : start + size], owner, outcome
         )
-        db.commit()
-        log.exception("pipeline_failed", ingest_id=ingest_id)
-        raise
+        if between_transactions is not None:
+            between_transactions()
+    return outcome
+
+
+def process_ingest(
+    db: sqlite3.Connection,
+    ingest_id: str,
+    raw_payload: dict[str, Any],
+    *,
+    cfg: AppConfig | None = None,
+    atomic: bool = True,
+) -> PipelineState:
+    outcome = process_ingest_many(db, [(ingest_id, raw_payload)], cfg=cfg, atomic=atomic)
+    if outcome.failed or outcome.lost:
+        raise (outcome.failed + outcome.lost)[0].error
+    return outcome.processed[0]
@@ -1,26 +1,53 @@
 from __future__ import annotations
 
-import json
 import sqlite3
 import time
 from dataclasses import dataclass
 from datetime import UTC, datetime
+from functools import partial
 from typing import Any
 
+import structlog
+
 from autotriage.config import AppConfig
 from autotriage.connectors.mock_ticketing import MockTicketingConnector
+from autotriage.core.correlate.batch import CorrelationInput, correlate_many
 from autotriage.core.correlate.correlator import correlate_into_case
-from autotriage.core.decisioning.decide import decide, load_thresholds
+from autotriage.core.correlate.hot import HotEntities, get_hot_entities
+from autotriage.core.correlate.index import EntityCaseIndex, get_entity_case_index
+from autotriage.core.decisioning.decide import decide
 from autotriage.core.dedup.deduper import find_duplicate_of, record_fingerprint
-from autotriage.core.fingerprint.strategies import compute_fingerprint
-from autotriage.core.models.alert import CanonicalAlert
+from autotriage.core.dedup.index import get_fingerprint_index
+from autotriage.core.fingerprint.strategies import Fingerprint, compute_fingerprint
+from autotriage.core.models.alert import CanonicalAlert, NormalizationResult
 from autotriage.core.normalize.registry import normalize
 from autotriage.core.routing.router import route
-from autotriage.core.scoring.rule_parser import load_scoring_rules
+from autotriage.core.ruleset import RuleSet
 from autotriage.core.scoring.score_engine import score_alert
 from autotriage.enrichers.manager import EnricherManager
+from autotriage.enrichers.registry import get_registry
 from autotriage.metrics.prom import PIPELINE_STAGE_SECONDS, PIPELINE_STAGE_TOTAL
+from autotriage.storage.db import commit, on_rollback, on_unit_of_work_end
+from autotriage.storage.repositories.case_snapshots_repo import CaseSnapshotsRepository
 from autotriage.storage.repositories.events_repo import EventsRepository
+from autotriage.util import codec
+
+log = structlog.get_logger(__name__)
+
+
+class LeaseLost(Exception):
+    # The alert's lease went to another worker; the alert is left to it.
+    pass
+
+
+@dataclass
+class Lookahead:
+    # What look_ahead works out for an alert before its transaction opens.
+    normalized: NormalizationResult
+    fingerprint: Fingerprint
+    duplicate: bool
+    enrichments: dict[str, Any] | None = None
+    enrich_seconds: float = 0.0
 
 
 @dataclass
@@ -32,21 +59,60 @@ class PipelineState:
     duplicate_of: str | None = None
     case_id: str | None = None
     enrichments: dict[str, Any] | None = None
+    ahead: Lookahead | None = None
     score: dict[str, Any] | None = None
     routing: dict[str, Any] | None = None
 
 
+# Stage metrics observed in each connection's open unit of work, as (stage, seconds per alert,
+# alerts), recorded when it commits.
+_PENDING_METRICS: dict[int, list[tuple[str, float, int]]] = {}
+
+
+def _record(observed: list[tuple[str, float, int]]) -> None:
+    for stage, seconds, count in observed:
+        PIPELINE_STAGE_TOTAL.labels(stage).inc(count)
+        histogram = PIPELINE_STAGE_SECONDS.labels(stage)
+        for _ in range(count):
+            histogram.observe(seconds)
+
+
+def _flush(key: int, committed: bool) -> None:
+    observed = _PENDING_METRICS.pop(key, [])
+    if committed:
+        _record(observed)
+
+
+def _truncate(pending: list[tuple[str, float, int]], length: int) -> None:
+    del pending[length:]
+
+
+def _observe(db: sqlite3.Connection, stage: str, t0: float, count: int = 1) -> None:
+    # Stage metrics count work that is kept: inside a unit of work they are recorded when it
+    # commits, and dropped if the savepoint or transaction the stage ran in is rolled back.
+    observed = (stage, (time.perf_counter() - t0) / count, count)
+    key = id(db)
+    pending = _PENDING_METRICS.get(key)
+    if pending is None:
+        if not on_unit_of_work_end(db, partial(_flush, key)):
+            _record([observed])
+            return
+        pending = _PENDING_METRICS[key] = []
+    on_rollback(db, partial(_truncate, pending, len(pending)))
+    pending.append(observed)
+
+
 def stage_normalize(
     db: sqlite3.Connection, cfg: AppConfig, events: EventsRepository, st: PipelineState
 ) -> PipelineState:
     t0 = time.perf_counter()
-    res = normalize(st.raw)
+    res = st.ahead.normalized if st.ahead is not None else normalize(st.raw)
     alert = res.alert.model_copy(update={"ingest_id": st.ingest_id})
     db.execute(
         "UPDATE alerts SET normalized_json = ?, vendor = ?, status = 'normalized' WHERE ingest_id = ?",
         (alert.model_dump_json(), alert.vendor, st.ingest_id),
     )
-    db.commit()
+    commit(db)
     events.append(
         stage="normalized",
         created_at=datetime.now(tz=UTC),
@@ -55,8 +121,7 @@ def stage_normalize(
         payload={"vendor": alert.vendor, "alert_type": alert.alert_type, "warnings": res.warnings},
     )
     st.alert = alert
-    PIPELINE_STAGE_TOTAL.labels("normalized").inc()
-    PIPELINE_STAGE_SECONDS.labels("normalized").observe(time.perf_counter() - t0)
+    _observe(db, "normalized", t0)
     return st
 
 
@@ -65,10 +130,18 @@ def stage_fingerprint(
 ) -> PipelineState:
     t0 = time.perf_counter()
     assert st.alert is not None
-    fp = compute_fingerprint(st.alert, cfg.dedup_window_seconds)
+    fp = (
+        st.ahead.fingerprint
+        if st.ahead is not None
+        else compute_fingerprint(st.alert, cfg.dedup_window_seconds, cfg.fingerprint_strategy)
+    )
     st.fingerprint_hash = fp.fp_hash
-    dup_of = find_duplicate_of(db, fp)
-    record_fingerprint(db, st.ingest_id, fp)
+    if cfg.dedup_index:
+        index = get_fingerprint_index(cfg.db_path, cfg.dedup_window_seconds, cfg.dedup_bloom_bits)
+        dup_of = index.check_and_record(db, st.ingest_id, fp)
+    else:
+        dup_of = find_duplicate_of(db, fp)
+        record_fingerprint(db, st.ingest_id, fp)
     st.duplicate_of = dup_of
     events.append(
         stage="fingerprinted",
@@ -81,8 +154,7 @@ def stage_fingerprint(
             "duplicate_of": dup_of,
         },
     )
-    PIPELINE_STAGE_TOTAL.labels("fingerprinted").inc()
-    PIPELINE_STAGE_SECONDS.labels("fingerprinted").observe(time.perf_counter() - t0)
+    _observe(db, "fingerprinted", t0)
     return st
 
 
@@ -92,7 +164,7 @@ def stage_dedup(
     t0 = time.perf_counter()
     if st.duplicate_of is not None and st.duplicate_of != st.ingest_id:
         db.execute("UPDATE alerts SET status = 'deduped' WHERE ingest_id = ?", (st.ingest_id,))
-        db.commit()
+        commit(db)
         events.append(
             stage="deduped",
             created_at=datetime.now(tz=UTC),
@@ -102,12 +174,48 @@ def stage_dedup(
         )
     else:
         db.execute("UPDATE alerts SET status = 'dedup_pass' WHERE ingest_id = ?", (st.ingest_id,))
-        db.commit()
-    PIPELINE_STAGE_TOTAL.labels("deduped").inc()
-    PIPELINE_STAGE_SECONDS.labels("deduped").observe(time.perf_counter() - t0)
+        commit(db)
+    _observe(db, "deduped", t0)
     return st
 
 
+def _correlation_input(alert: CanonicalAlert) -> CorrelationInput:
+    # Provisional values; scoring and routing replace them once enrichment is done.
+    return CorrelationInput(
+        alert=alert,
+        base_severity=alert.severity,
+        decision="CREATE_TICKET",
+        queue="triage",
+        score={"severity": alert.severity, "confidence": 0.6, "contributions": []},
+        routing={"queue": "triage", "rationale": ["default_queue"]},
+    )
+
+
+def _correlation_helpers(cfg: AppConfig) -> tuple[EntityCaseIndex | None, HotEntities | None]:
+    index = (
+        get_entity_case_index(cfg.db_path, cfg.correlation_window_seconds)
+        if cfg.correlation_index
+        else None
+    )
+    hot = (
+        get_hot_entities(cfg.db_path, cfg.hot_entity_threshold, cfg.hot_entity_window_seconds)
+        if cfg.hot_entity_threshold > 0
+        else None
+    )
+    return index, hot
+
+
+def _mark_correlated(events: EventsRepository, st: PipelineState) -> None:
+    assert st.alert is not None
+    events.append(
+        stage="correlated",
+        created_at=datetime.now(tz=UTC),
+        ingest_id=st.ingest_id,
+        case_id=st.case_id,
+        payload={"case_id": st.case_id, "entity_count": len(st.alert.entities)},
+    )
+
+
 def stage_correlate(
     db: sqlite3.Connection, cfg: AppConfig, events: EventsRepository, st: PipelineState
 ) -> PipelineState:
@@ -115,33 +223,110 @@ def stage_correlate(
     assert st.alert is not None
     if st.duplicate_of is not None and st.duplicate_of != st.ingest_id:
         return st
-    score = {"severity": st.alert.severity, "confidence": 0.6, "contributions": []}
-    routing = {"queue": "triage", "rationale": ["default_queue"]}
-    case_id = correlate_into_case(
+    item = _correlation_input(st.alert)
+    index, hot = _correlation_helpers(cfg)
+    st.case_id = correlate_into_case(
         db,
         st.alert,
         correlation_window_seconds=cfg.correlation_window_seconds,
-        base_severity=st.alert.severity,
-        decision="CREATE_TICKET",
-        queue="triage",
-        score=score,
-        routing=routing,
-    )
-    st.case_id = case_id
-    events.append(
-        stage="correlated",
-        created_at=datetime.now(tz=UTC),
-        ingest_id=st.ingest_id,
-        case_id=case_id,
-        payload={"case_id": case_id, "entity_count": len(st.alert.entities)},
+        base_severity=item.base_severity,
+        decision=item.decision,
+        queue=item.queue,
+        score=item.score,
+        routing=item.routing,
+        index=index,
+        hot=hot,
     )
+    _mark_correlated(events, st)
     db.execute("UPDATE alerts SET status = 'correlated' WHERE ingest_id = ?", (st.ingest_id,))
-    db.commit()
-    PIPELINE_STAGE_TOTAL.labels("correlated").inc()
-    PIPELINE_STAGE_SECONDS.labels("correlated").observe(time.perf_counter() - t0)
+    commit(db)
+    _observe(db, "correlated", t0)
     return st
 
 
+def stage_correlate_many(
+    db: sqlite3.Connection, cfg: AppConfig, events: EventsRepository, states: list[PipelineState]
+) -> list[PipelineState]:
+    # stage_correlate for a whole batch, through correlate_many.
+    t0 = time.perf_counter()
+    todo = [st for st in states if st.duplicate_of is None or st.duplicate_of == st.ingest_id]
+    inputs: list[CorrelationInput] = []
+    for st in todo:
+        assert st.alert is not None
+        inputs.append(_correlation_input(st.alert))
+    index, hot = _correlation_helpers(cfg)
+    case_ids = correlate_many(
+        db, inputs, correlation_window_seconds=cfg.correlation_window_seconds, index=index, hot=hot
+    )
+    for st, case_id in zip(todo, case_ids, strict=True):
+        st.case_id = case_id
+        _mark_correlated(events, st)
+    db.executemany(
+        "UPDATE alerts SET status = 'correlated' WHERE ingest_id = ?",
+        [(st.ingest_id,) for st in todo],
+    )
+    commit(db)
+    if todo:
+        _observe(db, "correlated", t0, len(todo))
+    return states
+
+
+def _enricher_manager(db: sqlite3.Connection, cfg: AppConfig) -> EnricherManager:
+    return EnricherManager(
+        db=db,
+        data_dir=cfg.data_dir,
+        enabled=cfg.enabled_enrichers,
+        registry=get_registry(cfg.data_dir),
+        deadline_seconds=cfg.enrich_deadline_seconds,
+    )
+
+
+def _duplicate_ahead(
+    db: sqlite3.Connection, cfg: AppConfig, ingest_id: str, fp: Fingerprint
+) -> bool:
+    if cfg.dedup_index:
+        index = get_fingerprint_index(cfg.db_path, cfg.dedup_window_seconds, cfg.dedup_bloom_bits)
+        dup_of = index.peek(db, fp)
+    else:
+        dup_of = find_duplicate_of(db, fp)
+    return dup_of is not None and dup_of != ingest_id
+
+
+def look_ahead(
+    db: sqlite3.Connection, cfg: AppConfig, items: list[tuple[str, dict[str, Any]]]
+) -> dict[str, Lookahead]:
+    # Normalizes, fingerprints and enriches a sub-batch before it opens its transaction. A
+    # lookup can wait seconds on the network; inside the transaction it would hold the write
+    # lock all that time, stalling webhook inserts, lease heartbeats and the flight rows other
+    # workers use to share lookups. Alerts that already look like duplicates, of a recorded
+    # fingerprint or of an earlier alert here, are not enriched, as stage_enrich would skip
+    # them. The stages use what is found here and redo whatever failed.
+    out: dict[str, Lookahead] = {}
+    seen: set[tuple[str, str, datetime]] = set()
+    for ingest_id, raw in items:
+        try:
+            res = normalize(raw)
+            fp = compute_fingerprint(res.alert, cfg.dedup_window_seconds, cfg.fingerprint_strategy)
+            key = (fp.strategy, fp.fp_hash, fp.window_start)
+            duplicate = key in seen or _duplicate_ahead(db, cfg, ingest_id, fp)
+        except Exception:  # noqa: BLE001
+            log.debug("look_ahead_skipped", ingest_id=ingest_id, exc_info=True)
+            continue
+        seen.add(key)
+        out[ingest_id] = Lookahead(normalized=res, fingerprint=fp, duplicate=duplicate)
+    mgr = _enricher_manager(db, cfg)
+    for ingest_id, ahead in out.items():
+        if ahead.duplicate:
+            continue
+        t0 = time.perf_counter()
+        try:
+            ahead.enrichments = mgr.enrich(ahead.normalized.alert)
+        except Exception:  # noqa: BLE001
+            log.debug("look_ahead_enrich_failed", ingest_id=ingest_id, exc_info=True)
+        ahead.enrich_seconds = time.perf_counter() - t0
+    return out
+
+
 def stage_enrich(
     db: sqlite3.Connection, cfg: AppConfig, events: EventsRepository, st: PipelineState
 ) -> PipelineState:
@@ -149,8 +334,12 @@ def stage_enrich(
     assert st.alert is not None
     if st.duplicate_of is not None and st.duplicate_of != st.ingest_id:
         return st
-    mgr = EnricherManager(db=db, data_dir=cfg.data_dir, enabled=cfg.enabled_enrichers)
-    enrichments = mgr.enrich(st.alert)
+    if st.ahead is not None and st.ahead.enrichments is not None:
+        # Timed from the lookup made ahead, so the stage metric is the lookup's latency.
+        enrichments = st.ahead.enrichments
+        t0 -= st.ahead.enrich_seconds
+    else:
+        enrichments = _enricher_manager(db, cfg).enrich(st.alert)
     st.enrichments = enrichments
     events.append(
         stage="enriched",
@@ -159,29 +348,27 @@ def stage_enrich(
         case_id=st.case_id,
         payload={"enrichments": enrichments},
     )
-    PIPELINE_STAGE_TOTAL.labels("enriched").inc()
-    PIPELINE_STAGE_SECONDS.labels("enriched").observe(time.perf_counter() - t0)
+    _observe(db, "enriched", t0)
     return st
 
 
 def stage_score_decide_route(
-    db: sqlite3.Connection, cfg: AppConfig, events: EventsRepository, st: PipelineState
+    db: sqlite3.Connection, rules: RuleSet, events: EventsRepository, st: PipelineState
 ) -> PipelineState:
     t0 = time.perf_counter()
     if st.case_id is None or st.alert is None or st.enrichments is None:
         return st
-    scoring_rules = load_scoring_rules(cfg.rules_dir)
-    score = score_alert(st.alert, st.enrichments, scoring_rules)
-    thresholds_cfg = load_thresholds(cfg.rules_dir)
-    decision = decide(score, st.enrichments, thresholds_cfg)
-    routing = route(cfg.rules_dir, decision, st.enrichments)
+    score = score_alert(st.alert, st.enrichments, rules.scoring)
+    decision = decide(score, st.enrichments, rules.thresholds)
+    routing = route(rules.routing, decision, st.enrichments)
 
     st.score = score.model_dump()
     st.routing = routing.model_dump()
     db.execute(
         """
         UPDATE cases
-        SET severity = ?, confidence = ?, decision = ?, queue = ?, score_json = ?, routing_json = ?
+        SET severity = ?, confidence = ?, decision = ?, queue = ?, score_json = ?, routing_json = ?,
+            ruleset_version = ?, updated_at = ?
         WHERE case_id = ?
         """,
         (
@@ -189,12 +376,14 @@ def stage_score_decide_route(
             score.confidence,
             str(decision),
             routing.queue,
-            json.dumps(st.score),
-            json.dumps(st.routing),
+            codec.dumps(st.score),
+            codec.dumps(st.routing),
+            rules.version,
+            datetime.now(tz=UTC).isoformat(),
             st.case_id,
         ),
     )
-    db.commit()
+    commit(db)
     events.append(
         stage="scored",
         created_at=datetime.now(tz=UTC),
@@ -235,17 +424,22 @@ def stage_score_decide_route(
             case_id=st.case_id,
             payload={"status": "auto_closed"},
         )
-    PIPELINE_STAGE_TOTAL.labels("scored_decided_routed").inc()
-    PIPELINE_STAGE_SECONDS.labels("scored_decided_routed").observe(time.perf_counter() - t0)
+    _observe(db, "scored_decided_routed", t0)
     return st
 
 
 def stage_finalize(
-    db: sqlite3.Connection, events: EventsRepository, st: PipelineState
+    db: sqlite3.Connection, events: EventsRepository, st: PipelineState, owner: str | None
 ) -> PipelineState:
+    # Only while `owner` still holds the alert's lease (None: the alert was never claimed).
     t0 = time.perf_counter()
-    db.execute("UPDATE alerts SET status = 'processed' WHERE ingest_id = ?", (st.ingest_id,))
-    db.commit()
+    cur = db.execute(
+        "UPDATE alerts SET status = 'processed' WHERE ingest_id = ? AND lease_owner IS ?",
+        (st.ingest_id, owner),
+    )
+    if cur.rowcount != 1:
+        raise LeaseLost(st.ingest_id)
+    commit(db)
     events.append(
         stage="processed",
         created_at=datetime.now(tz=UTC),
@@ -253,6 +447,43 @@ def stage_finalize(
         case_id=st.case_id,
         payload={"status": "processed"},
     )
-    PIPELINE_STAGE_TOTAL.labels("processed").inc()
-    PIPELINE_STAGE_SECONDS.labels("processed").observe(time.perf_counter() - t0)
+    if st.case_id is not None:
+        CaseSnapshotsRepository(db).refresh(st.case_id, st.enrichments)
+    _observe(db, "processed", t0)
     return st
+
+
+def stage_finalize_many(
+    db: sqlite3.Connection,
+    events: EventsRepository,
+    states: list[PipelineState],
+    owner: str | None,
+) -> list[PipelineState]:
+    # stage_finalize for a whole batch, refreshing each case's snapshot once, after its last
+    # alert, with the latest non-empty enrichments the batch computed for it. If any lease was
+    # lost, stage_finalize is left to find which.
+    t0 = time.perf_counter()
+    cur = db.executemany(
+        "UPDATE alerts SET status = 'processed' WHERE ingest_id = ? AND lease_owner IS ?",
+        [(st.ingest_id, owner) for st in states],
+    )
+    if cur.rowcount != len(states):
+        raise LeaseLost(f"{len(states) - cur.rowcount} of {len(states)} alerts")
+    commit(db)
+    enrichments: dict[str, dict[str, Any] | None] = {}
+    for st in states:
+        events.append(
+            stage="processed",
+            created_at=datetime.now(tz=UTC),
+            ingest_id=st.ingest_id,
+            case_id=st.case_id,
+            payload={"status": "processed"},
+        )
+        if st.case_id is not None:
+            enrichments[st.case_id] = st.enrichments or enrichments.get(st.case_id)
+    snapshots = CaseSnapshotsRepository(db)
+    for case_id, found in enrichments.items():
+        snapshots.refresh(case_id, found)
+    if states:
+        _observe(db, "processed", t0, len(states))
+    return states
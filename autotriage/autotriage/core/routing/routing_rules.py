@@ -24,6 +24,10 @@ class RoutingRules:
 
 def load_routing_rules(rules_dir: Path) -> RoutingRules:
     data = yaml.safe_load((rules_dir / "routing.yml").read_text(encoding="utf-8")) or {}
+    return parse_routing_rules(data)
+
+
+def parse_routing_rules(data: dict[str, Any]) -> RoutingRules:
     rules: list[RoutingRule] = []
     for item in data.get("rules") or []:
         rules.append(
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import hashlib
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import FrameType
+
+import structlog
+import yaml
+
+from autotriage.core.decisioning.decide import Thresholds, parse_thresholds
+from autotriage.core.routing.routing_rules import RoutingRules, parse_routing_rules
+from autotriage.core.scoring.rule_parser import ScoringRules, parse_scoring_rules
+
+log = structlog.get_logger(__name__)
+
+RULE_FILES = ("scoring.yml", "thresholds.yml", "routing.yml")
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    version: str
+    scoring: ScoringRules
+    thresholds: Thresholds
+    routing: RoutingRules
+
+
+def compile_ruleset(rules_dir: Path) -> RuleSet:
+    blobs = {name: (rules_dir / name).read_bytes() for name in RULE_FILES}
+    digest = hashlib.sha256()
+    for name in RULE_FILES:
+        digest.update(name.encode("utf-8") + b"\0" + blobs[name] + b"\0")
+    parsed = {name: yaml.safe_load(blob.decode("utf-8")) or {} for name, blob in blobs.items()}
+    return RuleSet(
+        version=digest.hexdigest()[:12],
+        scoring=parse_scoring_rules(parsed["scoring.yml"]),
+        thresholds=parse_thresholds(parsed["thresholds.yml"]),
+        routing=parse_routing_rules(parsed["routing.yml"]),
+    )
+
+
+class RuleSetStore:
+    # Holds the compiled snapshot for one rules directory. Readers get an immutable RuleSet;
+    # a reload compiles a new one and swaps the reference, so a batch never sees a mix of
+    # old and new rules. File mtimes are checked at most once per check_interval_s.
+    def __init__(self, rules_dir: Path, *, check_interval_s: float = 1.0) -> None:
+        self._rules_dir = rules_dir
+        self._check_interval_s = check_interval_s
+        self._lock = threading.Lock()
+        self._stamp = self._file_stamp()
+        self._current = compile_ruleset(rules_dir)
+        self._next_check = time.monotonic() + check_interval_s
+        self._reload_requested = False
+
+    def _file_stamp(self) -> tuple[tuple[int, int], ...]:
+        stamps = []
+        for name in RULE_FILES:
+            st = (self._rules_dir / name).stat()
+            stamps.append((st.st_mtime_ns, st.st_size))
+        return tuple(stamps)
+
+    def request_reload(self) -> None:
+        self._reload_requested = True
+
+    def current(self) -> RuleSet:
+        now = time.monotonic()
+        if not self._reload_requested and now < self._next_check:
+            return self._current
+        with self._lock:
+            self._next_check = now + self._check_interval_s
+            forced = self._reload_requested
+            self._reload_requested = False
+            try:
+                stamp = self._file_stamp()
+                if forced or stamp != self._stamp:
+                    ruleset = compile_ruleset(self._rules_dir)
+                    if ruleset.version != self._current.version:
+                        log.info(
+                            "ruleset_reloaded",
+                            rules_dir=str(self._rules_dir),
+                            previous=self._current.version,
+                            version=ruleset.version,
+                        )
+                    self._current = ruleset
+                    self._stamp = stamp
+            except Exception:  # noqa: BLE001
+                # A half-written or invalid file keeps the last good snapshot in service.
+                log.exception("ruleset_reload_failed", rules_dir=str(self._rules_dir))
+            return self._current
+
+
+_STORES: dict[Path, RuleSetStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_ruleset(rules_dir: Path) -> RuleSet:
+    store = _STORES.get(rules_dir)
+    if store is None:
+        with _STORES_LOCK:
+            store = _STORES.get(rules_dir)
+            if store is None:
+                store = RuleSetStore(rules_dir)
+                _STORES[rules_dir] = store
+    return store.current()
+
+
+def request_reload() -> None:
+    with _STORES_LOCK:
+        stores = list(_STORES.values())
+    for store in stores:
+        store.request_reload()
+
+
+def install_sighup_reload() -> None:
+    if not hasattr(signal, "SIGHUP") or threading.current_thread() is not threading.main_thread():
+        return
+
+    def on_sighup(signum: int, frame: FrameType | None) -> None:
+        request_reload()
+
+    signal.signal(signal.SIGHUP, on_sighup)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 import yaml
 
@@ -13,5 +14,9 @@ class ScoringRules:
 
 def load_scoring_rules(rules_dir: Path) -> ScoringRules:
     data = yaml.safe_load((rules_dir / "scoring.yml").read_text(encoding="utf-8")) or {}
+    return parse_scoring_rules(data)
+
+
+def parse_scoring_rules(data: dict[str, Any]) -> ScoringRules:
     weights = {str(k): float(v) for k, v in (data.get("weights") or {}).items()}
     return ScoringRules(weights=weights)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import threading
+import uuid
+from contextlib import suppress
+from pathlib import Path
+
+import structlog
+
+from autotriage.config import load_effective_config
+
+log = structlog.get_logger(__name__)
+
+# Listeners in this process, rung directly. Listeners in other processes (split api/worker
+# deployments, worker pools) are rung through a unix datagram socket each one binds in
+# <db>.doorbell.d/.
+_LOCAL: set[Doorbell] = set()
+_LOCAL_LOCK = threading.Lock()
+
+
+def doorbell_dir(db_path: Path) -> Path:
+    return db_path.with_name(db_path.name + ".doorbell.d")
+
+
+class Doorbell:
+    def __init__(self, sock_dir: Path) -> None:
+        self._event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._sock: socket.socket | None = None
+        self._path = sock_dir / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        try:
+            sock_dir.mkdir(parents=True, exist_ok=True)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            sock.bind(str(self._path))
+            self._loop.add_reader(sock.fileno(), self._drain)
+            self._sock = sock
+        except (AttributeError, NotImplementedError, OSError) as e:
+            # No unix sockets here (or the path is too long): local rings and polling still work.
+            log.warning("doorbell_socket_unavailable", path=str(self._path), error=repr(e))
+        with _LOCAL_LOCK:
+            _LOCAL.add(self)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _drain(self) -> None:
+        assert self._sock is not None
+        with suppress(BlockingIOError):
+            while self._sock.recv(64):
+                pass
+        self._event.set()
+
+    def _ring_threadsafe(self) -> None:
+        self._loop.call_soon_threadsafe(self._event.set)
+
+    def clear(self) -> None:
+        self._event.clear()
+
+    async def wait(self, timeout_s: float) -> bool:
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout_s)
+        except TimeoutError:
+            return False
+        return True
+
+    def close(self) -> None:
+        with _LOCAL_LOCK:
+            _LOCAL.discard(self)
+        if self._sock is not None:
+            self._loop.remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+            with suppress(OSError):
+                self._path.unlink()
+
+
+def _ring_local() -> None:
+    with _LOCAL_LOCK:
+        local = list(_LOCAL)
+    for bell in local:
+        with suppress(RuntimeError):
+            bell._ring_threadsafe()
+
+
+def _ring_sockets(db_path: Path) -> None:
+    if not hasattr(socket, "AF_UNIX"):
+        return
+    sock_dir = doorbell_dir(db_path)
+    try:
+        entries = list(os.scandir(sock_dir))
+    except OSError:
+        return
+    with _LOCAL_LOCK:
+        own = {str(bell.path) for bell in _LOCAL}
+    sender: socket.socket | None = None
+    try:
+        for entry in entries:
+            if entry.path in own or not entry.name.endswith(".sock"):
+                continue
+            if sender is None:
+                sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                sender.setblocking(False)
+            try:
+                sender.sendto(b"\x01", entry.path)
+            except BlockingIOError:
+                # The listener's buffer is full, so a wakeup is already pending.
+                pass
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Left behind by a worker that died without cleaning up.
+                with suppress(OSError):
+                    os.unlink(entry.path)
+            except OSError:
+                pass
+    finally:
+        if sender is not None:
+            sender.close()
+
+
+def ring(db_path: Path | None = None) -> None:
+    _ring_local()
+    _ring_sockets(db_path or load_effective_config().db_path)
+
+
+# Socket directories waiting for the background ringer, and the ringer itself (started on first
+# use, and again in a forked child, which does not inherit it).
+_PENDING: set[Path] = set()
+_PENDING_COND = threading.Condition()
+_RINGER: threading.Thread | None = None
+
+
+def ring_soon(db_path: Path | None = None) -> None:
+    # ring() for the event loop: local listeners are rung at once, and the socket directory is
+    # left to a background thread, so the caller never waits on a scan or a send. Rings asked
+    # for while it is busy are folded into its next pass, so a burst of inserts scans the
+    # directory a few times rather than once per insert.
+    global _RINGER
+    _ring_local()
+    path = db_path or load_effective_config().db_path
+    with _PENDING_COND:
+        _PENDING.add(path)
+        if _RINGER is None or not _RINGER.is_alive():
+            _RINGER = threading.Thread(target=_run_ringer, name="doorbell-ringer", daemon=True)
+            _RINGER.start()
+        _PENDING_COND.notify()
+
+
+def _run_ringer() -> None:
+    while True:
+        with _PENDING_COND:
+            while not _PENDING:
+                _PENDING_COND.wait()
+            paths = list(_PENDING)
+            _PENDING.clear()
+        for path in paths:
+            try:
+                _ring_sockets(path)
+            except Exception:  # noqa: BLE001
+                log.exception("doorbell_ring_error", path=str(path))
@@ -11,6 +11,8 @@ from autotriage.enrichers.base import BaseEnricher
 
 class AllowlistEnricher(BaseEnricher):
     name = "allowlist"
+    in_memory = True
+    datasets = ("allowlists.yml",)
     ttl_seconds = 24 * 3600
     rate_limit_per_minute = 600
 
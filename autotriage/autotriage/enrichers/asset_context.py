@@ -10,6 +10,8 @@ from autotriage.enrichers.base import BaseEnricher
 
 class AssetContextEnricher(BaseEnricher):
     name = "asset_context"
+    in_memory = True
+    datasets = ("asset_inventory.csv",)
     ttl_seconds = 24 * 3600
     rate_limit_per_minute = 300
 
@@ -28,3 +30,6 @@ class AssetContextEnricher(BaseEnricher):
 
     def enrich_one(self, key: str) -> dict[str, Any] | None:
         return self._by_host.get(key)
+
+    def enrich_many(self, keys: list[str]) -> dict[str, dict[str, Any] | None]:
+        return {key: self._by_host.get(key) for key in keys}
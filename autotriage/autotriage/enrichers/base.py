@@ -15,10 +15,18 @@ class EnrichmentResult:
 
 class BaseEnricher(ABC):
     name: str
+    # Files under data_dir the enricher loads in its constructor; a change reloads it.
+    datasets: tuple[str, ...] = ()
     ttl_seconds: int = 3600
+    # How long "no data for this key" is remembered in the in-process cache.
+    negative_ttl_seconds: int = 300
     rate_limit_per_minute: int = 120
     breaker_failure_threshold: int = 5
     breaker_cooldown_seconds: int = 30
+    # Lookups that may block (network, disk) run on the enrichment thread pool, bounded by
+    # timeout_seconds per call; in-memory enrichers answer inline.
+    in_memory: bool = False
+    timeout_seconds: float = 2.0
 
     @abstractmethod
     def keys(self, alert: CanonicalAlert) -> list[str]:
@@ -27,3 +35,12 @@ class BaseEnricher(ABC):
     @abstractmethod
     def enrich_one(self, key: str) -> dict[str, Any] | None:
         raise NotImplementedError
+
+    # Optional bulk lookup: keys without data may be omitted or mapped to None. Override it
+    # when the backend can resolve a batch in one round-trip; the manager then sends all of an
+    # alert's uncached keys in a single call.
+    def enrich_many(self, keys: list[str]) -> dict[str, dict[str, Any] | None]:
+        return {key: self.enrich_one(key) for key in keys}
+
+    def supports_many(self) -> bool:
+        return type(self).enrich_many is not BaseEnricher.enrich_many
@@ -1,18 +1,76 @@
 from __future__ import annotations
 
 import sqlite3
+import time
 from typing import Any
 
+from autotriage.enrichers.lru import CachedValue, TtlLru
+from autotriage.metrics.prom import ENRICHER_CACHE_HITS_TOTAL, ENRICHER_CACHE_MISSES_TOTAL
 from autotriage.storage.repositories.cache_repo import CacheRepository
 
 
 class EnricherCache:
-    def __init__(self, db: sqlite3.Connection, enricher: str) -> None:
+    # Two tiers: an optional in-process LRU (l1) in front of the SQLite cache table (l2) that
+    # all workers share. Lookups that found nothing are cached in l1 only, as None. Keys are
+    # stored under dataset_version, so results from a dataset since replaced are never read.
+    def __init__(
+        self,
+        db: sqlite3.Connection,
+        enricher: str,
+        l1: TtlLru | None = None,
+        *,
+        dataset_version: str = "",
+    ) -> None:
         self._repo = CacheRepository(db)
         self._enricher = enricher
+        self._l1 = l1
+        self._prefix = f"{dataset_version}/" if dataset_version else ""
 
     def get(self, key: str) -> dict[str, Any] | None:
-        return self._repo.get(self._enricher, key)
+        return self.get_many([key]).get(key)
 
     def set(self, key: str, value: dict[str, Any], ttl_seconds: int) -> None:
-        self._repo.set(self._enricher, key, value, ttl_seconds)
+        self.set_many([(key, value)], ttl_seconds)
+
+    def get_many(self, keys: list[str]) -> dict[str, CachedValue]:
+        out: dict[str, CachedValue] = {}
+        remaining: list[str] = []
+        if self._l1 is None:
+            remaining = list(keys)
+        else:
+            for key in keys:
+                hit, value = self._l1.get((self._enricher, self._prefix + key))
+                if hit:
+                    out[key] = value
+                else:
+                    remaining.append(key)
+            ENRICHER_CACHE_HITS_TOTAL.labels("l1", self._enricher).inc(len(out))
+            ENRICHER_CACHE_MISSES_TOTAL.labels("l1", self._enricher).inc(len(remaining))
+        if not remaining:
+            return out
+
+        entries = self._repo.get_many_entries(
+            self._enricher, [self._prefix + key for key in remaining]
+        )
+        ENRICHER_CACHE_HITS_TOTAL.labels("l2", self._enricher).inc(len(entries))
+        ENRICHER_CACHE_MISSES_TOTAL.labels("l2", self._enricher).inc(len(remaining) - len(entries))
+        for stored, (value, expires_at) in entries.items():
+            out[stored[len(self._prefix) :]] = value
+            if self._l1 is not None:
+                self._l1.put((self._enricher, stored), value, float(expires_at))
+        return out
+
+    def set_many(self, items: list[tuple[str, dict[str, Any]]], ttl_seconds: int) -> None:
+        stored = [(self._prefix + key, value) for key, value in items]
+        self._repo.set_many(self._enricher, stored, ttl_seconds)
+        if self._l1 is not None:
+            expires_at = time.time() + ttl_seconds
+            for key, value in stored:
+                self._l1.put((self._enricher, key), value, expires_at)
+
+    def set_missing(self, keys: list[str], ttl_seconds: int) -> None:
+        if self._l1 is None or ttl_seconds <= 0:
+            return
+        expires_at = time.time() + ttl_seconds
+        for key in keys:
+            self._l1.put((self._enricher, self._prefix + key), None, expires_at)
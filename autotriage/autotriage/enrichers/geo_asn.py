@@ -10,6 +10,8 @@ from autotriage.enrichers.base import BaseEnricher
 
 class GeoAsnEnricher(BaseEnricher):
     name = "geo_asn"
+    in_memory = True
+    datasets = ("mock_geoasn.csv",)
     ttl_seconds = 24 * 3600
     rate_limit_per_minute = 120
 
@@ -28,3 +30,6 @@ class GeoAsnEnricher(BaseEnricher):
 
     def enrich_one(self, key: str) -> dict[str, Any] | None:
         return self._by_ip.get(key)
+
+    def enrich_many(self, keys: list[str]) -> dict[str, dict[str, Any] | None]:
+        return {key: self._by_ip.get(key) for key in keys}
@@ -10,6 +10,8 @@ from autotriage.enrichers.base import BaseEnricher
 
 class IpReputationEnricher(BaseEnricher):
     name = "ip_reputation"
+    in_memory = True
+    datasets = ("mock_reputation.csv",)
     ttl_seconds = 6 * 3600
     rate_limit_per_minute = 120
 
@@ -28,3 +30,6 @@ class IpReputationEnricher(BaseEnricher):
 
     def enrich_one(self, key: str) -> dict[str, Any] | None:
         return self._by_ip.get(key)
+
+    def enrich_many(self, keys: list[str]) -> dict[str, dict[str, Any] | None]:
+        return {key: self._by_ip.get(key) for key in keys}
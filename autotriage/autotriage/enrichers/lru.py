@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from autotriage.metrics.prom import ENRICHER_CACHE_EVICTIONS_TOTAL
+
+# A cached lookup result: the enrichment data, or None for "the source has nothing for this key".
+CachedValue = dict[str, Any] | None
+
+
+class TtlLru:
+    # Bounded, thread-safe LRU whose entries also carry an absolute wall-clock expiry. Expired
+    # entries are dropped when they are read; the least recently used entry goes when full.
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = max(0, maxsize)
+        self._data: OrderedDict[tuple[str, str], tuple[float, CachedValue]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: tuple[str, str]) -> tuple[bool, CachedValue]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                ENRICHER_CACHE_EVICTIONS_TOTAL.labels("l1").inc()
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def put(self, key: tuple[str, str], value: CachedValue, expires_at: float) -> None:
+        if self._maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+                evicted += 1
+        if evicted:
+            ENRICHER_CACHE_EVICTIONS_TOTAL.labels("l1").inc(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
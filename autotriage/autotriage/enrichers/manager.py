@@ -1,95 +1,285 @@
 from __future__ import annotations
 
+import functools
+import math
 import sqlite3
+import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
 import structlog
 
+from autotriage.config import load_effective_config
 from autotriage.core.models.alert import CanonicalAlert
-from autotriage.enrichers.allowlist import AllowlistEnricher
-from autotriage.enrichers.asset_context import AssetContextEnricher
 from autotriage.enrichers.base import BaseEnricher
 from autotriage.enrichers.cache import EnricherCache
-from autotriage.enrichers.geo_asn import GeoAsnEnricher
-from autotriage.enrichers.ip_reputation import IpReputationEnricher
-from autotriage.enrichers.rate_limit import TokenBucket
-from autotriage.enrichers.whois import WhoisEnricher
+from autotriage.enrichers.registry import EnricherRegistry
+from autotriage.enrichers.singleflight import FlightRows, Outcome, shared_flights
+from autotriage.metrics.prom import ENRICHER_COALESCED_TOTAL, ENRICHER_TIMEOUT_TOTAL
 
 log = structlog.get_logger(__name__)
 
 
-@dataclass
-class _Breaker:
-    failures: int = 0
-    open_until: float = 0.0
+_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
 
-    def is_open(self) -> bool:
-        return time.time() < self.open_until
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=load_effective_config().enrich_max_workers,
+                    thread_name_prefix="enricher",
+                )
+    return _EXECUTOR
 
 
 class EnricherManager:
-    def __init__(self, *, db: sqlite3.Connection, data_dir: Path, enabled: list[str]) -> None:
+    # Without a registry the manager gets a private one, so its enrichers, buckets and breakers
+    # live and die with it; the pipeline passes the process-wide registry for its data_dir.
+    def __init__(
+        self,
+        *,
+        db: sqlite3.Connection,
+        data_dir: Path,
+        enabled: list[str],
+        registry: EnricherRegistry | None = None,
+        deadline_seconds: float = 5.0,
+    ) -> None:
         self._db = db
-        self._enrichers: list[BaseEnricher] = []
-        self._buckets: dict[str, TokenBucket] = {}
-        self._breakers: dict[str, _Breaker] = {}
-
-        available: dict[str, BaseEnricher] = {
-            "allowlist": AllowlistEnricher(data_dir),
-            "asset_context": AssetContextEnricher(data_dir),
-            "ip_reputation": IpReputationEnricher(data_dir),
-            "geo_asn": GeoAsnEnricher(data_dir),
-            "whois": WhoisEnricher(data_dir),
-        }
-        for name in enabled:
-            enricher = available.get(name)
-            if enricher is not None:
-                self._enrichers.append(enricher)
-                self._buckets[enricher.name] = TokenBucket.per_minute(
-                    enricher.rate_limit_per_minute
-                )
-                self._breakers[enricher.name] = _Breaker()
+        self._registry = registry or EnricherRegistry(data_dir)
+        self._enabled = [name for name in enabled if name in self._registry]
+        self._deadline_seconds = deadline_seconds
 
     def enrich(self, alert: CanonicalAlert) -> dict[str, Any]:
+        # Cache reads/writes, buckets and breakers stay on the calling thread (the connection
+        # belongs to it); only blocking lookups fan out, all at once, so the alert waits for
+        # the slowest lookup rather than the sum of them. Enrichers that implement
+        # enrich_many get all their uncached keys in one call. Blocking lookups are also
+        # single-flight: a key already being looked up, by another thread or another worker,
+        # waits for that lookup instead of spending a token on its own.
+        deadline = time.monotonic() + self._deadline_seconds
         out: dict[str, Any] = {}
-        for enricher in self._enrichers:
-            breaker = self._breakers[enricher.name]
-            if breaker.is_open():
+        work: list[tuple[BaseEnricher, list[str], dict[str, Any], list[tuple[str, Any]]]] = []
+        pending: list[tuple[int, list[str], Future[dict[str, Any]], float]] = []
+        remote: list[tuple[int, FlightRows, list[str]]] = []
+        followers: list[tuple[int, str, Future[Outcome]]] = []
+        caches: dict[str, EnricherCache] = {}
+        flights = self._registry.flights
+        shared: FlightRows | None = None
+        shared_checked = False
+        for name in self._enabled:
+            loaded = self._registry.loaded(name)
+            assert loaded is not None
+            enricher = loaded.enricher
+            if self._registry.breaker(name).is_open():
                 out[enricher.name] = {"status": "circuit_open"}
                 continue
 
-            bucket = self._buckets[enricher.name]
-            cache = EnricherCache(self._db, enricher.name)
+            bucket = self._registry.bucket(name)
+            keys = enricher.keys(alert)
+            cache = caches[enricher.name] = EnricherCache(
+                self._db, enricher.name, self._registry.l1, dataset_version=loaded.dataset_version
+            )
+            cached = cache.get_many(keys)
             results: dict[str, Any] = {}
-            for key in enricher.keys(alert):
-                cached = cache.get(key)
-                if cached is not None:
-                    results[key] = {"status": "cache_hit", "data": cached}
-                    continue
-                if not bucket.allow():
-                    results[key] = {"status": "rate_limited"}
-                    continue
-                try:
-                    data = enricher.enrich_one(key)
-                    if data is None:
-                        results[key] = {"status": "miss"}
+            writes: list[tuple[str, Any]] = []
+            work.append((enricher, keys, results, writes))
+            index = len(work) - 1
+            led: list[str] = []
+            for key in keys:
+                if key in cached:
+                    value = cached[key]
+                    results[key] = (
+                        {"status": "miss"}
+                        if value is None
+                        else {"status": "cache_hit", "data": value}
+                    )
+                elif enricher.in_memory:
+                    led.append(key)
+                else:
+                    leader, flight = flights.join(enricher.name, key)
+                    if leader:
+                        led.append(key)
                     else:
-                        cache.set(key, data, ttl_seconds=enricher.ttl_seconds)
-                        results[key] = {"status": "ok", "data": data}
-                    breaker.failures = 0
-                except Exception as e:  # noqa: BLE001
-                    breaker.failures += 1
-                    log.warning("enricher_error", enricher=enricher.name, key=key, error=repr(e))
-                    results[key] = {"status": "error", "error": repr(e)}
-                    if breaker.failures >= enricher.breaker_failure_threshold:
-                        breaker.open_until = time.time() + enricher.breaker_cooldown_seconds
-                        log.warning(
-                            "enricher_circuit_open",
-                            enricher=enricher.name,
-                            open_until=breaker.open_until,
+                        ENRICHER_COALESCED_TOTAL.labels(enricher.name, "local").inc()
+                        followers.append((index, key, flight))
+
+            owned: set[str] = set()
+            if led and not enricher.in_memory:
+                if not shared_checked:
+                    shared = shared_flights(self._db)
+                    shared_checked = True
+                if shared is not None:
+                    lease_seconds = math.ceil(enricher.timeout_seconds) + 1
+                    owned, elsewhere = shared.claim(enricher.name, led, lease_seconds)
+                    if elsewhere:
+                        ENRICHER_COALESCED_TOTAL.labels(enricher.name, "shared").inc(len(elsewhere))
+                        for key, outcome in elsewhere.items():
+                            if outcome is not None:
+                                results[key] = dict(outcome)
+                                flights.settle(enricher.name, key, outcome)
+                        waiting = [key for key, outcome in elsewhere.items() if outcome is None]
+                        if waiting:
+                            remote.append((index, shared, waiting))
+                        led = [key for key in led if key not in elsewhere]
+
+            allowed: list[str] = []
+            for key in led:
+                if bucket.allow():
+                    allowed.append(key)
+                else:
+                    results[key] = {"status": "rate_limited"}
+                    self._settle(enricher, shared, owned, {key: results[key]})
+            if not allowed:
+                continue
+
+            bulk = enricher.supports_many()
+            for batch in [allowed] if bulk else [[key] for key in allowed]:
+                if enricher.in_memory:
+                    try:
+                        found = _lookup(enricher, batch, bulk)
+                    except Exception as e:  # noqa: BLE001
+                        self._failed(
+                            enricher, batch, results, {"status": "error", "error": repr(e)}
                         )
-            out[enricher.name] = results
+                    else:
+                        self._succeeded(enricher, batch, results, writes, found)
+                    continue
+                call_deadline = min(deadline, time.monotonic() + enricher.timeout_seconds)
+                future = _executor().submit(_lookup, enricher, batch, bulk)
+                # Followers are released when the call itself finishes, even after this alert
+                # has given up on it.
+                future.add_done_callback(
+                    functools.partial(self._settle_call, enricher, shared, owned, batch)
+                )
+                pending.append((index, batch, future, call_deadline))
+
+        for index, batch, future, call_deadline in pending:
+            enricher, _, results, writes = work[index]
+            try:
+                found = future.result(timeout=max(0.0, call_deadline - time.monotonic()))
+            except TimeoutError:
+                # The call keeps its pool thread until it returns; its result is dropped.
+                future.cancel()
+                ENRICHER_TIMEOUT_TOTAL.labels(enricher.name).inc()
+                self._failed(enricher, batch, results, {"status": "timeout"})
+            except Exception as e:  # noqa: BLE001
+                self._failed(enricher, batch, results, {"status": "error", "error": repr(e)})
+            else:
+                self._succeeded(enricher, batch, results, writes, found)
+
+        # Lookups led by other workers first: they never wait on this process, so local
+        # followers waiting on these keys cannot deadlock with us.
+        for index, rows, keys in remote:
+            enricher, _, results, _ = work[index]
+            for key, outcome in rows.wait(enricher.name, keys, deadline).items():
+                # None: the other worker ran out of time or went away without settling.
+                results[key] = {"status": "timeout"} if outcome is None else dict(outcome)
+                flights.settle(enricher.name, key, results[key])
+
+        for index, key, flight in followers:
+            enricher, _, results, _ = work[index]
+            try:
+                results[key] = dict(flight.result(timeout=max(0.0, deadline - time.monotonic())))
+            except TimeoutError:
+                results[key] = {"status": "timeout"}
+
+        for enricher, keys, results, writes in work:
+            if writes:
+                cache = caches[enricher.name]
+                stored = [(key, data) for key, data in writes if data is not None]
+                if stored:
+                    cache.set_many(stored, ttl_seconds=enricher.ttl_seconds)
+                cache.set_missing(
+                    [key for key, data in writes if data is None],
+                    ttl_seconds=enricher.negative_ttl_seconds,
+                )
+            out[enricher.name] = {key: results[key] for key in keys}
         return out
+
+    def _settle(
+        self,
+        enricher: BaseEnricher,
+        shared: FlightRows | None,
+        owned: set[str],
+        outcomes: dict[str, Outcome],
+    ) -> None:
+        if enricher.in_memory:
+            return
+        if shared is not None:
+            shared.settle(enricher.name, {k: v for k, v in outcomes.items() if k in owned})
+        for key, outcome in outcomes.items():
+            self._registry.flights.settle(enricher.name, key, outcome)
+
+    def _settle_call(
+        self,
+        enricher: BaseEnricher,
+        shared: FlightRows | None,
+        owned: set[str],
+        keys: list[str],
+        future: Future[dict[str, Any]],
+    ) -> None:
+        outcomes: dict[str, Outcome]
+        if future.cancelled():
+            outcomes = {key: {"status": "timeout"} for key in keys}
+        elif (error := future.exception()) is not None:
+            outcomes = {key: {"status": "error", "error": repr(error)} for key in keys}
+        else:
+            found = future.result()
+            outcomes = {
+                key: {"status": "miss"}
+                if found.get(key) is None
+                else {"status": "ok", "data": found[key]}
+                for key in keys
+            }
+        self._settle(enricher, shared, owned, outcomes)
+
+    def _succeeded(
+        self,
+        enricher: BaseEnricher,
+        keys: list[str],
+        results: dict[str, Any],
+        writes: list[tuple[str, Any]],
+        found: dict[str, Any],
+    ) -> None:
+        for key in keys:
+            data = found.get(key)
+            writes.append((key, data))
+            results[key] = {"status": "miss"} if data is None else {"status": "ok", "data": data}
+        self._registry.breaker(enricher.name).failures = 0
+
+    def _failed(
+        self,
+        enricher: BaseEnricher,
+        keys: list[str],
+        results: dict[str, Any],
+        result: dict[str, Any],
+    ) -> None:
+        breaker = self._registry.breaker(enricher.name)
+        breaker.failures += 1
+        log.warning(
+            "enricher_error",
+            enricher=enricher.name,
+            keys=keys,
+            error=result.get("error", "timeout"),
+        )
+        for key in keys:
+            results[key] = result
+        if breaker.failures >= enricher.breaker_failure_threshold:
+            breaker.open_until = time.time() + enricher.breaker_cooldown_seconds
+            log.warning(
+                "enricher_circuit_open",
+                enricher=enricher.name,
+                open_until=breaker.open_until,
+            )
+
+
+def _lookup(enricher: BaseEnricher, keys: list[str], bulk: bool) -> dict[str, Any]:
+    if bulk:
+        return dict(enricher.enrich_many(keys))
+    return {key: enricher.enrich_one(key) for key in keys}
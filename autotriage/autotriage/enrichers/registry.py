@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import structlog
+
+from autotriage.config import load_effective_config
+from autotriage.enrichers.allowlist import AllowlistEnricher
+from autotriage.enrichers.asset_context import AssetContextEnricher
+from autotriage.enrichers.base import BaseEnricher
+from autotriage.enrichers.geo_asn import GeoAsnEnricher
+from autotriage.enrichers.ip_reputation import IpReputationEnricher
+from autotriage.enrichers.lru import TtlLru
+from autotriage.enrichers.rate_limit import TokenBucket
+from autotriage.enrichers.singleflight import SingleFlight
+from autotriage.enrichers.whois import WhoisEnricher
+
+log = structlog.get_logger(__name__)
+
+ENRICHERS: dict[str, Callable[[Path], BaseEnricher]] = {
+    "allowlist": AllowlistEnricher,
+    "asset_context": AssetContextEnricher,
+    "ip_reputation": IpReputationEnricher,
+    "geo_asn": GeoAsnEnricher,
+    "whois": WhoisEnricher,
+}
+
+
+@dataclass
+class Breaker:
+    failures: int = 0
+    open_until: float = 0.0
+
+    def is_open(self) -> bool:
+        return time.time() < self.open_until
+
+
+@dataclass(frozen=True)
+class LoadedEnricher:
+    enricher: BaseEnricher
+    # Names the dataset the enricher was loaded from (empty without datasets); its cached
+    # results are keyed by it, so a reload in any worker stops them being served.
+    dataset_version: str
+
+
+def _dataset_version(stamp: tuple[tuple[int, int], ...]) -> str:
+    if not stamp:
+        return ""
+    return hashlib.blake2b(repr(stamp).encode("utf-8"), digest_size=8).hexdigest()
+
+
+@dataclass
+class _Slot:
+    loaded: LoadedEnricher
+    stamp: tuple[tuple[int, int], ...]
+    bucket: TokenBucket
+    breaker: Breaker = field(default_factory=Breaker)
+    next_check: float = 0.0
+
+
+class EnricherRegistry:
+    # Enrichers for one data_dir, built on first use and shared by every alert, together with
+    # their rate-limit bucket and circuit breaker. Dataset files are re-stat'ed at most once per
+    # check_interval_s; a changed dataset is loaded into a new enricher that replaces the old
+    # one in a single assignment. Bucket and breaker state survive the reload.
+    def __init__(
+        self,
+        data_dir: Path,
+        *,
+        check_interval_s: float = 1.0,
+        factories: dict[str, Callable[[Path], BaseEnricher]] | None = None,
+        l1_size: int = 10_000,
+    ) -> None:
+        self._data_dir = data_dir
+        self.l1 = TtlLru(l1_size)
+        self.flights = SingleFlight()
+        self._factories = dict(ENRICHERS if factories is None else factories)
+        self._check_interval_s = check_interval_s
+        self._slots: dict[str, _Slot] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def data_dir(self) -> Path:
+        return self._data_dir
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._factories
+
+    def _stamp(self, enricher_cls: type[BaseEnricher]) -> tuple[tuple[int, int], ...]:
+        stamps = []
+        for name in enricher_cls.datasets:
+            try:
+                st = (self._data_dir / name).stat()
+                stamps.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamps.append((-1, -1))
+        return tuple(stamps)
+
+    def _slot(self, name: str) -> _Slot | None:
+        factory = self._factories.get(name)
+        if factory is None:
+            return None
+        slot = self._slots.get(name)
+        now = time.monotonic()
+        if slot is not None and now < slot.next_check:
+            return slot
+        with self._lock:
+            slot = self._slots.get(name)
+            if slot is None:
+                # First use: a missing or broken dataset is an error for the caller.
+                enricher = factory(self._data_dir)
+                stamp = self._stamp(type(enricher))
+                slot = _Slot(
+                    loaded=LoadedEnricher(enricher, _dataset_version(stamp)),
+                    stamp=stamp,
+                    bucket=TokenBucket.per_minute(enricher.rate_limit_per_minute),
+                    next_check=now + self._check_interval_s,
+                )
+                self._slots[name] = slot
+                return slot
+            slot.next_check = now + self._check_interval_s
+            stamp = self._stamp(type(slot.loaded.enricher))
+            if stamp != slot.stamp:
+                try:
+                    slot.loaded = LoadedEnricher(factory(self._data_dir), _dataset_version(stamp))
+                    # Free in-process results (including cached misses) from the old dataset;
+                    # the new version already keeps them, and the shared ones, from being read.
+                    self.l1.clear()
+                    log.info("enricher_dataset_reloaded", enricher=name)
+                except Exception as e:  # noqa: BLE001
+                    # Keep serving the previous dataset until the new one loads cleanly.
+                    log.warning("enricher_dataset_reload_failed", enricher=name, error=repr(e))
+                slot.stamp = stamp
+            return slot
+
+    def enricher(self, name: str) -> BaseEnricher | None:
+        loaded = self.loaded(name)
+        return None if loaded is None else loaded.enricher
+
+    def loaded(self, name: str) -> LoadedEnricher | None:
+        # The enricher together with its dataset version, read in one go across a reload.
+        slot = self._slot(name)
+        return None if slot is None else slot.loaded
+
+    def bucket(self, name: str) -> TokenBucket:
+        slot = self._slot(name)
+        assert slot is not None
+        return slot.bucket
+
+    def breaker(self, name: str) -> Breaker:
+        slot = self._slot(name)
+        assert slot is not None
+        return slot.breaker
+
+
+_REGISTRIES: dict[Path, EnricherRegistry] = {}
+_REGISTRIES_LOCK = threading.Lock()
+
+
+def get_registry(data_dir: Path) -> EnricherRegistry:
+    registry = _REGISTRIES.get(data_dir)
+    if registry is None:
+        with _REGISTRIES_LOCK:
+            registry = _REGISTRIES.get(data_dir)
+            if registry is None:
+                registry = EnricherRegistry(
+                    data_dir, l1_size=load_effective_config().enrich_l1_size
+                )
+                _REGISTRIES[data_dir] = registry
+    return registry
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from autotriage.util import codec
+
+log = structlog.get_logger(__name__)
+
+# What a lookup reports for one key, e.g. {"status": "ok", "data": {...}} or {"status": "miss"}.
+Outcome = dict[str, Any]
+
+# How long a settled flight row keeps its outcome for workers that are still polling it.
+_LINGER_SECONDS = 5
+_POLL_INTERVAL_S = 0.02
+
+
+class SingleFlight:
+    # One in-flight lookup per (enricher, key) in this process. The first caller leads and
+    # settles the flight when its lookup finishes; callers arriving meanwhile wait on it.
+    def __init__(self) -> None:
+        self._flights: dict[tuple[str, str], Future[Outcome]] = {}
+        self._lock = threading.Lock()
+
+    def join(self, enricher: str, key: str) -> tuple[bool, Future[Outcome]]:
+        with self._lock:
+            future = self._flights.get((enricher, key))
+            if future is not None:
+                return False, future
+            future = Future()
+            self._flights[(enricher, key)] = future
+            return True, future
+
+    def settle(self, enricher: str, key: str, outcome: Outcome) -> None:
+        with self._lock:
+            future = self._flights.pop((enricher, key), None)
+        if future is not None and not future.done():
+            future.set_result(outcome)
+
+
+def _flight_name(enricher: str) -> str:
+    return f"{enricher}#flight"
+
+
+class FlightRows:
+    # The cross-process half. A flight is a row in the cache table under "<enricher>#flight",
+    # written on a private autocommit connection so other workers see it at once: pending rows
+    # are leases held by the leading process, settled rows carry the outcome for a few seconds.
+    # Rows expire like cache entries, so a crashed leader's lease lapses and the sweeper
+    # deletes it. A busy database is never waited on; the caller simply leads locally.
+    def __init__(self, db_path: Path) -> None:
+        self._db = sqlite3.connect(
+            str(db_path), timeout=0.05, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        self._owner = uuid.uuid4().hex
+
+    def claim(
+        self, enricher: str, keys: list[str], lease_seconds: int
+    ) -> tuple[set[str], dict[str, Outcome | None]]:
+        # Returns the keys whose rows this process now holds, and for keys another process is
+        # already looking up, their outcome (None while still pending). Keys in neither are
+        # led locally without a row.
+        now = int(time.time())
+        claimed: set[str] = set()
+        others: dict[str, Outcome | None] = {}
+        pending = codec.dumps({"owner": self._owner, "outcome": None})
+        created_at = datetime.now(tz=UTC).isoformat()
+        with self._lock:
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                for key in keys:
+                    cur = self._db.execute(
+                        """
+                        INSERT INTO cache (enricher, cache_key, created_at, expires_at, value_json)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT (enricher, cache_key) DO UPDATE SET
+                          created_at = excluded.created_at,
+                          expires_at = excluded.expires_at,
+                          value_json = excluded.value_json
+                        WHERE cache.expires_at <= ?
+                        """,
+                        (
+                            _flight_name(enricher),
+                            key,
+                            created_at,
+                            now + lease_seconds,
+                            pending,
+                            now,
+                        ),
+                    )
+                    if cur.rowcount:
+                        claimed.add(key)
+                        continue
+                    row = self._db.execute(
+                        "SELECT value_json FROM cache WHERE enricher = ? AND cache_key = ?",
+                        (_flight_name(enricher), key),
+                    ).fetchone()
+                    others[key] = codec.loads(str(row[0])).get("outcome")
+                self._db.execute("COMMIT")
+            except sqlite3.OperationalError as e:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                log.debug("flight_claim_skipped", enricher=enricher, error=repr(e))
+                return set(), {}
+        return claimed, others
+
+    def settle(self, enricher: str, outcomes: dict[str, Outcome]) -> None:
+        if not outcomes:
+            return
+        expires_at = int(time.time()) + _LINGER_SECONDS
+        with self._lock:
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                for key, outcome in outcomes.items():
+                    self._db.execute(
+                        """
+                        UPDATE cache SET expires_at = ?, value_json = ?
+                        WHERE enricher = ? AND cache_key = ?
+                          AND json_extract(value_json, '$.owner') = ?
+                        """,
+                        (
+                            expires_at,
+                            codec.dumps({"owner": self._owner, "outcome": outcome}),
+                            _flight_name(enricher),
+                            key,
+                            self._owner,
+                        ),
+                    )
+                self._db.execute("COMMIT")
+            except sqlite3.OperationalError as e:
+                # Followers time out, and the lease lapses on its own.
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                log.warning("flight_settle_failed", enricher=enricher, error=repr(e))
+
+    def wait(self, enricher: str, keys: list[str], deadline: float) -> dict[str, Outcome | None]:
+        # Polls until every key is settled or gone, or the deadline (time.monotonic()) passes.
+        # Settled keys map to their outcome; keys whose leader vanished or that ran out of
+        # time map to None.
+        out: dict[str, Outcome | None] = {}
+        remaining = list(keys)
+        while remaining:
+            with self._lock:
+                rows = self._db.execute(
+                    f"""
+                    SELECT cache_key, value_json FROM cache
+                    WHERE enricher = ? AND cache_key IN ({",".join("?" * len(remaining))})
+                      AND expires_at > ?
+                    """,
+                    (_flight_name(enricher), *remaining, int(time.time())),
+                ).fetchall()
+            live = {str(key): codec.loads(str(value)).get("outcome") for key, value in rows}
+            for key in remaining:
+                if key not in live or live[key] is not None:
+                    out[key] = live.get(key)
+            remaining = [key for key in remaining if key not in out]
+            if remaining and time.monotonic() >= deadline:
+                break
+            if remaining:
+                time.sleep(_POLL_INTERVAL_S)
+        for key in remaining:
+            out[key] = None
+        return out
+
+
+_ROWS: dict[str, FlightRows] = {}
+_ROWS_LOCK = threading.Lock()
+
+
+def shared_flights(db: sqlite3.Connection) -> FlightRows | None:
+    # Flight rows are written on their own connection, which cannot take the write lock while
+    # the caller's connection holds it, so a caller inside a write transaction leads locally.
+    # The pipeline looks enrichments up before its transaction opens (see look_ahead).
+    # In-memory databases have no other process to coordinate with.
+    if db.in_transaction:
+        return None
+    path = next((str(row[2]) for row in db.execute("PRAGMA database_list") if row[1] == "main"), "")
+    if not path:
+        return None
+    rows = _ROWS.get(path)
+    if rows is None:
+        with _ROWS_LOCK:
+            rows = _ROWS.get(path)
+            if rows is None:
+                rows = FlightRows(Path(path))
+                _ROWS[path] = rows
+    return rows
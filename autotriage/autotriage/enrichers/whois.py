@@ -10,6 +10,8 @@ from autotriage.enrichers.base import BaseEnricher
 
 class WhoisEnricher(BaseEnricher):
     name = "whois"
+    in_memory = True
+    datasets = ("mock_whois.csv",)
     ttl_seconds = 7 * 24 * 3600
     rate_limit_per_minute = 60
 
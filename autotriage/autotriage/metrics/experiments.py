@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 import sqlite3
 import uuid
 from collections import Counter
@@ -8,12 +7,13 @@ from datetime import UTC, datetime
 from typing import Any, cast
 
 from autotriage.config import load_effective_config
-from autotriage.core.decisioning.decide import decide, load_thresholds
+from autotriage.core.decisioning.decide import decide
 from autotriage.core.fingerprint.strategies import compute_fingerprint
 from autotriage.core.normalize.registry import normalize
 from autotriage.core.routing.router import route
-from autotriage.core.scoring.rule_parser import load_scoring_rules
+from autotriage.core.ruleset import get_ruleset
 from autotriage.core.scoring.score_engine import score_alert
+from autotriage.util import codec
 
 
 class ExperimentsService:
@@ -31,7 +31,7 @@ class ExperimentsService:
                 created_at,
                 since.isoformat(),
                 until.isoformat(),
-                json.dumps(config_overrides),
+                codec.dumps(config_overrides),
             ),
         )
 
@@ -69,8 +69,8 @@ class ExperimentsService:
             before_queues[str(case_row["queue"])] += 1
 
         dedup_window = int(config_overrides.get("dedup_window_seconds", cfg.dedup_window_seconds))
-        scoring_rules = load_scoring_rules(cfg.rules_dir)
-        thresholds = load_thresholds(cfg.rules_dir)
+        rules = get_ruleset(cfg.rules_dir)
+        scoring_rules = rules.scoring
 
         # Allow overriding a few scoring weights (demo knob).
         override_weights = (
@@ -88,9 +88,11 @@ class ExperimentsService:
 
         seen_fp: set[tuple[str, str]] = set()
         for r in rows:
-            raw = json.loads(str(r["raw_json"]))
+            raw = codec.loads(str(r["raw_json"]))
             alert = normalize(raw).alert.model_copy(update={"ingest_id": str(r["ingest_id"])})
-            fp = compute_fingerprint(alert, dedup_window_seconds=dedup_window)
+            fp = compute_fingerprint(
+                alert, dedup_window_seconds=dedup_window, strategy=cfg.fingerprint_strategy
+            )
             fp_key = (fp.fp_hash, fp.window_start.isoformat())
             if fp_key in seen_fp:
                 after_decisions["DEDUPED"] += 1
@@ -111,14 +113,14 @@ class ExperimentsService:
             if enriched_row is not None:
                 try:
                     enrichments = (
-                        json.loads(str(enriched_row["payload_json"])).get("enrichments") or {}
+                        codec.loads(str(enriched_row["payload_json"])).get("enrichments") or {}
                     )
                 except Exception:  # noqa: BLE001
                     enrichments = {}
 
             score = score_alert(alert, enrichments, scoring_rules)
-            decision = decide(score, enrichments, thresholds)
-            routing = route(cfg.rules_dir, decision, enrichments)
+            decision = decide(score, enrichments, rules.thresholds)
+            routing = route(rules.routing, decision, enrichments)
             after_decisions[str(decision)] += 1
             after_queues[routing.queue] += 1
 
@@ -135,6 +137,7 @@ class ExperimentsService:
         after_auto_close = after_decisions.get("AUTO_CLOSE", 0)
 
         results: dict[str, Any] = {
+            "ruleset_version": rules.version,
             "before_decisions": dict(before_decisions),
             "after_decisions": dict(after_decisions),
             "before_queues": dict(before_queues),
@@ -172,7 +175,7 @@ class ExperimentsService:
                 INSERT INTO experiment_results (experiment_id, metric_name, before_value, after_value, details_json)
                 VALUES (?, ?, ?, ?, ?)
                 """,
-                (experiment_id, metric_name, before_val, after_val, json.dumps(results)),
+                (experiment_id, metric_name, before_val, after_val, codec.dumps(results)),
             )
         self._db.commit()
         return experiment_id
@@ -203,7 +206,7 @@ class ExperimentsService:
                 "after": r["after_value"],
             }
             try:
-                payload = json.loads(str(r["details_json"]))
+                payload = codec.loads(str(r["details_json"]))
                 before = payload.get("before") or before
                 after = payload.get("after") or after
             except Exception:  # noqa: BLE001
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 PIPELINE_STAGE_TOTAL = Counter(
     "autotriage_pipeline_stage_total",
@@ -19,3 +19,80 @@ INGEST_TOTAL = Counter("autotriage_ingest_total", "Total webhook ingests accepte
 INGEST_IDEMPOTENT_HIT_TOTAL = Counter(
     "autotriage_ingest_idempotent_hit_total", "Idempotency key hits"
 )
+
+DEDUP_LOOKUPS_TOTAL = Counter(
+    "autotriage_dedup_lookups_total",
+    "Dedup decisions by where they were answered: the in-memory index, the Bloom filter "
+    "(fingerprint never seen), or SQL (windows already evicted from the index)",
+    labelnames=("path",),
+)
+
+CORRELATION_LOOKUPS_TOTAL = Counter(
+    "autotriage_correlation_lookups_total",
+    "Correlation lookups by where they were answered: the in-memory entity index or SQL",
+    labelnames=("path",),
+)
+HOT_ENTITIES = Gauge(
+    "autotriage_hot_entities",
+    "Entities currently above the hot-entity threshold and left out of correlation lookups",
+)
+
+ENRICHER_TIMEOUT_TOTAL = Counter(
+    "autotriage_enricher_timeout_total",
+    "Enricher lookups abandoned at their per-call timeout or the alert deadline",
+    labelnames=("enricher",),
+)
+ENRICHER_CACHE_HITS_TOTAL = Counter(
+    "autotriage_enricher_cache_hits_total",
+    "Enrichment cache hits by tier (l1 in-process, l2 SQLite)",
+    labelnames=("tier", "enricher"),
+)
+ENRICHER_CACHE_MISSES_TOTAL = Counter(
+    "autotriage_enricher_cache_misses_total",
+    "Enrichment cache misses by tier (l1 in-process, l2 SQLite)",
+    labelnames=("tier", "enricher"),
+)
+ENRICHER_COALESCED_TOTAL = Counter(
+    "autotriage_enricher_coalesced_total",
+    "Enricher lookups answered by another caller's in-flight lookup, in this process (local) "
+    "or another worker (shared)",
+    labelnames=("enricher", "scope"),
+)
+ENRICHER_CACHE_EVICTIONS_TOTAL = Counter(
+    "autotriage_enricher_cache_evictions_total",
+    "Enrichment cache entries dropped for capacity or expiry, by tier",
+    labelnames=("tier",),
+)
+
+WORKER_PROCESSED_TOTAL = Counter(
+    "autotriage_worker_processed_total",
+    "Alerts handled by each worker pool slot",
+    labelnames=("worker",),
+)
+WORKER_THROUGHPUT = Gauge(
+    "autotriage_worker_throughput_alerts_per_second",
+    "Recent alerts/s handled by each worker pool slot",
+    labelnames=("worker",),
+)
+WORKER_RESTARTS_TOTAL = Counter(
+    "autotriage_worker_restarts_total",
+    "Worker pool processes restarted by the supervisor",
+    labelnames=("worker",),
+)
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "autotriage_db_pool_checkout_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+DB_POOL_IN_USE = Gauge("autotriage_db_pool_in_use", "Pooled connections currently checked out")
+DB_POOL_UTILISATION = Gauge(
+    "autotriage_db_pool_utilisation", "Checked-out connections as a fraction of the pool size"
+)
+
+RESPONSE_CACHE_TOTAL = Counter(
+    "autotriage_response_cache_total",
+    "Dashboard API GETs by how the response cache answered: hit, not_modified (304), "
+    "coalesced (waited on another request's miss) or miss (ran the route)",
+    labelnames=("result",),
+)
@@ -1,29 +1,278 @@
 from __future__ import annotations
 
+import itertools
 import sqlite3
-from collections.abc import Generator
+import threading
+import time
+from collections.abc import Callable, Generator, Iterator
+from contextlib import contextmanager
 from datetime import UTC, datetime
 from pathlib import Path
 
 from autotriage.config import load_effective_config
+from autotriage.metrics.prom import DB_POOL_CHECKOUT_SECONDS, DB_POOL_IN_USE, DB_POOL_UTILISATION
 
 
-def get_db() -> sqlite3.Connection:
-    cfg = load_effective_config()
-    cfg.db_path.parent.mkdir(parents=True, exist_ok=True)
-    db = sqlite3.connect(str(cfg.db_path), check_same_thread=False)
+def _connect(db_path: Path, *, cached_statements: int = 128) -> sqlite3.Connection:
+    db = sqlite3.connect(str(db_path), check_same_thread=False, cached_statements=cached_statements)
     db.row_factory = sqlite3.Row
     db.execute("PRAGMA journal_mode=WAL;")
     db.execute("PRAGMA foreign_keys=ON;")
     return db
 
 
-def db_dependency() -> Generator[sqlite3.Connection, None, None]:
-    db = get_db()
+def get_db() -> sqlite3.Connection:
+    cfg = load_effective_config()
+    cfg.db_path.parent.mkdir(parents=True, exist_ok=True)
+    return _connect(cfg.db_path, cached_statements=cfg.db_cached_statements)
+
+
+class ConnectionPool:
+    # Hands out long-lived connections, one per checkout, so a request or worker iteration keeps
+    # its connection (and its statement cache) to itself. Idle connections are reused most
+    # recently returned first; PRAGMAs run only when a connection is opened.
+    def __init__(self, db_path: Path, *, size: int, cached_statements: int) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db_path = db_path
+        self._size = max(1, size)
+        self._cached_statements = cached_statements
+        self._idle: list[sqlite3.Connection] = []
+        self._opened = 0
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    @contextmanager
+    def connection(self, timeout_s: float = 30.0) -> Iterator[sqlite3.Connection]:
+        db = self._checkout(timeout_s)
+        try:
+            yield db
+        finally:
+            self._checkin(db)
+
+    def _export(self) -> None:
+        DB_POOL_IN_USE.set(self._in_use)
+        DB_POOL_UTILISATION.set(self._in_use / self._size)
+
+    def _checkout(self, timeout_s: float) -> sqlite3.Connection:
+        t0 = time.perf_counter()
+        deadline = time.monotonic() + timeout_s
+        with self._cond:
+            while not self._idle and self._opened >= self._size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise TimeoutError(f"no pooled connection available after {timeout_s}s")
+            db = self._idle.pop() if self._idle else None
+            if db is None:
+                self._opened += 1
+            self._in_use += 1
+            self._export()
+        if db is None:
+            try:
+                db = _connect(self._db_path, cached_statements=self._cached_statements)
+            except BaseException:
+                with self._cond:
+                    self._opened -= 1
+                    self._in_use -= 1
+                    self._export()
+                    self._cond.notify()
+                raise
+        DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - t0)
+        return db
+
+    def _checkin(self, db: sqlite3.Connection) -> None:
+        # Never hand the next borrower a transaction someone else left open.
+        reusable = not self._closed
+        try:
+            if db.in_transaction:
+                db.rollback()
+        except sqlite3.Error:
+            reusable = False
+        with self._cond:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append(db)
+            else:
+                self._opened -= 1
+                db.close()
+            self._export()
+            self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close()
+                self._opened -= 1
+
+
+# This process's pool and data_version watcher, built from the config on first use so checkouts
+# and cache checks never read it again. close_pools() drops them; the next use reads the config
+# afresh.
+_POOL: ConnectionPool | None = None
+_WATCHER: tuple[int, sqlite3.Connection, threading.Lock] | None = None
+_POOLS_LOCK = threading.Lock()
+_WATCHER_GENERATION = itertools.count(1)
+
+
+def get_pool() -> ConnectionPool:
+    global _POOL
+    pool = _POOL
+    if pool is None:
+        with _POOLS_LOCK:
+            if _POOL is None:
+                cfg = load_effective_config()
+                _POOL = ConnectionPool(
+                    cfg.db_path, size=cfg.db_pool_size, cached_statements=cfg.db_cached_statements
+                )
+            pool = _POOL
+    return pool
+
+
+def data_version() -> tuple[int, int]:
+    # Changes whenever a commit lands from any other connection, in this process or another.
+    # A connection's own commits do not change what it reports and values from different
+    # connections are not comparable, so the watcher never writes, and the first element
+    # tells watchers apart (across databases, and after close_pools).
+    global _WATCHER
+    watcher = _WATCHER
+    if watcher is None:
+        with _POOLS_LOCK:
+            if _WATCHER is None:
+                db_path = load_effective_config().db_path
+                _WATCHER = (next(_WATCHER_GENERATION), _connect(db_path), threading.Lock())
+            watcher = _WATCHER
+    generation, db, lock = watcher
+    with lock:
+        return generation, int(db.execute("PRAGMA data_version").fetchone()[0])
+
+
+def close_pools() -> None:
+    global _POOL, _WATCHER
+    with _POOLS_LOCK:
+        pool, _POOL = _POOL, None
+        watcher, _WATCHER = _WATCHER, None
+    if pool is not None:
+        pool.close()
+    if watcher is not None:
+        _, db, lock = watcher
+        with lock:
+            db.close()
+
+
+# Connections (by id) currently inside a unit of work, mapped to their nesting depth. While a
+# connection is listed here, repositories leave committing to the unit of work.
+_UNIT_OF_WORK_DEPTH: dict[int, int] = {}
+# Callbacks run when a connection's outermost unit of work ends, called with whether its
+# transaction was committed.
+_UNIT_OF_WORK_HOOKS: dict[int, list[Callable[[bool], None]]] = {}
+# Per open level (the transaction, then each savepoint inside it), callbacks that undo
+# in-process state built from that level's writes, run if it is rolled back.
+_UNIT_OF_WORK_UNDO: dict[int, list[list[Callable[[], None]]]] = {}
+
+
+def in_unit_of_work(db: sqlite3.Connection) -> bool:
+    return id(db) in _UNIT_OF_WORK_DEPTH
+
+
+def commit(db: sqlite3.Connection) -> None:
+    if not in_unit_of_work(db):
+        db.commit()
+
+
+def on_unit_of_work_end(db: sqlite3.Connection, hook: Callable[[bool], None]) -> bool:
+    if not in_unit_of_work(db):
+        return False
+    _UNIT_OF_WORK_HOOKS.setdefault(id(db), []).append(hook)
+    return True
+
+
+def on_rollback(db: sqlite3.Connection, undo: Callable[[], None]) -> bool:
+    # Registers `undo` with the innermost open unit of work. It runs, newest first, when that
+    # savepoint or transaction is rolled back; a released savepoint hands it to the enclosing
+    # level, and a commit drops it. False outside a unit of work, where writes commit at once.
+    levels = _UNIT_OF_WORK_UNDO.get(id(db))
+    if not levels:
+        return False
+    levels[-1].append(undo)
+    return True
+
+
+def _run_hooks(key: int, committed: bool) -> None:
+    for hook in _UNIT_OF_WORK_HOOKS.pop(key, []):
+        hook(committed)
+
+
+def _undo_level(key: int) -> None:
+    # Runs before the rollback lets go of the write lock, so no other connection can act on
+    # in-process state built from the discarded writes in between.
+    for undo in reversed(_UNIT_OF_WORK_UNDO[key].pop()):
+        undo()
+
+
+@contextmanager
+def unit_of_work(db: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    key = id(db)
+    depth = _UNIT_OF_WORK_DEPTH.get(key, 0)
+    savepoint = f"uow_{depth}"
+    if depth == 0:
+        if not db.in_transaction:
+            # Take the write lock up front so concurrent workers queue on the busy timeout
+            # instead of failing to upgrade a read snapshot mid-transaction.
+            db.execute("BEGIN IMMEDIATE")
+    else:
+        db.execute(f"SAVEPOINT {savepoint}")
+    _UNIT_OF_WORK_DEPTH[key] = depth + 1
+    _UNIT_OF_WORK_UNDO.setdefault(key, []).append([])
+    committed = False
     try:
         yield db
+    except BaseException:
+        if depth == 0:
+            _undo_level(key)
+            db.rollback()
+        else:
+            db.execute(f"ROLLBACK TO {savepoint}")
+            db.execute(f"RELEASE {savepoint}")
+            _undo_level(key)
+        raise
+    else:
+        if depth == 0:
+            try:
+                db.commit()
+            except BaseException:
+                _undo_level(key)
+                db.rollback()
+                raise
+            committed = True
+        else:
+            db.execute(f"RELEASE {savepoint}")
+            levels = _UNIT_OF_WORK_UNDO[key]
+            levels[-2].extend(levels.pop())
     finally:
-        db.close()
+        if depth == 0:
+            del _UNIT_OF_WORK_DEPTH[key]
+            _UNIT_OF_WORK_UNDO.pop(key, None)
+            _run_hooks(key, committed)
+        else:
+            _UNIT_OF_WORK_DEPTH[key] = depth
+
+
+def db_dependency() -> Generator[sqlite3.Connection, None, None]:
+    with get_pool().connection() as db:
+        yield db
 
 
 def init_db() -> None:
@@ -0,0 +1,8 @@
+ALTER TABLE alerts ADD COLUMN lease_owner TEXT;
+ALTER TABLE alerts ADD COLUMN lease_until TEXT;
+
+-- Alerts already in flight had no lease; a lapsed one lets the reclaim path pick them up.
+UPDATE alerts SET lease_until = '1970-01-01T00:00:00+00:00'
+WHERE status NOT IN ('ingested', 'processed', 'failed');
+
+CREATE INDEX IF NOT EXISTS idx_alerts_lease ON alerts(lease_until);
@@ -0,0 +1 @@
+ALTER TABLE cases ADD COLUMN ruleset_version TEXT;
@@ -0,0 +1,18 @@
+CREATE TABLE cache_epoch (
+  enricher TEXT NOT NULL,
+  cache_key TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  expires_at INTEGER NOT NULL,
+  value_json TEXT NOT NULL,
+  PRIMARY KEY (enricher, cache_key)
+);
+
+INSERT INTO cache_epoch (enricher, cache_key, created_at, expires_at, value_json)
+SELECT enricher, cache_key, created_at, CAST(strftime('%s', expires_at) AS INTEGER), value_json
+FROM cache
+WHERE strftime('%s', expires_at) IS NOT NULL;
+
+DROP TABLE cache;
+ALTER TABLE cache_epoch RENAME TO cache;
+
+CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache(expires_at);
@@ -0,0 +1,20 @@
+-- AUTOINCREMENT keeps rowids strictly increasing even after the newest rows are deleted, so
+-- in-process dedup indexes can tail the table by rowid.
+CREATE TABLE fingerprints_seq (
+  seq INTEGER PRIMARY KEY AUTOINCREMENT,
+  ingest_id TEXT NOT NULL UNIQUE,
+  created_at TEXT NOT NULL,
+  strategy TEXT NOT NULL,
+  fp_hash TEXT NOT NULL,
+  window_start TEXT NOT NULL,
+  FOREIGN KEY (ingest_id) REFERENCES alerts(ingest_id) ON DELETE CASCADE
+);
+
+INSERT INTO fingerprints_seq (ingest_id, created_at, strategy, fp_hash, window_start)
+SELECT ingest_id, created_at, strategy, fp_hash, window_start FROM fingerprints ORDER BY rowid;
+
+DROP TABLE fingerprints;
+ALTER TABLE fingerprints_seq RENAME TO fingerprints;
+
+CREATE INDEX IF NOT EXISTS idx_fingerprints_hash_window ON fingerprints(fp_hash, window_start);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_window_start ON fingerprints(window_start);
@@ -0,0 +1,3 @@
+-- Correlation looks cases up by entity; the primary key leads with case_id and cannot serve it.
+CREATE INDEX IF NOT EXISTS idx_case_entities_entity
+  ON case_entities(entity_type, entity_value, case_id);
@@ -0,0 +1,9 @@
+-- Alerts seen per correlation entity per hour, for the hot-entity stop list. Keyed by bucket
+-- first so the trailing-window sums and the retention sweep are range scans.
+CREATE TABLE IF NOT EXISTS entity_frequency (
+  bucket INTEGER NOT NULL,
+  entity_type TEXT NOT NULL,
+  entity_value TEXT NOT NULL,
+  alert_count INTEGER NOT NULL,
+  PRIMARY KEY (bucket, entity_type, entity_value)
+) WITHOUT ROWID;
@@ -0,0 +1,42 @@
+-- Full-text index for case search: case id, summary and entity values, one row per case keyed
+-- by cases.rowid. '-', '.', '_', '@' and ':' are token characters, so host names, IPs,
+-- emails and technique ids stay single tokens that prefix queries can match.
+CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5(
+  case_id,
+  summary,
+  entities,
+  tokenize = "unicode61 tokenchars '-._@:'"
+);
+
+INSERT INTO cases_fts (rowid, case_id, summary, entities)
+SELECT
+  c.rowid,
+  c.case_id,
+  c.summary,
+  COALESCE((SELECT group_concat(ce.entity_value, ' ') FROM case_entities ce WHERE ce.case_id = c.case_id), '')
+FROM cases c;
+
+CREATE TRIGGER IF NOT EXISTS cases_fts_insert AFTER INSERT ON cases BEGIN
+  INSERT INTO cases_fts (rowid, case_id, summary, entities)
+  VALUES (
+    new.rowid,
+    new.case_id,
+    new.summary,
+    COALESCE((SELECT group_concat(ce.entity_value, ' ') FROM case_entities ce WHERE ce.case_id = new.case_id), '')
+  );
+END;
+
+-- Every alert joining a case rewrites its summary, usually to the same text.
+CREATE TRIGGER IF NOT EXISTS cases_fts_summary AFTER UPDATE OF summary ON cases
+WHEN new.summary IS NOT old.summary BEGIN
+  UPDATE cases_fts SET summary = new.summary WHERE rowid = new.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS cases_fts_delete AFTER DELETE ON cases BEGIN
+  DELETE FROM cases_fts WHERE rowid = old.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS cases_fts_entity AFTER INSERT ON case_entities BEGIN
+  UPDATE cases_fts SET entities = entities || ' ' || new.entity_value
+  WHERE rowid = (SELECT rowid FROM cases WHERE case_id = new.case_id);
+END;
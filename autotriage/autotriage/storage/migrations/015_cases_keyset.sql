@@ -0,0 +1,12 @@
+-- Keyset pagination for the case list: (created_at, case_id) is the sort key, so every index
+-- the list walks ends with it; severity rides along so severity_min is checked in the index.
+-- These replace idx_cases_time and idx_cases_sev.
+DROP INDEX IF EXISTS idx_cases_time;
+DROP INDEX IF EXISTS idx_cases_sev;
+
+CREATE INDEX IF NOT EXISTS idx_cases_created ON cases(created_at, case_id, severity);
+CREATE INDEX IF NOT EXISTS idx_cases_decision ON cases(decision, created_at, case_id, severity);
+CREATE INDEX IF NOT EXISTS idx_cases_queue ON cases(queue, created_at, case_id, severity);
+
+-- Delta polling with updated_since.
+CREATE INDEX IF NOT EXISTS idx_cases_updated ON cases(updated_at, case_id);
@@ -0,0 +1,101 @@
+-- Per-minute counters behind /api/overview, one row per (bucket, metric): bucket is the
+-- minute's start in unix seconds. Metric leads the key, so a window of one metric is a single
+-- contiguous range. Triggers keep them in step with the rows they count, in the same
+-- transaction, whichever stage or tool writes those rows.
+CREATE TABLE IF NOT EXISTS rollups (
+  bucket INTEGER NOT NULL,
+  metric TEXT NOT NULL,
+  value INTEGER NOT NULL,
+  PRIMARY KEY (metric, bucket)
+) WITHOUT ROWID;
+
+INSERT INTO rollups (bucket, metric, value)
+SELECT bucket, metric, SUM(n) FROM (
+  SELECT COALESCE(strftime('%s', received_at), 0) / 60 * 60 AS bucket, 'ingested' AS metric, COUNT(*) AS n
+  FROM alerts GROUP BY 1
+  UNION ALL
+  SELECT COALESCE(strftime('%s', created_at), 0) / 60 * 60, 'deduped', COUNT(*)
+  FROM events WHERE stage = 'deduped' GROUP BY 1
+  UNION ALL
+  SELECT COALESCE(strftime('%s', created_at), 0) / 60 * 60, 'errors', COUNT(*)
+  FROM events WHERE stage = 'failed' GROUP BY 1
+  UNION ALL
+  SELECT COALESCE(strftime('%s', created_at), 0) / 60 * 60, 'cases', COUNT(*)
+  FROM cases GROUP BY 1
+  UNION ALL
+  SELECT COALESCE(strftime('%s', created_at), 0) / 60 * 60, 'auto_closed', COUNT(*)
+  FROM cases WHERE decision = 'AUTO_CLOSE' GROUP BY 1
+  UNION ALL
+  SELECT COALESCE(strftime('%s', created_at), 0) / 60 * 60, 'tickets', COUNT(*)
+  FROM tickets GROUP BY 1
+)
+GROUP BY metric, bucket;
+
+CREATE TRIGGER IF NOT EXISTS rollups_alert_insert AFTER INSERT ON alerts BEGIN
+  INSERT INTO rollups (bucket, metric, value)
+  VALUES (COALESCE(strftime('%s', new.received_at), 0) / 60 * 60, 'ingested', 1)
+  ON CONFLICT (metric, bucket) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollups_alert_delete AFTER DELETE ON alerts BEGIN
+  UPDATE rollups SET value = value - 1
+  WHERE bucket = COALESCE(strftime('%s', old.received_at), 0) / 60 * 60 AND metric = 'ingested';
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollups_event_insert AFTER INSERT ON events
+WHEN new.stage IN ('deduped', 'failed') BEGIN
+  INSERT INTO rollups (bucket, metric, value)
+  VALUES (
+    COALESCE(strftime('%s', new.created_at), 0) / 60 * 60,
+    CASE new.stage WHEN 'failed' THEN 'errors' ELSE new.stage END,
+    1
+  )
+  ON CONFLICT (metric, bucket) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollups_event_delete AFTER DELETE ON events
+WHEN old.stage IN ('deduped', 'failed') BEGIN
+  UPDATE rollups SET value = value - 1
+  WHERE bucket = COALESCE(strftime('%s', old.created_at), 0) / 60 * 60
+    AND metric = CASE old.stage WHEN 'failed' THEN 'errors' ELSE old.stage END;
+END;
+
+-- auto_closed counts cases by creation minute whose decision is AUTO_CLOSE now, so it follows
+-- rescoring both ways.
+CREATE TRIGGER IF NOT EXISTS rollups_case_insert AFTER INSERT ON cases BEGIN
+  INSERT INTO rollups (bucket, metric, value)
+  VALUES (COALESCE(strftime('%s', new.created_at), 0) / 60 * 60, 'cases', 1)
+  ON CONFLICT (metric, bucket) DO UPDATE SET value = value + 1;
+  INSERT INTO rollups (bucket, metric, value)
+  SELECT COALESCE(strftime('%s', new.created_at), 0) / 60 * 60, 'auto_closed', 1
+  WHERE new.decision = 'AUTO_CLOSE'
+  ON CONFLICT (metric, bucket) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollups_case_decision AFTER UPDATE OF decision ON cases
+WHEN (old.decision = 'AUTO_CLOSE') IS NOT (new.decision = 'AUTO_CLOSE') BEGIN
+  INSERT INTO rollups (bucket, metric, value)
+  VALUES (
+    COALESCE(strftime('%s', new.created_at), 0) / 60 * 60,
+    'auto_closed',
+    CASE new.decision WHEN 'AUTO_CLOSE' THEN 1 ELSE -1 END
+  )
+  ON CONFLICT (metric, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollups_case_delete AFTER DELETE ON cases BEGIN
+  UPDATE rollups SET value = value - 1
+  WHERE bucket = COALESCE(strftime('%s', old.created_at), 0) / 60 * 60
+    AND (metric = 'cases' OR (metric = 'auto_closed' AND old.decision = 'AUTO_CLOSE'));
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollups_ticket_insert AFTER INSERT ON tickets BEGIN
+  INSERT INTO rollups (bucket, metric, value)
+  VALUES (COALESCE(strftime('%s', new.created_at), 0) / 60 * 60, 'tickets', 1)
+  ON CONFLICT (metric, bucket) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollups_ticket_delete AFTER DELETE ON tickets BEGIN
+  UPDATE rollups SET value = value - 1
+  WHERE bucket = COALESCE(strftime('%s', old.created_at), 0) / 60 * 60 AND metric = 'tickets';
+END;
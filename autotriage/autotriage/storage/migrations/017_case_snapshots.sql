@@ -0,0 +1,15 @@
+-- The case detail document (case row, entity graph, ticket, latest enrichments, scoring and
+-- routing) as one row per case, rebuilt when the pipeline finalizes an alert on the case.
+-- case_updated_at is the cases.updated_at it was built from; a snapshot that no longer matches,
+-- or a case without one (cases from before this migration), is rebuilt for each read until the
+-- worker's sweeper backfills it.
+CREATE TABLE IF NOT EXISTS case_snapshots (
+  case_id TEXT PRIMARY KEY,
+  case_updated_at TEXT NOT NULL,
+  doc_json TEXT NOT NULL,
+  FOREIGN KEY (case_id) REFERENCES cases(case_id) ON DELETE CASCADE
+);
+
+-- The timeline is paged on (created_at, event_id) within a case, read straight off this index.
+DROP INDEX IF EXISTS idx_events_case;
+CREATE INDEX IF NOT EXISTS idx_events_case ON events(case_id, created_at, event_id);
@@ -0,0 +1,28 @@
+-- Cases whose snapshot is missing or older than the case, for the worker's backfill to store:
+-- triggers queue a case when it is created, when its updated_at changes and when its snapshot
+-- is deleted, and storing the snapshot takes it off. Seeded once with the cases stale now.
+CREATE TABLE IF NOT EXISTS case_snapshots_stale (
+  case_id TEXT PRIMARY KEY,
+  FOREIGN KEY (case_id) REFERENCES cases(case_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO case_snapshots_stale (case_id)
+SELECT c.case_id
+FROM cases c
+LEFT JOIN case_snapshots s ON s.case_id = c.case_id
+WHERE s.case_updated_at IS NOT c.updated_at;
+
+CREATE TRIGGER IF NOT EXISTS case_snapshots_stale_insert AFTER INSERT ON cases BEGIN
+  INSERT OR IGNORE INTO case_snapshots_stale (case_id) VALUES (new.case_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS case_snapshots_stale_update AFTER UPDATE OF updated_at ON cases
+WHEN new.updated_at IS NOT old.updated_at BEGIN
+  INSERT OR IGNORE INTO case_snapshots_stale (case_id) VALUES (new.case_id);
+END;
+
+-- Not when the snapshot goes because its case was deleted.
+CREATE TRIGGER IF NOT EXISTS case_snapshots_stale_delete AFTER DELETE ON case_snapshots
+WHEN EXISTS (SELECT 1 FROM cases WHERE case_id = old.case_id) BEGIN
+  INSERT OR IGNORE INTO case_snapshots_stale (case_id) VALUES (old.case_id);
+END;
@@ -0,0 +1,5 @@
+-- The last case_entities and case_edges rowids a snapshot's graph includes. Neither table is
+-- updated in place or deleted from except with its case, so a refresh only reads the rows
+-- added since. NULL, as for snapshots from before this migration, reads the graph whole.
+ALTER TABLE case_snapshots ADD COLUMN entities_rowid INTEGER;
+ALTER TABLE case_snapshots ADD COLUMN edges_rowid INTEGER;
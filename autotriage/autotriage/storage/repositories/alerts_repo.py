@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-import json
 import sqlite3
 import uuid
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from typing import Any
 
+from autotriage.storage.db import commit
+from autotriage.util import codec
+
 
 class AlertsRepository:
     def __init__(self, db: sqlite3.Connection) -> None:
@@ -16,9 +18,10 @@ class AlertsRepository:
         *,
         idempotency_key: str,
         received_at: datetime,
-        raw_payload: dict[str, Any],
+        raw_payload: dict[str, Any] | str,
         vendor: str | None = None,
     ) -> tuple[str, bool]:
+        # A str raw_payload is the payload's JSON text and is stored as it is.
         existing = self._db.execute(
             "SELECT ingest_id FROM alerts WHERE idempotency_key = ?",
             (idempotency_key,),
@@ -38,50 +41,154 @@ class AlertsRepository:
                 received_at.isoformat(),
                 received_at.isoformat(),
                 vendor,
-                json.dumps(raw_payload),
+                raw_payload if isinstance(raw_payload, str) else codec.dumps(raw_payload),
             ),
         )
-        self._db.commit()
+        commit(self._db)
         return ingest_id, False
 
-    def claim_next(self) -> sqlite3.Row | None:
-        row: sqlite3.Row | None = self._db.execute(
-            """
-            SELECT * FROM alerts
-            WHERE status = 'ingested'
-            ORDER BY received_at ASC
-            LIMIT 1
-            """
+    def count_pending(self, limit: int) -> int:
+        now = datetime.now(tz=UTC).isoformat()
+        row = self._db.execute(
+            f"""
+            SELECT
+              (SELECT COUNT(*) FROM (SELECT 1 FROM alerts WHERE status = 'ingested' LIMIT ?))
+              + (SELECT COUNT(*) FROM alerts WHERE lease_until < ? AND {_IN_FLIGHT})
+            """,
+            (limit, now),
         ).fetchone()
-        if row is None:
-            return None
-        updated = datetime.now(tz=UTC).isoformat()
+        return int(row[0])
+
+    def claim_batch(
+        self, n: int, *, owner: str = "worker", lease_seconds: int = 60
+    ) -> list[sqlite3.Row]:
+        # Claims fresh alerts plus in-flight ones whose lease has expired (their worker died).
+        now = datetime.now(tz=UTC)
+        updated = now.isoformat()
+        lease_until = (now + timedelta(seconds=lease_seconds)).isoformat()
+        rows: list[sqlite3.Row] = self._db.execute(
+            f"""
+            UPDATE alerts
+            SET status = 'processing', processing_started_at = ?, updated_at = ?, attempts = attempts + 1,
+                lease_owner = ?, lease_until = ?
+            WHERE ingest_id IN (
+              SELECT ingest_id FROM (
+                SELECT * FROM (
+                  SELECT ingest_id, received_at FROM alerts
+                  WHERE status = 'ingested'
+                  ORDER BY received_at ASC
+                  LIMIT ?
+                )
+                UNION ALL
+                SELECT ingest_id, received_at FROM alerts
+                WHERE lease_until < ? AND {_IN_FLIGHT}
+              )
+              ORDER BY received_at ASC
+              LIMIT ?
+            )
+            RETURNING *
+            """,
+            (updated, updated, owner, lease_until, n, updated, n),
+        ).fetchall()
+        commit(self._db)
+        return sorted(rows, key=lambda r: (str(r["received_at"]), str(r["ingest_id"])))
+
+    def claim_next(self) -> sqlite3.Row | None:
+        rows = self.claim_batch(1)
+        return rows[0] if rows else None
+
+    def extend_leases(self, owner: str, lease_seconds: int) -> int:
+        lease_until = (datetime.now(tz=UTC) + timedelta(seconds=lease_seconds)).isoformat()
         cur = self._db.execute(
-            """
+            f"UPDATE alerts SET lease_until = ? WHERE lease_owner = ? AND {_IN_FLIGHT}",
+            (lease_until, owner),
+        )
+        commit(self._db)
+        return int(cur.rowcount)
+
+    def release(self, ingest_ids: list[str], owner: str) -> int:
+        # Puts claimed alerts back in the queue without counting the attempt, for failures that
+        # say nothing about the alerts themselves (a locked database). Alerts the pipeline has
+        # already finished are left alone.
+        now = datetime.now(tz=UTC).isoformat()
+        cur = self._db.executemany(
+            f"""
             UPDATE alerts
-            SET status = 'processing', processing_started_at = ?, updated_at = ?, attempts = attempts + 1
-            WHERE ingest_id = ? AND status = 'ingested'
+            SET status = 'ingested', updated_at = ?, attempts = MAX(attempts - 1, 0),
+                processing_started_at = NULL, lease_owner = NULL, lease_until = NULL
+            WHERE ingest_id = ? AND lease_owner = ? AND {_IN_FLIGHT}
             """,
-            (updated, updated, row["ingest_id"]),
+            [(now, ingest_id, owner) for ingest_id in ingest_ids],
         )
-        if cur.rowcount != 1:
-            self._db.commit()
-            return None
-        self._db.commit()
-        return row
+        commit(self._db)
+        return int(cur.rowcount)
 
-    def mark_processed(self, ingest_id: str, status: str = "processed") -> None:
+    def fail_exhausted_leases(self, max_attempts: int) -> int:
+        # An alert whose lease keeps expiring is most likely crashing its worker; stop retrying.
         now = datetime.now(tz=UTC).isoformat()
-        self._db.execute(
-            "UPDATE alerts SET status = ?, processed_at = ?, updated_at = ?, last_error = NULL WHERE ingest_id = ?",
-            (status, now, now, ingest_id),
+        cur = self._db.execute(
+            f"""
+            UPDATE alerts
+            SET status = 'failed', updated_at = ?, last_error = 'lease expired after ' || attempts || ' attempts',
+                lease_owner = NULL, lease_until = NULL
+            WHERE lease_until < ? AND {_IN_FLIGHT} AND attempts >= ?
+            """,
+            (now, now, max_attempts),
         )
-        self._db.commit()
+        commit(self._db)
+        return int(cur.rowcount)
+
+    def mark_processed(self, ingest_id: str, owner: str, status: str = "processed") -> bool:
+        return self.mark_processed_many([ingest_id], owner, status=status) == 1
 
-    def mark_failed(self, ingest_id: str, error: str) -> None:
+    def mark_processed_many(
+        self, ingest_ids: list[str], owner: str, status: str = "processed"
+    ) -> int:
+        # Only alerts `owner` still holds the lease on: one whose lease lapsed has been claimed
+        # again (or failed) and is left to its new owner. Returns how many were marked.
         now = datetime.now(tz=UTC).isoformat()
-        self._db.execute(
-            "UPDATE alerts SET status = 'failed', updated_at = ?, last_error = ? WHERE ingest_id = ?",
-            (now, error, ingest_id),
+        cur = self._db.executemany(
+            """
+            UPDATE alerts
+            SET status = ?, processed_at = ?, updated_at = ?, last_error = NULL, lease_owner = NULL, lease_until = NULL
+            WHERE ingest_id = ? AND lease_owner = ?
+            """,
+            [(status, now, now, ingest_id, owner) for ingest_id in ingest_ids],
+        )
+        commit(self._db)
+        return int(cur.rowcount)
+
+    def leased_to(self, ingest_ids: list[str], owner: str | None) -> set[str]:
+        # Those of ingest_ids whose lease `owner` holds, as mark_failed matches them.
+        held: set[str] = set()
+        for i in range(0, len(ingest_ids), _CHUNK):
+            chunk = ingest_ids[i : i + _CHUNK]
+            rows = self._db.execute(
+                f"""
+                SELECT ingest_id FROM alerts
+                WHERE ingest_id IN ({",".join("?" * len(chunk))}) AND lease_owner IS ?
+                """,
+                (*chunk, owner),
+            ).fetchall()
+            held.update(str(row["ingest_id"]) for row in rows)
+        return held
+
+    def mark_failed(self, ingest_id: str, error: str, owner: str | None) -> bool:
+        # As mark_processed_many; an owner of None matches an alert no worker has claimed.
+        now = datetime.now(tz=UTC).isoformat()
+        cur = self._db.execute(
+            """
+            UPDATE alerts
+            SET status = 'failed', updated_at = ?, last_error = ?, lease_owner = NULL, lease_until = NULL
+            WHERE ingest_id = ? AND lease_owner IS ?
+            """,
+            (now, error, ingest_id, owner),
         )
-        self._db.commit()
+        commit(self._db)
+        return cur.rowcount == 1
+
+
+_IN_FLIGHT = "status NOT IN ('ingested', 'processed', 'failed')"
+
+# Keeps bulk statements well under SQLite's bound-parameter limit.
+_CHUNK = 200
@@ -1,42 +1,103 @@
 from __future__ import annotations
 
-import json
 import sqlite3
-from datetime import UTC, datetime, timedelta
+import time
+from datetime import UTC, datetime
 from typing import Any, cast
 
+from autotriage.metrics.prom import ENRICHER_CACHE_EVICTIONS_TOTAL
+from autotriage.storage.db import commit
+from autotriage.util import codec
+
+# Keeps bulk statements well under SQLite's bound-parameter limit.
+_CHUNK = 200
+
+
+def _now() -> int:
+    return int(time.time())
+
 
 class CacheRepository:
+    # expires_at is integer epoch seconds. Reads only see live rows and never write; expired
+    # rows are removed by sweep_expired.
     def __init__(self, db: sqlite3.Connection) -> None:
         self._db = db
 
     def get(self, enricher: str, key: str) -> dict[str, Any] | None:
         row = self._db.execute(
-            "SELECT value_json, expires_at FROM cache WHERE enricher = ? AND cache_key = ?",
-            (enricher, key),
+            "SELECT value_json FROM cache WHERE enricher = ? AND cache_key = ? AND expires_at > ?",
+            (enricher, key, _now()),
         ).fetchone()
         if row is None:
             return None
-        expires_at = datetime.fromisoformat(str(row["expires_at"]))
-        if expires_at < datetime.now(tz=UTC):
-            self._db.execute(
-                "DELETE FROM cache WHERE enricher = ? AND cache_key = ?", (enricher, key)
-            )
-            self._db.commit()
-            return None
-        value = json.loads(str(row["value_json"]))
+        value = codec.loads(str(row["value_json"]))
         if not isinstance(value, dict):
             return None
         return cast(dict[str, Any], value)
 
     def set(self, enricher: str, key: str, value: dict[str, Any], ttl_seconds: int) -> None:
-        now = datetime.now(tz=UTC)
-        expires_at = now + timedelta(seconds=ttl_seconds)
-        self._db.execute(
+        self.set_many(enricher, [(key, value)], ttl_seconds)
+
+    def get_many(self, enricher: str, keys: list[str]) -> dict[str, dict[str, Any]]:
+        return {key: value for key, (value, _) in self.get_many_entries(enricher, keys).items()}
+
+    def get_many_entries(
+        self, enricher: str, keys: list[str]
+    ) -> dict[str, tuple[dict[str, Any], int]]:
+        out: dict[str, tuple[dict[str, Any], int]] = {}
+        now = _now()
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), _CHUNK):
+            chunk = unique[i : i + _CHUNK]
+            rows = self._db.execute(
+                f"""
+                SELECT cache_key, value_json, expires_at FROM cache
+                WHERE enricher = ? AND cache_key IN ({",".join("?" * len(chunk))})
+                  AND expires_at > ?
+                """,
+                (enricher, *chunk, now),
+            ).fetchall()
+            for row in rows:
+                value = codec.loads(str(row["value_json"]))
+                if isinstance(value, dict):
+                    out[str(row["cache_key"])] = (
+                        cast(dict[str, Any], value),
+                        int(row["expires_at"]),
+                    )
+        return out
+
+    def set_many(
+        self, enricher: str, items: list[tuple[str, dict[str, Any]]], ttl_seconds: int
+    ) -> None:
+        if not items:
+            return
+        created_at = datetime.now(tz=UTC).isoformat()
+        expires_at = _now() + ttl_seconds
+        for i in range(0, len(items), _CHUNK):
+            chunk = items[i : i + _CHUNK]
+            params: list[Any] = []
+            for key, value in chunk:
+                params.extend((enricher, key, created_at, expires_at, codec.dumps(value)))
+            self._db.execute(
+                f"""
+                INSERT OR REPLACE INTO cache (enricher, cache_key, created_at, expires_at, value_json)
+                VALUES {",".join(["(?, ?, ?, ?, ?)"] * len(chunk))}
+                """,
+                params,
+            )
+        commit(self._db)
+
+    def sweep_expired(self, batch_size: int = 500, now: int | None = None) -> int:
+        cur = self._db.execute(
             """
-            INSERT OR REPLACE INTO cache (enricher, cache_key, created_at, expires_at, value_json)
-            VALUES (?, ?, ?, ?, ?)
+            DELETE FROM cache WHERE rowid IN (
+              SELECT rowid FROM cache WHERE expires_at <= ? LIMIT ?
+            )
             """,
-            (enricher, key, now.isoformat(), expires_at.isoformat(), json.dumps(value)),
+            (_now() if now is None else now, batch_size),
         )
-        self._db.commit()
+        commit(self._db)
+        deleted = int(cur.rowcount)
+        if deleted:
+            ENRICHER_CACHE_EVICTIONS_TOTAL.labels("l2").inc(deleted)
+        return deleted
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import sqlite3
+
+_ROW_COLUMNS = "ce.rowid AS rowid, ce.entity_type, ce.entity_value, ce.case_id, c.created_at"
+# Entities per latest_cases query, two bound parameters each.
+_LOOKUP_CHUNK = 400
+
+
+def _matches(entities: list[tuple[str, str]]) -> tuple[str, list[str]]:
+    # One equality pair per entity, so each probes idx_case_entities_entity; SQLite does not
+    # use an index for a row-value IN list.
+    params: list[str] = []
+    for t, v in entities:
+        params.extend([t, v])
+    return " OR ".join(["(ce.entity_type = ? AND ce.entity_value = ?)"] * len(entities)), params
+
+
+class CaseEntitiesRepository:
+    # Nothing deletes from case_entities, so rowid order is insertion order and in-process
+    # indexes can tail the table by rowid.
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self._db = db
+
+    def latest_case(self, entities: list[tuple[str, str]], since: str) -> str | None:
+        if not entities:
+            return None
+        matches, params = _matches(entities)
+        params.append(since)
+        row = self._db.execute(
+            f"""
+            SELECT ce.case_id
+            FROM case_entities ce
+            JOIN cases c ON c.case_id = ce.case_id
+            WHERE ({matches})
+              AND c.created_at >= ?
+            ORDER BY c.created_at DESC
+            LIMIT 1
+            """,
+            params,
+        ).fetchone()
+        return str(row["case_id"]) if row else None
+
+    def latest_cases(
+        self, entities: list[tuple[str, str]], since: str
+    ) -> dict[tuple[str, str], tuple[str, str]]:
+        # For each entity held by a case created at or after `since`: (created_at, case_id) of
+        # the newest such case. SQLite takes the bare case_id from the row holding the MAX.
+        out: dict[tuple[str, str], tuple[str, str]] = {}
+        for start in range(0, len(entities), _LOOKUP_CHUNK):
+            matches, params = _matches(entities[start : start + _LOOKUP_CHUNK])
+            params.append(since)
+            rows = self._db.execute(
+                f"""
+                SELECT ce.entity_type, ce.entity_value, ce.case_id, MAX(c.created_at) AS created_at
+                FROM case_entities ce
+                JOIN cases c ON c.case_id = ce.case_id
+                WHERE ({matches})
+                  AND c.created_at >= ?
+                GROUP BY ce.entity_type, ce.entity_value
+                """,
+                params,
+            ).fetchall()
+            for r in rows:
+                out[(str(r[0]), str(r[1]))] = (str(r["created_at"]), str(r["case_id"]))
+        return out
+
+    def add(self, case_id: str, entities: list[tuple[str, str]]) -> list[int]:
+        # Returns the rowids of the rows actually inserted; entities the case already holds
+        # are skipped.
+        rowids: list[int] = []
+        for t, v in entities:
+            cur = self._db.execute(
+                "INSERT OR IGNORE INTO case_entities (case_id, entity_type, entity_value) VALUES (?, ?, ?)",
+                (case_id, t, v),
+            )
+            if cur.rowcount:
+                rowids.append(int(cur.lastrowid or 0))
+        return rowids
+
+    def add_many(self, rows: list[tuple[str, str, str]]) -> None:
+        # (case_id, entity_type, entity_value) rows; ones already present are skipped.
+        self._db.executemany(
+            "INSERT OR IGNORE INTO case_entities (case_id, entity_type, entity_value) VALUES (?, ?, ?)",
+            rows,
+        )
+
+    def max_rowid(self) -> int:
+        return int(
+            self._db.execute("SELECT COALESCE(MAX(rowid), 0) FROM case_entities").fetchone()[0]
+        )
+
+    def rows_between(self, after_rowid: int, upto_rowid: int | None = None) -> list[sqlite3.Row]:
+        return self._db.execute(
+            f"""
+            SELECT {_ROW_COLUMNS}
+            FROM case_entities ce
+            JOIN cases c ON c.case_id = ce.case_id
+            WHERE ce.rowid > ? AND ce.rowid <= ?
+            ORDER BY ce.rowid
+            """,
+            (after_rowid, upto_rowid if upto_rowid is not None else 2**63 - 1),
+        ).fetchall()
+
+    def rows_for_cases_since(self, created_at: str, upto_rowid: int) -> list[sqlite3.Row]:
+        # CROSS JOIN keeps cases as the outer loop, so only cases in range are visited
+        # (idx_cases_created) rather than every case_entities row below upto_rowid.
+        return self._db.execute(
+            f"""
+            SELECT {_ROW_COLUMNS}
+            FROM cases c
+            CROSS JOIN case_entities ce ON ce.case_id = c.case_id
+            WHERE c.created_at >= ? AND ce.rowid <= ?
+            ORDER BY ce.rowid
+            """,
+            (created_at, upto_rowid),
+        ).fetchall()
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Any
+
+from autotriage.storage.db import commit, unit_of_work
+from autotriage.util import codec
+
+
+def _loads(value: object) -> Any:
+    try:
+        return codec.loads(str(value or "{}"))
+    except ValueError:
+        return {}
+
+
+@dataclass(frozen=True)
+class _Built:
+    case_updated_at: str
+    doc: dict[str, Any]
+    entities_rowid: int
+    edges_rowid: int
+
+
+class CaseSnapshotsRepository:
+    # One JSON document per case holding everything the case detail view shows except the
+    # timeline, so reading a case is a single row. See migrations 017 to 019.
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self._db = db
+
+    def get(self, case_id: str) -> dict[str, Any] | None:
+        # None for an unknown case. A missing or stale snapshot is built from the case's rows
+        # but not stored: reads never take the write lock, and storing would bump data_version
+        # and drop every cached response. The pipeline and backfill() store snapshots.
+        row = self._db.execute(
+            """
+            SELECT c.updated_at, s.case_updated_at, s.doc_json
+            FROM cases c
+            LEFT JOIN case_snapshots s ON s.case_id = c.case_id
+            WHERE c.case_id = ?
+            """,
+            (case_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        if row["case_updated_at"] == row["updated_at"]:
+            doc: dict[str, Any] = codec.loads(str(row["doc_json"]))
+            return doc
+        built = self._build(case_id)
+        return built.doc if built else None
+
+    def refresh(
+        self, case_id: str, enrichments: dict[str, Any] | None = None
+    ) -> dict[str, Any] | None:
+        # Brings the snapshot up to date and stores it. `enrichments` are the ones just
+        # computed for an alert on the case; when empty, the previous snapshot's are kept, as
+        # the case view always showed the latest non-empty enrichment.
+        built = self._build(case_id, enrichments)
+        if built is None:
+            return None
+        self._db.execute(
+            """
+            INSERT INTO case_snapshots (case_id, case_updated_at, doc_json, entities_rowid, edges_rowid)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (case_id) DO UPDATE
+            SET case_updated_at = excluded.case_updated_at, doc_json = excluded.doc_json,
+                entities_rowid = excluded.entities_rowid, edges_rowid = excluded.edges_rowid
+            """,
+            (
+                case_id,
+                built.case_updated_at,
+                codec.dumps(built.doc),
+                built.entities_rowid,
+                built.edges_rowid,
+            ),
+        )
+        self._db.execute("DELETE FROM case_snapshots_stale WHERE case_id = ?", (case_id,))
+        commit(self._db)
+        return built.doc
+
+    def backfill(self, batch_size: int) -> int:
+        # Stores snapshots for up to batch_size of the cases queued in case_snapshots_stale
+        # (see migration 018), in one transaction. Returns how many.
+        case_ids = [
+            str(r["case_id"])
+            for r in self._db.execute(
+                "SELECT case_id FROM case_snapshots_stale LIMIT ?", (batch_size,)
+            )
+        ]
+        with unit_of_work(self._db):
+            for case_id in case_ids:
+                self.refresh(case_id)
+        return len(case_ids)
+
+    def _build(self, case_id: str, enrichments: dict[str, Any] | None = None) -> _Built | None:
+        # The previous snapshot patched: the case row, ticket, scoring and routing are read
+        # again, as they change in place, while the graph only gains the rows added past the
+        # snapshot's rowids. A case without a usable snapshot is built whole.
+        case = self._db.execute("SELECT * FROM cases WHERE case_id = ?", (case_id,)).fetchone()
+        if case is None:
+            return None
+        previous = self._db.execute(
+            "SELECT doc_json, entities_rowid, edges_rowid FROM case_snapshots WHERE case_id = ?",
+            (case_id,),
+        ).fetchone()
+        previous_doc: dict[str, Any] = _loads(previous["doc_json"]) if previous else {}
+        graph = previous_doc.get("graph") or {}
+        if (
+            previous is None
+            or previous["entities_rowid"] is None
+            or previous["edges_rowid"] is None
+            or set(graph) != {"nodes", "edges"}
+        ):
+            graph = {"nodes": [], "edges": []}
+            entities_rowid = edges_rowid = 0
+        else:
+            entities_rowid, edges_rowid = previous["entities_rowid"], previous["edges_rowid"]
+        entities_rowid = self._append(graph["nodes"], "case_entities", case_id, entities_rowid)
+        edges_rowid = self._append(graph["edges"], "case_edges", case_id, edges_rowid)
+        ticket = self._db.execute("SELECT * FROM tickets WHERE case_id = ?", (case_id,)).fetchone()
+        doc = {
+            "case": dict(case),
+            "graph": graph,
+            "ticket": dict(ticket) if ticket else None,
+            "enrichments": enrichments
+            or previous_doc.get("enrichments")
+            or ({} if previous else self._enrichments_from_events(case_id)),
+            "scoring": _loads(case["score_json"]),
+            "routing": _loads(case["routing_json"]),
+        }
+        return _Built(str(case["updated_at"]), doc, entities_rowid, edges_rowid)
+
+    def _append(self, into: list[dict[str, Any]], table: str, case_id: str, after: int) -> int:
+        # Appends the case's rows of `table` past rowid `after`, in rowid order, and returns
+        # the last rowid seen.
+        for r in self._db.execute(
+            f"SELECT rowid AS rowid_, * FROM {table} WHERE case_id = ? AND rowid > ? ORDER BY rowid",
+            (case_id, after),
+        ):
+            row = dict(r)
+            after = row.pop("rowid_")
+            into.append(row)
+        return after
+
+    def _enrichments_from_events(self, case_id: str) -> dict[str, Any]:
+        # No snapshot yet: the case predates them, so look through its enrichment events.
+        for r in self._db.execute(
+            """
+            SELECT payload_json FROM events
+            WHERE case_id = ? AND stage = 'enriched'
+            ORDER BY created_at DESC, event_id DESC
+            """,
+            (case_id,),
+        ):
+            found = _loads(r["payload_json"]).get("enrichments")
+            if found:
+                return dict(found)
+        return {}
@@ -1,9 +1,24 @@
 from __future__ import annotations
 
+import base64
 import sqlite3
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
+from autotriage.storage.db import commit
+from autotriage.util import codec
+
+# Above this many search matches, list_cases scans cases by time instead of by match.
+_SEARCH_FEW = 2000
+
+
+@dataclass(frozen=True)
+class CasePage:
+    items: list[dict[str, Any]]
+    # Opaque position after the last item when more rows match, else None.
+    next_cursor: str | None
+
 
 class CasesRepository:
     def __init__(self, db: sqlite3.Connection) -> None:
@@ -16,9 +31,22 @@ class CasesRepository:
         decision: str | None,
         queue: str | None,
         q: str | None,
-    ) -> list[dict[str, Any]]:
+        *,
+        limit: int = 200,
+        cursor: str | None = None,
+        updated_since: str | None = None,
+    ) -> CasePage:
+        # Newest cases first, keyset-paginated on (created_at, case_id). With updated_since,
+        # cases changed at or after it instead, oldest change first on (updated_at, case_id),
+        # so a poller can page through every change in order. Raises ValueError for a
+        # malformed cursor or timestamp.
+        mode = "updated" if updated_since is not None else "created"
+        key = "updated_at" if mode == "updated" else "created_at"
         where: list[str] = []
         params: list[Any] = []
+        if updated_since is not None:
+            where.append("updated_at >= ?")
+            params.append(_parse_timestamp(updated_since))
         if time_range:
             since = _parse_time_range(time_range)
             if since is not None:
@@ -33,55 +61,38 @@ class CasesRepository:
         if queue:
             where.append("queue = ?")
             params.append(queue)
+        if cursor:
+            where.append(f"({key}, case_id) {'>' if mode == 'updated' else '<'} (?, ?)")
+            params.extend(_decode_cursor(cursor, mode))
         if q:
-            where.append(
-                """(
-                  summary LIKE ?
-                  OR case_id LIKE ?
-                  OR EXISTS (
-                    SELECT 1 FROM case_entities ce
-                    WHERE ce.case_id = cases.case_id AND ce.entity_value LIKE ?
-                  )
-                )"""
-            )
-            params.extend([f"%{q}%", f"%{q}%", f"%{q}%"])
-        sql = "SELECT case_id, created_at, severity, decision, queue, summary FROM cases"
+            match = _search_query(q)
+            if match:
+                matches = self._db.execute(
+                    "SELECT COUNT(*) FROM (SELECT 1 FROM cases_fts WHERE cases_fts MATCH ? LIMIT ?)",
+                    (match, _SEARCH_FEW + 1),
+                ).fetchone()[0]
+                if not matches:
+                    return CasePage(items=[], next_cursor=None)
+                # A few matches are fetched by rowid and sorted. For many, the unary + keeps
+                # SQLite walking the sort key's index in order, stopping at the LIMIT.
+                column = "rowid" if matches <= _SEARCH_FEW else "+rowid"
+                where.append(f"{column} IN (SELECT rowid FROM cases_fts WHERE cases_fts MATCH ?)")
+                params.append(match)
+        sql = (
+            "SELECT case_id, created_at, updated_at, severity, decision, queue, summary FROM cases"
+        )
         if where:
             sql += " WHERE " + " AND ".join(where)
-        sql += " ORDER BY created_at DESC LIMIT 200"
-        cur = self._db.execute(sql, params)
-        return [dict(r) for r in cur.fetchall()]
-
-    def get_case_detail(self, case_id: str) -> dict[str, Any]:
-        cur = self._db.execute("SELECT * FROM cases WHERE case_id = ?", (case_id,))
-        row = cur.fetchone()
-        if row is None:
-            return {"case_id": case_id, "missing": True}
-        events = [
-            dict(r)
-            for r in self._db.execute(
-                "SELECT * FROM events WHERE case_id = ? ORDER BY created_at ASC", (case_id,)
-            ).fetchall()
-        ]
-        nodes = [
-            dict(r)
-            for r in self._db.execute(
-                "SELECT * FROM case_entities WHERE case_id = ?", (case_id,)
-            ).fetchall()
-        ]
-        edges = [
-            dict(r)
-            for r in self._db.execute(
-                "SELECT * FROM case_edges WHERE case_id = ?", (case_id,)
-            ).fetchall()
-        ]
-        ticket = self._db.execute("SELECT * FROM tickets WHERE case_id = ?", (case_id,)).fetchone()
-        return {
-            "case": dict(row),
-            "timeline": events,
-            "graph": {"nodes": nodes, "edges": edges},
-            "ticket": dict(ticket) if ticket else None,
-        }
+        order = "ASC" if mode == "updated" else "DESC"
+        sql += f" ORDER BY {key} {order}, case_id {order} LIMIT ?"
+        # One row past the page tells whether there is a next one.
+        params.append(limit + 1)
+        items = [dict(r) for r in self._db.execute(sql, params).fetchall()]
+        if len(items) <= limit:
+            return CasePage(items=items, next_cursor=None)
+        items = items[:limit]
+        last = items[-1]
+        return CasePage(items=items, next_cursor=_encode_cursor(mode, last[key], last["case_id"]))
 
     def upsert_edge(
         self,
@@ -99,7 +110,7 @@ class CasesRepository:
             """,
             (case_id, src_type, src_value, dst_type, dst_value, edge_type),
         )
-        self._db.commit()
+        commit(self._db)
 
 
 def _parse_time_range(time_range: str) -> datetime | None:
@@ -112,3 +123,31 @@ def _parse_time_range(time_range: str) -> datetime | None:
     if tr.endswith("m"):
         return now - timedelta(minutes=int(tr[:-1] or "0"))
     return None
+
+
+def _parse_timestamp(value: str) -> str:
+    ts = datetime.fromisoformat(value)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=UTC)
+    return ts.astimezone(UTC).isoformat()
+
+
+def _encode_cursor(mode: str, key: str, case_id: str) -> str:
+    return base64.urlsafe_b64encode(codec.dumps([mode, key, case_id]).encode("utf-8")).decode()
+
+
+def _decode_cursor(cursor: str, mode: str) -> tuple[str, str]:
+    # A cursor only resumes the kind of listing that issued it.
+    try:
+        got, key, case_id = codec.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    if got != mode or not isinstance(key, str) or not isinstance(case_id, str):
+        raise ValueError("invalid cursor")
+    return key, case_id
+
+
+def _search_query(q: str) -> str:
+    # Each whitespace-separated term becomes a quoted FTS5 prefix query, so input is never
+    # parsed as FTS syntax and "ws-4" matches "ws-42". Terms are ANDed.
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in q.split())
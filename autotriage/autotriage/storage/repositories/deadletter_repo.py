@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-import json
 import sqlite3
 from datetime import UTC, datetime
 from typing import Any
 
+from autotriage.storage.db import commit
+from autotriage.util import codec
+
 
 class DeadletterRepository:
     def __init__(self, db: sqlite3.Connection) -> None:
@@ -23,6 +25,6 @@ class DeadletterRepository:
               error = excluded.error,
               payload_json = excluded.payload_json
             """,
-            (ingest_id, now, now, stage, error, json.dumps(payload)),
+            (ingest_id, now, now, stage, error, codec.dumps(payload)),
         )
-        self._db.commit()
+        commit(self._db)
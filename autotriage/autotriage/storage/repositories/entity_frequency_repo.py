@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import sqlite3
+
+from autotriage.storage.db import commit
+
+BUCKET_SECONDS = 3600
+
+
+class EntityFrequencyRepository:
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self._db = db
+
+    def bump(self, entities: list[tuple[str, str]], now: int) -> None:
+        # Each occurrence counts as one alert; runs in the caller's transaction.
+        bucket = now - now % BUCKET_SECONDS
+        self._db.executemany(
+            """
+            INSERT INTO entity_frequency (bucket, entity_type, entity_value, alert_count)
+            VALUES (?, ?, ?, 1)
+            ON CONFLICT (bucket, entity_type, entity_value)
+            DO UPDATE SET alert_count = alert_count + 1
+            """,
+            [(bucket, t, v) for t, v in entities],
+        )
+
+    def hot(
+        self, since: int, threshold: int, limit: int | None = None
+    ) -> list[tuple[str, str, int]]:
+        # Entities seen in at least `threshold` alerts in the buckets from `since` on, the
+        # most frequent first.
+        rows = self._db.execute(
+            """
+            SELECT entity_type, entity_value, SUM(alert_count) AS alerts
+            FROM entity_frequency
+            WHERE bucket >= ?
+            GROUP BY entity_type, entity_value
+            HAVING SUM(alert_count) >= ?
+            ORDER BY alerts DESC, entity_type, entity_value
+            LIMIT ?
+            """,
+            (since - since % BUCKET_SECONDS, threshold, -1 if limit is None else limit),
+        ).fetchall()
+        return [(str(r[0]), str(r[1]), int(r[2])) for r in rows]
+
+    def prune(self, before: int, batch_size: int = 500) -> int:
+        cur = self._db.execute(
+            """
+            DELETE FROM entity_frequency WHERE (bucket, entity_type, entity_value) IN (
+              SELECT bucket, entity_type, entity_value FROM entity_frequency
+              WHERE bucket < ? LIMIT ?
+            )
+            """,
+            (before - before % BUCKET_SECONDS, batch_size),
+        )
+        commit(self._db)
+        return int(cur.rowcount)
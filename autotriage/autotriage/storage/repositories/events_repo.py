@@ -1,11 +1,22 @@
 from __future__ import annotations
 
-import json
+import base64
 import sqlite3
 import uuid
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
 
+from autotriage.storage.db import commit
+from autotriage.util import codec
+
+
+@dataclass(frozen=True)
+class TimelinePage:
+    items: list[dict[str, Any]]
+    # Opaque position after the last item when the case has more events, else None.
+    next_cursor: str | None
+
 
 class EventsRepository:
     def __init__(self, db: sqlite3.Connection) -> None:
@@ -25,7 +36,56 @@ class EventsRepository:
             INSERT INTO events (event_id, created_at, stage, ingest_id, case_id, payload_json)
             VALUES (?, ?, ?, ?, ?, ?)
             """,
-            (event_id, created_at.isoformat(), stage, ingest_id, case_id, json.dumps(payload)),
+            (event_id, created_at.isoformat(), stage, ingest_id, case_id, codec.dumps(payload)),
         )
-        self._db.commit()
+        commit(self._db)
         return event_id
+
+    def case_timeline(
+        self, case_id: str, *, limit: int = 200, cursor: str | None = None
+    ) -> TimelinePage:
+        # A case's events oldest first, keyset-paginated on (created_at, event_id), each with
+        # its payload decoded. Raises ValueError for a malformed cursor.
+        where = "case_id = ?"
+        params: list[Any] = [case_id]
+        if cursor:
+            where += " AND (created_at, event_id) > (?, ?)"
+            params.extend(_decode_cursor(cursor))
+        params.append(limit + 1)
+        rows = self._db.execute(
+            f"""
+            SELECT * FROM events
+            WHERE {where}
+            ORDER BY created_at, event_id
+            LIMIT ?
+            """,
+            params,
+        ).fetchall()
+        items: list[dict[str, Any]] = []
+        for r in rows[:limit]:
+            ev = dict(r)
+            try:
+                ev["payload"] = codec.loads(str(ev["payload_json"] or "{}"))
+            except ValueError:
+                ev["payload"] = {}
+            items.append(ev)
+        if len(rows) <= limit:
+            return TimelinePage(items=items, next_cursor=None)
+        last = items[-1]
+        return TimelinePage(
+            items=items, next_cursor=_encode_cursor(last["created_at"], last["event_id"])
+        )
+
+
+def _encode_cursor(created_at: str, event_id: str) -> str:
+    return base64.urlsafe_b64encode(codec.dumps([created_at, event_id]).encode("utf-8")).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        created_at, event_id = codec.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    if not isinstance(created_at, str) or not isinstance(event_id, str):
+        raise ValueError("invalid cursor")
+    return created_at, event_id
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import sqlite3
+
+from autotriage.storage.db import commit
+
+
+class FingerprintsRepository:
+    # Rows are read back in rowid order, which is also insertion order: a re-recorded ingest
+    # is deleted and inserted again at the end.
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self._db = db
+
+    def first_ingest(self, strategy: str, fp_hash: str, window_start: str) -> str | None:
+        row = self._db.execute(
+            """
+            SELECT ingest_id FROM fingerprints
+            WHERE fp_hash = ? AND window_start = ? AND strategy = ?
+            ORDER BY created_at ASC, rowid ASC
+            LIMIT 1
+            """,
+            (fp_hash, window_start, strategy),
+        ).fetchone()
+        return str(row["ingest_id"]) if row is not None else None
+
+    def record(self, ingest_id: str, strategy: str, fp_hash: str, window_start: str) -> int:
+        cur = self._db.execute(
+            """
+            INSERT OR REPLACE INTO fingerprints (ingest_id, created_at, strategy, fp_hash, window_start)
+            VALUES (?, datetime('now'), ?, ?, ?)
+            """,
+            (ingest_id, strategy, fp_hash, window_start),
+        )
+        commit(self._db)
+        return int(cur.lastrowid or 0)
+
+    def max_rowid(self) -> int:
+        return int(
+            self._db.execute("SELECT COALESCE(MAX(rowid), 0) FROM fingerprints").fetchone()[0]
+        )
+
+    def rows_between(self, after_rowid: int, upto_rowid: int | None = None) -> list[sqlite3.Row]:
+        return self._db.execute(
+            """
+            SELECT rowid AS rowid, ingest_id, strategy, fp_hash, window_start FROM fingerprints
+            WHERE rowid > ? AND rowid <= ?
+            ORDER BY rowid
+            """,
+            (after_rowid, upto_rowid if upto_rowid is not None else 2**63 - 1),
+        ).fetchall()
+
+    def rows_from_window(self, window_start: str, upto_rowid: int) -> list[sqlite3.Row]:
+        return self._db.execute(
+            """
+            SELECT rowid AS rowid, ingest_id, strategy, fp_hash, window_start FROM fingerprints
+            WHERE window_start >= ? AND rowid <= ?
+            ORDER BY rowid
+            """,
+            (window_start, upto_rowid),
+        ).fetchall()
+
+    def prune(self, before_window_start: str, batch_size: int = 500) -> int:
+        cur = self._db.execute(
+            """
+            DELETE FROM fingerprints WHERE rowid IN (
+              SELECT rowid FROM fingerprints WHERE window_start < ? LIMIT ?
+            )
+            """,
+            (before_window_start, batch_size),
+        )
+        commit(self._db)
+        return int(cur.rowcount)
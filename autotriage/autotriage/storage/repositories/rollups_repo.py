@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import sqlite3
+
+from autotriage.storage.db import commit
+
+BUCKET_SECONDS = 60
+# Maintained by the triggers in migration 016.
+METRICS = ("ingested", "deduped", "cases", "auto_closed", "tickets", "errors")
+
+
+class RollupsRepository:
+    # Windows start at the bucket holding `since`, so they are exact to the minute. Totals read
+    # each metric as its own range of the (metric, bucket) key; a GROUP BY metric over the
+    # window would sort every row first.
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self._db = db
+
+    def totals(self, since: int) -> dict[str, int]:
+        start = since - since % BUCKET_SECONDS
+        return {
+            metric: int(
+                self._db.execute(
+                    "SELECT TOTAL(value) FROM rollups WHERE metric = ? AND bucket >= ?",
+                    (metric, start),
+                ).fetchone()[0]
+            )
+            for metric in METRICS
+        }
+
+    def series(self, since: int, step: int = BUCKET_SECONDS) -> list[tuple[int, dict[str, int]]]:
+        # (start, counts) for each `step` seconds (a multiple of BUCKET_SECONDS) from `since` on
+        # with any activity, oldest first. Pivoted in SQL: one row per point instead of one per
+        # bucket and metric.
+        start = since - since % BUCKET_SECONDS
+        columns = ", ".join(f"TOTAL(value) FILTER (WHERE metric = '{m}')" for m in METRICS)
+        rows = self._db.execute(
+            f"""
+            SELECT bucket - bucket % ? AS point, {columns}
+            FROM rollups
+            WHERE metric IN ({", ".join("?" * len(METRICS))}) AND bucket >= ? AND value != 0
+            GROUP BY point
+            ORDER BY point
+            """,
+            (step, *METRICS, start),
+        ).fetchall()
+        return [(int(r[0]), {m: int(v) for m, v in zip(METRICS, r[1:], strict=True)}) for r in rows]
+
+    def prune(self, before: int, batch_size: int = 500) -> int:
+        cur = self._db.execute(
+            f"""
+            DELETE FROM rollups WHERE (metric, bucket) IN (
+              SELECT metric, bucket FROM rollups
+              WHERE metric IN ({", ".join("?" * len(METRICS))}) AND bucket < ?
+              LIMIT ?
+            )
+            """,
+            (*METRICS, before - before % BUCKET_SECONDS, batch_size),
+        )
+        commit(self._db)
+        return int(cur.rowcount)
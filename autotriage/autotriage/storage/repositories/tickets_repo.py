@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-import json
 import sqlite3
 import uuid
 from datetime import UTC, datetime
 from typing import Any
 
+from autotriage.storage.db import commit
+from autotriage.util import codec
+
 
 class TicketsRepository:
     def __init__(self, db: sqlite3.Connection) -> None:
@@ -23,9 +25,9 @@ class TicketsRepository:
         url = f"/tickets/{ticket_id}"
         self._db.execute(
             "INSERT INTO tickets (ticket_id, case_id, created_at, url, payload_json) VALUES (?, ?, ?, ?, ?)",
-            (ticket_id, case_id, created_at, url, json.dumps(payload)),
+            (ticket_id, case_id, created_at, url, codec.dumps(payload)),
         )
-        self._db.commit()
+        commit(self._db)
         return {
             "ticket_id": ticket_id,
             "case_id": case_id,
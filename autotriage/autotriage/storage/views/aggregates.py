@@ -1,29 +1,22 @@
 from __future__ import annotations
 
 import sqlite3
-from datetime import UTC, datetime, timedelta
+import time
+from datetime import UTC, datetime
+from typing import Any
 
+from autotriage.storage.repositories.rollups_repo import BUCKET_SECONDS, RollupsRepository
 
-def overview_24h(db: sqlite3.Connection) -> dict[str, int]:
-    since = datetime.now(tz=UTC) - timedelta(hours=24)
 
-    def c(sql: str, params: tuple[object, ...] = ()) -> int:
-        return int(db.execute(sql, params).fetchone()[0])
+def overview(db: sqlite3.Connection, window_seconds: int) -> dict[str, int]:
+    return RollupsRepository(db).totals(int(time.time()) - window_seconds)
 
-    return {
-        "ingested": c("SELECT COUNT(*) FROM alerts WHERE received_at >= ?", (since.isoformat(),)),
-        "deduped": c(
-            "SELECT COUNT(*) FROM events WHERE stage = 'deduped' AND created_at >= ?",
-            (since.isoformat(),),
-        ),
-        "cases": c("SELECT COUNT(*) FROM cases WHERE created_at >= ?", (since.isoformat(),)),
-        "auto_closed": c(
-            "SELECT COUNT(*) FROM cases WHERE decision = 'AUTO_CLOSE' AND created_at >= ?",
-            (since.isoformat(),),
-        ),
-        "tickets": c("SELECT COUNT(*) FROM tickets WHERE created_at >= ?", (since.isoformat(),)),
-        "errors": c(
-            "SELECT COUNT(*) FROM events WHERE stage = 'failed' AND created_at >= ?",
-            (since.isoformat(),),
-        ),
-    }
+
+def overview_series(
+    db: sqlite3.Connection, window_seconds: int, step: int = BUCKET_SECONDS
+) -> list[dict[str, Any]]:
+    since = int(time.time()) - window_seconds
+    return [
+        {"t": datetime.fromtimestamp(point, tz=UTC).isoformat(), **counts}
+        for point, counts in RollupsRepository(db).series(since, step)
+    ]
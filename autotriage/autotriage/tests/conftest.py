@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import pytest
+
+from autotriage.storage.db import close_pools
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pools() -> Iterator[None]:
+    # Tests point AUTOTRIAGE_DB_PATH at databases of their own, while the connection pool and
+    # data_version watcher are resolved once per process: start and end each test without them.
+    close_pools()
+    yield
+    close_pools()
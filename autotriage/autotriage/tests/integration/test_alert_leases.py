@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage import storage, worker
+from autotriage.core.pipeline import orchestrator
+from autotriage.core.pipeline.orchestrator import BatchOutcome, process_ingest_many
+from autotriage.storage.db import get_db, init_db
+from autotriage.storage.repositories.alerts_repo import AlertsRepository
+
+_ALERT = {
+    "vendor": "vendor_a",
+    "time": "2025-01-01T00:00:00Z",
+    "rule": "R-LOGIN-001",
+    "title": "Suspicious login",
+    "severity": 7,
+    "user": "alice",
+}
+
+
+def test_expired_leases_are_reclaimed_then_failed(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = get_db()
+    try:
+        repo = AlertsRepository(db)
+        for i in range(3):
+            repo.insert_or_get_ingest(
+                idempotency_key=f"k{i}", received_at=datetime.now(tz=UTC), raw_payload={"i": i}
+            )
+
+        first = repo.claim_batch(2, owner="a", lease_seconds=60)
+        assert [r["lease_owner"] for r in first] == ["a", "a"]
+        # Another worker only sees the remaining fresh alert while the leases are live.
+        second = repo.claim_batch(10, owner="b", lease_seconds=60)
+        assert len(second) == 1
+        assert repo.claim_batch(10, owner="b") == []
+        assert repo.extend_leases("a", 60) == 2
+
+        # Worker "a" dies: its leases lapse and are picked up again by "b".
+        db.execute(
+            "UPDATE alerts SET lease_until = '2000-01-01T00:00:00+00:00' WHERE lease_owner = 'a'"
+        )
+        db.commit()
+        assert repo.count_pending(limit=10) == 2
+        reclaimed = repo.claim_batch(10, owner="b", lease_seconds=60)
+        assert {r["ingest_id"] for r in reclaimed} == {r["ingest_id"] for r in first}
+        assert {int(r["attempts"]) for r in reclaimed} == {2}
+
+        db.execute("UPDATE alerts SET lease_until = '2000-01-01T00:00:00+00:00'")
+        db.commit()
+        assert repo.fail_exhausted_leases(max_attempts=2) == 2
+        rows = db.execute("SELECT status, lease_owner FROM alerts ORDER BY attempts").fetchall()
+        assert [(r["status"], r["lease_owner"]) for r in rows] == [
+            ("processing", "b"),
+            ("failed", None),
+            ("failed", None),
+        ]
+        # Workers finishing late leave alone the alerts they no longer hold.
+        late = [str(r["ingest_id"]) for r in first]
+        assert repo.mark_processed_many(late, "a") == 0
+        assert repo.mark_processed_many(late, "b") == 0
+        assert not repo.mark_failed(str(second[0]["ingest_id"]), "late", "a")
+        assert repo.mark_processed(str(second[0]["ingest_id"]), "b")
+    finally:
+        db.close()
+
+
+def test_alerts_in_flight_before_leases_are_reclaimed(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    # A database last migrated before alerts had leases, with an alert its worker was on.
+    db_path = tmp_path / "db.sqlite"
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(db_path))
+    migrations = Path(storage.__file__).resolve().parent / "migrations"
+    old = sqlite3.connect(db_path)
+    old.execute("CREATE TABLE schema_migrations (id TEXT PRIMARY KEY, applied_at TEXT NOT NULL)")
+    for path in sorted(migrations.glob("*.sql"))[:7]:
+        old.executescript(path.read_text(encoding="utf-8"))
+        old.execute("INSERT INTO schema_migrations VALUES (?, '')", (path.name,))
+    old.execute(
+        "INSERT INTO alerts (ingest_id, idempotency_key, received_at, raw_json, status)"
+        " VALUES ('stuck', 'k', '2025-01-01T00:00:00+00:00', '{}', 'processing')"
+    )
+    old.commit()
+    old.close()
+
+    init_db()
+    db = get_db()
+    try:
+        rows = AlertsRepository(db).claim_batch(10, owner="a")
+        assert [(r["ingest_id"], r["lease_owner"]) for r in rows] == [("stuck", "a")]
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize(
+    ("error", "status", "calls_expected"),
+    [
+        (sqlite3.OperationalError("database is locked"), "processed", 2),
+        (RuntimeError("bad batch"), "failed", 1),
+    ],
+)
+def test_worker_requeues_alerts_after_a_transient_error(
+    tmp_path: Path, monkeypatch: MonkeyPatch, error: Exception, status: str, calls_expected: int
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("AUTOTRIAGE_WORKER_DOORBELL", "0")
+    init_db()
+    process_ingest_many = worker.process_ingest_many
+    calls = 0
+
+    def flaky(db: sqlite3.Connection, items: list[Any], **kwargs: Any) -> BatchOutcome:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise error
+        return process_ingest_many(db, items, **kwargs)
+
+    monkeypatch.setattr(worker, "process_ingest_many", flaky)
+    db = get_db()
+
+    async def run_until_settled() -> sqlite3.Row:
+        task = asyncio.create_task(
+            worker.worker_loop(poll_interval_s=0.01, max_poll_interval_s=0.01)
+        )
+        try:
+            for _ in range(1000):
+                row: sqlite3.Row = db.execute("SELECT status, attempts FROM alerts").fetchone()
+                if row["status"] in ("processed", "failed"):
+                    return row
+                await asyncio.sleep(0.01)
+            raise AssertionError("the alert was never settled")
+        finally:
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    try:
+        AlertsRepository(db).insert_or_get_ingest(
+            idempotency_key="k",
+            received_at=datetime.now(tz=UTC),
+            raw_payload=_ALERT,
+        )
+        row = asyncio.run(run_until_settled())
+        # A locked database is not the alert's fault: it goes back in the queue and is
+        # retried, and only the retry counts as an attempt.
+        assert (row["status"], row["attempts"]) == (status, 1)
+        assert calls == calls_expected
+    finally:
+        db.close()
+
+
+def test_worker_leaves_alerts_whose_lease_it_lost(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("AUTOTRIAGE_WORKER_DOORBELL", "0")
+    init_db()
+    process_ingest_many = worker.process_ingest_many
+
+    def reclaimed(db: sqlite3.Connection, items: list[Any], **kwargs: Any) -> BatchOutcome:
+        outcome = process_ingest_many(db, items, **kwargs)
+        # The lease lapsed meanwhile and another worker claimed the alert again.
+        db.execute("UPDATE alerts SET lease_owner = 'other'")
+        db.commit()
+        return outcome
+
+    monkeypatch.setattr(worker, "process_ingest_many", reclaimed)
+    db = get_db()
+
+    async def run_one_batch() -> None:
+        done = asyncio.Event()
+        task = asyncio.create_task(
+            worker.worker_loop(
+                poll_interval_s=0.01, max_poll_interval_s=0.01, on_processed=lambda _: done.set()
+            )
+        )
+        try:
+            await asyncio.wait_for(done.wait(), timeout=10)
+        finally:
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    try:
+        AlertsRepository(db).insert_or_get_ingest(
+            idempotency_key="k", received_at=datetime.now(tz=UTC), raw_payload=_ALERT
+        )
+        asyncio.run(run_one_batch())
+        row = db.execute("SELECT lease_owner, processed_at FROM alerts").fetchone()
+        assert tuple(row) == ("other", None)
+    finally:
+        db.close()
+
+
+def test_failures_after_a_lost_lease_are_left_to_the_new_owner(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = get_db()
+    try:
+        repo = AlertsRepository(db)
+        ingest_id, _ = repo.insert_or_get_ingest(
+            idempotency_key="k", received_at=datetime.now(tz=UTC), raw_payload={"vendor": 1}
+        )
+        # "a" claimed the alert, its lease lapsed and "b" holds it now.
+        repo.claim_batch(1, owner="b")
+        outcome = process_ingest_many(db, [(ingest_id, {"vendor": 1})], owner="a")
+        assert outcome.failed == []
+        assert [f.ingest_id for f in outcome.lost] == [ingest_id]
+        row = db.execute("SELECT status, lease_owner FROM alerts").fetchone()
+        assert tuple(row) == ("processing", "b")
+        assert db.execute("SELECT COUNT(*) FROM deadletter").fetchone()[0] == 0
+        assert db.execute("SELECT COUNT(*) FROM events WHERE stage = 'failed'").fetchone()[0] == 0
+
+        outcome = process_ingest_many(db, [(ingest_id, {"vendor": 1})], owner="b")
+        assert [f.ingest_id for f in outcome.failed] == [ingest_id]
+        row = db.execute("SELECT status, lease_owner FROM alerts").fetchone()
+        assert tuple(row) == ("failed", None)
+        assert db.execute("SELECT COUNT(*) FROM deadletter").fetchone()[0] == 1
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("atomic", [True, False])
+def test_alerts_held_by_another_owner_are_not_processed(
+    tmp_path: Path, monkeypatch: MonkeyPatch, atomic: bool
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = get_db()
+    try:
+        repo = AlertsRepository(db)
+        ingest_id, _ = repo.insert_or_get_ingest(
+            idempotency_key="k", received_at=datetime.now(tz=UTC), raw_payload=_ALERT
+        )
+        # "a" claimed the alert, its lease lapsed and "b" holds it now.
+        repo.claim_batch(1, owner="b")
+        outcome = process_ingest_many(db, [(ingest_id, _ALERT)], atomic=atomic, owner="a")
+        assert outcome.processed == [] and outcome.failed == []
+        assert [f.ingest_id for f in outcome.lost] == [ingest_id]
+        row = db.execute("SELECT status, lease_owner FROM alerts").fetchone()
+        assert tuple(row) == ("processing", "b")
+        assert db.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 0
+        assert db.execute("SELECT COUNT(*) FROM cases").fetchone()[0] == 0
+
+        outcome = process_ingest_many(db, [(ingest_id, _ALERT)], atomic=atomic, owner="b")
+        assert [st.ingest_id for st in outcome.processed] == [ingest_id]
+        assert db.execute("SELECT COUNT(*) FROM cases").fetchone()[0] == 1
+    finally:
+        db.close()
+
+
+def test_worker_renews_leases_between_transactions_of_a_slow_batch(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    # A batch of four one-alert transactions takes longer than the lease. The heartbeat is off,
+    # as it would be while this process's transaction holds the write lock: the worker renews
+    # the leases itself between transactions, so none ever lapses.
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("AUTOTRIAGE_WORKER_DOORBELL", "0")
+    monkeypatch.setenv("AUTOTRIAGE_WORKER_LEASE_SECONDS", "1")
+    monkeypatch.setenv("AUTOTRIAGE_WORKER_TRANSACTION_SIZE", "1")
+    monkeypatch.setattr(worker.LeaseHeartbeat, "run", lambda self: None)
+    stage_enrich = orchestrator.stage_enrich
+
+    def slow(db: Any, cfg: Any, events: Any, st: Any) -> Any:
+        time.sleep(0.4)
+        return stage_enrich(db, cfg, events, st)
+
+    monkeypatch.setattr(orchestrator, "stage_enrich", slow)
+    init_db()
+    db = get_db()
+    lapsed: list[int] = []
+    stop = threading.Event()
+
+    def watch() -> None:
+        # On a connection of its own, sampling while the worker's batch holds the write lock.
+        conn = get_db()
+        try:
+            while not stop.wait(0.05):
+                now = datetime.now(tz=UTC).isoformat()
+                expired = conn.execute(
+                    "SELECT COUNT(*) FROM alerts WHERE status = 'processing' AND lease_until < ?",
+                    (now,),
+                ).fetchone()[0]
+                lapsed.append(int(expired))
+        finally:
+            conn.close()
+
+    async def run_one_batch() -> int:
+        done = asyncio.Event()
+        processed: list[int] = []
+
+        def on_processed(n: int) -> None:
+            processed.append(n)
+            done.set()
+
+        task = asyncio.create_task(
+            worker.worker_loop(
+                poll_interval_s=0.01, max_poll_interval_s=0.01, on_processed=on_processed
+            )
+        )
+        try:
+            await asyncio.wait_for(done.wait(), timeout=30)
+            return processed[0]
+        finally:
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    watcher = threading.Thread(target=watch)
+    try:
+        repo = AlertsRepository(db)
+        for i in range(16):
+            repo.insert_or_get_ingest(
+                idempotency_key=f"k{i}",
+                received_at=datetime.now(tz=UTC),
+                raw_payload={**_ALERT, "user": f"user-{i}"},
+            )
+        watcher.start()
+        t0 = time.perf_counter()
+        assert asyncio.run(run_one_batch()) == 4
+        assert time.perf_counter() - t0 > 1.5
+        stop.set()
+        watcher.join()
+        assert lapsed and max(lapsed) == 0
+        rows = db.execute("SELECT attempts FROM alerts WHERE status = 'processed'").fetchall()
+        assert {int(r[0]) for r in rows} == {1}
+    finally:
+        stop.set()
+        db.close()
+
+
+def test_worker_keeps_its_event_loop_free_during_a_batch(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("AUTOTRIAGE_WORKER_DOORBELL", "0")
+    stage_enrich = orchestrator.stage_enrich
+
+    def slow(db: Any, cfg: Any, events: Any, st: Any) -> Any:
+        time.sleep(0.6)
+        return stage_enrich(db, cfg, events, st)
+
+    monkeypatch.setattr(orchestrator, "stage_enrich", slow)
+    init_db()
+    db = get_db()
+
+    async def ticks_during_batch() -> list[float]:
+        done = asyncio.Event()
+        gaps: list[float] = []
+        task = asyncio.create_task(
+            worker.worker_loop(
+                poll_interval_s=0.01, max_poll_interval_s=0.01, on_processed=lambda n: done.set()
+            )
+        )
+        try:
+            last = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+            return gaps
+        finally:
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    try:
+        AlertsRepository(db).insert_or_get_ingest(
+            idempotency_key="k", received_at=datetime.now(tz=UTC), raw_payload=_ALERT
+        )
+        gaps = asyncio.run(ticks_during_batch())
+        assert sum(gaps) > 0.6
+        assert max(gaps) < 0.3
+    finally:
+        db.close()
@@ -110,3 +110,91 @@ def test_config_contract() -> None:
             "enabled_enrichers",
         ]:
             assert k in body
+
+
+def test_hot_entities_contract(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("AUTOTRIAGE_HOT_ENTITY_THRESHOLD", "2")
+    init_db()
+    db = get_db()
+    try:
+        db.executemany(
+            "INSERT INTO entity_frequency (bucket, entity_type, entity_value, alert_count)"
+            " VALUES (strftime('%s', 'now') / 3600 * 3600, ?, ?, ?)",
+            [("src_ip", "10.0.0.10", 5), ("user", "alice", 1)],
+        )
+        db.commit()
+    finally:
+        db.close()
+    with TestClient(create_app()) as client:
+        r = client.get("/api/entities/hot")
+        assert r.status_code == 200
+        body = r.json()
+        assert body["threshold"] == 2
+        assert body["items"] == [
+            {"entity_type": "src_ip", "entity_value": "10.0.0.10", "alerts": 5}
+        ]
+
+
+def test_cases_pagination_contract(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = get_db()
+    try:
+        # Pairs of cases share a created_at, so pages must break ties on case_id.
+        db.executemany(
+            """
+            INSERT INTO cases (case_id, created_at, updated_at, severity, confidence, decision, queue, summary, score_json, routing_json)
+            VALUES (?, ?, ?, ?, 0.5, ?, 'triage', 'case', '{}', '{}')
+            """,
+            [
+                (
+                    f"case-{i:02d}",
+                    f"2025-01-01T00:00:{i // 2:02d}+00:00",
+                    f"2025-01-01T00:00:{i // 2:02d}+00:00",
+                    i * 4,
+                    "ESCALATE" if i % 3 else "AUTO_CLOSE",
+                )
+                for i in range(25)
+            ],
+        )
+        db.execute(
+            "UPDATE cases SET updated_at = '2025-01-02T00:00:00+00:00'"
+            " WHERE case_id IN ('case-03', 'case-11', 'case-17')"
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    def pages(params: dict[str, str]) -> list[list[str]]:
+        out: list[list[str]] = []
+        cursor = None
+        while True:
+            query = dict(params, limit="4") | ({"cursor": cursor} if cursor else {})
+            body = client.get("/api/cases", params=query).json()
+            out.append([c["case_id"] for c in body["items"]])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return out
+
+    with TestClient(create_app()) as client:
+        newest_first = pages({})
+        assert [len(p) for p in newest_first] == [4, 4, 4, 4, 4, 4, 1]
+        assert sum(newest_first, []) == [f"case-{i:02d}" for i in reversed(range(25))]
+
+        filtered = sum(pages({"decision": "ESCALATE", "severity_min": "40"}), [])
+        assert filtered == [f"case-{i:02d}" for i in reversed(range(10, 25)) if i % 3]
+
+        changed = pages({"updated_since": "2025-01-01T12:00:00Z"})
+        assert changed == [["case-03", "case-11", "case-17"]]
+        body = client.get("/api/cases", params={"updated_since": "2025-01-02T00:00:00+00:00"})
+        assert [c["case_id"] for c in body.json()["items"]] == ["case-03", "case-11", "case-17"]
+
+        r = client.get("/api/cases", params={"cursor": "not-a-cursor"})
+        assert r.status_code == 400
+        created_cursor = client.get("/api/cases", params={"limit": "1"}).json()["next_cursor"]
+        r = client.get(
+            "/api/cases", params={"cursor": created_cursor, "updated_since": "2025-01-01"}
+        )
+        assert r.status_code == 400
+        assert client.get("/api/cases", params={"updated_since": "yesterday"}).status_code == 400
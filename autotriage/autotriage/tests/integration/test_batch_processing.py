@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import json
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from _pytest.monkeypatch import MonkeyPatch
+from prometheus_client import REGISTRY
+
+from autotriage.core.pipeline import orchestrator, stages
+from autotriage.core.pipeline.orchestrator import process_ingest_many
+from autotriage.storage.db import get_db, init_db
+from autotriage.storage.repositories.alerts_repo import AlertsRepository
+from autotriage.storage.repositories.events_repo import EventsRepository
+from autotriage.worker import adaptive_batch_size
+
+
+def _payload(i: int, user: str) -> dict[str, Any]:
+    return {
+        "vendor": "vendor_a",
+        "time": f"2025-01-01T00:0{i}:00Z",
+        "rule": "R-LOGIN-001",
+        "title": "Suspicious login",
+        "severity": 7,
+        "src_ip": "1.2.3.4",
+        "user": user,
+        "host": "workstation-1",
+    }
+
+
+def test_adaptive_batch_size_tracks_queue_depth() -> None:
+    assert adaptive_batch_size(0, 64) == 0
+    assert adaptive_batch_size(1, 64) == 1
+    assert adaptive_batch_size(10, 64) == 4
+    assert adaptive_batch_size(100_000, 64) == 64
+
+
+def test_claim_batch_and_process_ingest_many(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = get_db()
+    try:
+        repo = AlertsRepository(db)
+        payloads: list[dict[str, Any]] = [
+            _payload(0, "alice"),
+            _payload(0, "alice"),
+            _payload(1, "bob"),
+            {"x": 1},
+        ]
+        ids = [
+            repo.insert_or_get_ingest(
+                idempotency_key=f"k{i}",
+                received_at=datetime(2025, 1, 1, 0, 0, i, tzinfo=UTC),
+                raw_payload=p,
+            )[0]
+            for i, p in enumerate(payloads)
+        ]
+
+        assert repo.count_pending(limit=100) == 4
+        rows = repo.claim_batch(3)
+        assert [str(r["ingest_id"]) for r in rows] == ids[:3]
+        assert repo.count_pending(limit=100) == 1
+        rows += repo.claim_batch(16)
+        assert repo.claim_batch(16) == []
+        statuses = {str(r[0]) for r in db.execute("SELECT DISTINCT status FROM alerts")}
+        assert statuses == {"processing"}
+
+        items = [(str(r["ingest_id"]), json.loads(str(r["raw_json"]))) for r in rows]
+        outcome = process_ingest_many(db, items, owner="worker")
+
+        assert [st.ingest_id for st in outcome.processed] == ids[:3]
+        assert outcome.processed[1].duplicate_of == ids[0]
+        assert [f.ingest_id for f in outcome.failed] == [ids[3]]
+        assert outcome.failed[0].stage == "normalize"
+        assert int(db.execute("SELECT COUNT(*) FROM deadletter").fetchone()[0]) == 1
+        assert int(db.execute("SELECT COUNT(*) FROM cases").fetchone()[0]) == 1
+    finally:
+        db.close()
+
+
+def test_batch_stage_fallback_fails_only_the_culprit(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    # The batch correlate stage records new cases in the entity index, then fails on the last
+    # alert. Its savepoint is rolled back, so the per-alert re-run must not find those cases.
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("AUTOTRIAGE_CORRELATION_INDEX", "1")
+    init_db()
+    mark_correlated = stages._mark_correlated
+
+    def failing(events: EventsRepository, st: stages.PipelineState) -> None:
+        if st.ingest_id == "bad":
+            raise RuntimeError("boom")
+        mark_correlated(events, st)
+
+    monkeypatch.setattr(stages, "_mark_correlated", failing)
+    db = get_db()
+    try:
+        items = [
+            (f"ok-{i}", {**_payload(i, f"user-{i}"), "src_ip": f"10.0.0.{i}", "host": f"h-{i}"})
+            for i in range(3)
+        ]
+        items.append(("bad", {**_payload(3, "user-3"), "src_ip": "10.0.0.3", "host": "h-3"}))
+        repo = AlertsRepository(db)
+        for ingest_id, payload in items:
+            db.execute(
+                "INSERT INTO alerts (ingest_id, idempotency_key, received_at, raw_json, status)"
+                " VALUES (?, ?, ?, ?, 'processing')",
+                (ingest_id, ingest_id, datetime.now(tz=UTC).isoformat(), json.dumps(payload)),
+            )
+        db.commit()
+        outcome = process_ingest_many(db, items)
+
+        assert [st.ingest_id for st in outcome.processed] == ["ok-0", "ok-1", "ok-2"]
+        assert [(f.ingest_id, f.stage) for f in outcome.failed] == [("bad", "correlate")]
+        assert int(db.execute("SELECT COUNT(*) FROM cases").fetchone()[0]) == 3
+        assert repo.count_pending(limit=10) == 0
+    finally:
+        db.close()
+
+
+def test_atomic_batch_reruns_once_for_several_failing_alerts(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    stage_enrich = orchestrator.stage_enrich
+    enriched: list[str] = []
+
+    def failing(
+        db: Any, cfg: Any, events: EventsRepository, st: stages.PipelineState
+    ) -> stages.PipelineState:
+        enriched.append(st.ingest_id)
+        if st.ingest_id.startswith("bad"):
+            raise RuntimeError("boom")
+        return stage_enrich(db, cfg, events, st)
+
+    monkeypatch.setattr(orchestrator, "stage_enrich", failing)
+
+    def kept(stage: str) -> float:
+        return REGISTRY.get_sample_value("autotriage_pipeline_stage_total", {"stage": stage}) or 0
+
+    db = get_db()
+    try:
+        items = [(f"{'bad' if i >= 6 else 'ok'}-{i}", _payload(i, f"user-{i}")) for i in range(9)]
+        for ingest_id, payload in items:
+            db.execute(
+                "INSERT INTO alerts (ingest_id, idempotency_key, received_at, raw_json, status)"
+                " VALUES (?, ?, ?, ?, 'processing')",
+                (ingest_id, ingest_id, datetime.now(tz=UTC).isoformat(), json.dumps(payload)),
+            )
+        db.commit()
+        before = {stage: kept(stage) for stage in ("normalized", "enriched", "processed")}
+        outcome = process_ingest_many(db, items)
+
+        assert sorted(f.ingest_id for f in outcome.failed) == ["bad-6", "bad-7", "bad-8"]
+        assert len(outcome.processed) == 6
+        # One run that finds all three, then one without them.
+        assert len(enriched) == 9 + 6
+        # The rolled-back run is not counted.
+        assert {stage: kept(stage) - n for stage, n in before.items()} == {
+            "normalized": 6,
+            "enriched": 6,
+            "processed": 6,
+        }
+    finally:
+        db.close()
+
+
+def test_atomic_batch_commits_in_sub_batches(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("AUTOTRIAGE_WORKER_TRANSACTION_SIZE", "2")
+    init_db()
+    stage_enrich = orchestrator.stage_enrich
+    enriched: list[str] = []
+
+    def failing(
+        db: Any, cfg: Any, events: EventsRepository, st: stages.PipelineState
+    ) -> stages.PipelineState:
+        enriched.append(st.ingest_id)
+        if st.ingest_id.startswith("bad"):
+            raise RuntimeError("boom")
+        return stage_enrich(db, cfg, events, st)
+
+    monkeypatch.setattr(orchestrator, "stage_enrich", failing)
+    db = get_db()
+    try:
+        items = [(f"{'bad' if i == 2 else 'ok'}-{i}", _payload(i, f"user-{i}")) for i in range(5)]
+        for ingest_id, payload in items:
+            db.execute(
+                "INSERT INTO alerts (ingest_id, idempotency_key, received_at, raw_json, status)"
+                " VALUES (?, ?, ?, ?, 'processing')",
+                (ingest_id, ingest_id, datetime.now(tz=UTC).isoformat(), json.dumps(payload)),
+            )
+        db.commit()
+        begins: list[str] = []
+        db.set_trace_callback(lambda sql: begins.append(sql) if sql == "BEGIN IMMEDIATE" else None)
+        outcome = process_ingest_many(db, items)
+        db.set_trace_callback(None)
+
+        assert [st.ingest_id for st in outcome.processed] == ["ok-0", "ok-1", "ok-3", "ok-4"]
+        assert [f.ingest_id for f in outcome.failed] == ["bad-2"]
+        # One transaction per sub-batch of two, and only the failing one's is run again.
+        assert len(begins) == 3 + 1
+        assert enriched == ["ok-0", "ok-1", "bad-2", "ok-3", "ok-3", "ok-4"]
+    finally:
+        db.close()
+
+
+def test_duplicates_are_not_enriched_ahead(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    normalize = stages.normalize
+    enrich = stages.EnricherManager.enrich
+    normalized: list[str] = []
+    looked_up: list[str] = []
+
+    def counting_normalize(raw: dict[str, Any]) -> Any:
+        normalized.append(str(raw["user"]))
+        return normalize(raw)
+
+    def counting_enrich(self: Any, alert: Any) -> dict[str, Any]:
+        looked_up.append(next(e.value for e in alert.entities if e.type == "user"))
+        return enrich(self, alert)
+
+    monkeypatch.setattr(stages, "normalize", counting_normalize)
+    monkeypatch.setattr(stages.EnricherManager, "enrich", counting_enrich)
+    db = get_db()
+    try:
+        batches = [
+            [("a-0", _payload(0, "alice"))],
+            # A duplicate of the alert already processed, and one of an alert in the same batch.
+            [
+                ("a-1", _payload(0, "alice")),
+                ("b-0", _payload(1, "bob")),
+                ("b-1", _payload(1, "bob")),
+            ],
+        ]
+        for items in batches:
+            for ingest_id, payload in items:
+                db.execute(
+                    "INSERT INTO alerts (ingest_id, idempotency_key, received_at, raw_json, status)"
+                    " VALUES (?, ?, ?, ?, 'processing')",
+                    (ingest_id, ingest_id, datetime.now(tz=UTC).isoformat(), json.dumps(payload)),
+                )
+            db.commit()
+            outcome = process_ingest_many(db, items)
+            assert len(outcome.processed) == len(items)
+
+        assert normalized == ["alice", "alice", "bob", "bob"]
+        assert looked_up == ["alice", "bob"]
+        deduped = db.execute("SELECT ingest_id FROM events WHERE stage = 'deduped'").fetchall()
+        assert sorted(r[0] for r in deduped) == ["a-1", "b-1"]
+    finally:
+        db.close()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from _pytest.monkeypatch import MonkeyPatch
+from fastapi.testclient import TestClient
+
+from autotriage.app.main import create_app
+from autotriage.core.pipeline.orchestrator import process_ingest, process_ingest_many
+from autotriage.playbooks.catalog import recommended_actions_for_case
+from autotriage.storage.db import get_db, init_db
+from autotriage.storage.repositories.alerts_repo import AlertsRepository
+from autotriage.storage.repositories.case_snapshots_repo import CaseSnapshotsRepository
+
+
+def _alert(i: int) -> dict[str, Any]:
+    # Every alert names alice, so they all land in one case.
+    return {
+        "vendor": "vendor_a",
+        "time": f"2025-01-01T00:{i:02d}:00Z",
+        "rule": f"R-LOGIN-{i:03d}",
+        "title": f"Suspicious login {i}",
+        "severity": 7,
+        "src_ip": f"10.0.0.{i}",
+        "user": "alice",
+        "host": f"workstation-{i}",
+    }
+
+
+def _ingest(db: sqlite3.Connection, first: int, count: int) -> list[tuple[str, dict[str, Any]]]:
+    repo = AlertsRepository(db)
+    items = []
+    for i in range(first, first + count):
+        payload = _alert(i)
+        ingest_id, _ = repo.insert_or_get_ingest(
+            idempotency_key=f"snap-{i}", received_at=datetime.now(tz=UTC), raw_payload=payload
+        )
+        items.append((ingest_id, payload))
+    return items
+
+
+def _detail_from_rows(db: sqlite3.Connection, case_id: str) -> dict[str, Any]:
+    # What the case view was built from before snapshots: every row, every event decoded.
+    case = dict(db.execute("SELECT * FROM cases WHERE case_id = ?", (case_id,)).fetchone())
+    timeline = []
+    enrichments: dict[str, Any] = {}
+    for r in db.execute(
+        "SELECT * FROM events WHERE case_id = ? ORDER BY created_at, event_id", (case_id,)
+    ):
+        ev = dict(r)
+        ev["payload"] = json.loads(ev["payload_json"])
+        timeline.append(ev)
+        if ev["stage"] == "enriched":
+            enrichments = ev["payload"].get("enrichments") or enrichments
+    graph = {
+        "nodes": [
+            dict(r)
+            for r in db.execute(
+                "SELECT * FROM case_entities WHERE case_id = ? ORDER BY rowid", (case_id,)
+            )
+        ],
+        "edges": [
+            dict(r)
+            for r in db.execute(
+                "SELECT * FROM case_edges WHERE case_id = ? ORDER BY rowid", (case_id,)
+            )
+        ],
+    }
+    ticket = db.execute("SELECT * FROM tickets WHERE case_id = ?", (case_id,)).fetchone()
+    return {
+        "case": case,
+        "timeline": timeline,
+        "graph": graph,
+        "ticket": dict(ticket) if ticket else None,
+        "enrichments": enrichments,
+        "scoring": json.loads(case["score_json"]),
+        "routing": json.loads(case["routing_json"]),
+        "recommended_actions": recommended_actions_for_case(case, graph),
+    }
+
+
+def _read(client: TestClient, case_id: str, limit: int) -> dict[str, Any]:
+    # The case view with its timeline paged through to the end.
+    body: dict[str, Any] = client.get(f"/api/cases/{case_id}", params={"limit": limit}).json()
+    cursor = body.pop("timeline_next_cursor")
+    while cursor:
+        page = client.get(f"/api/cases/{case_id}", params={"limit": limit, "cursor": cursor})
+        body["timeline"].extend(page.json()["timeline"])
+        cursor = page.json()["timeline_next_cursor"]
+    body["graph"]["nodes"].sort(key=lambda n: (n["entity_type"], n["entity_value"]))
+    return body
+
+
+def test_case_view_reads_the_snapshot(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    client = TestClient(create_app())
+    db = get_db()
+    try:
+        # One alert at a time, then a batch, both finalizing into the same case.
+        for ingest_id, payload in _ingest(db, 0, 2):
+            process_ingest(db, ingest_id, payload)
+        outcome = process_ingest_many(db, _ingest(db, 2, 4))
+        assert not outcome.failed
+        case_ids = {st.case_id for st in outcome.processed}
+        assert len(case_ids) == 1
+        case_id = str(case_ids.pop())
+
+        expected = _detail_from_rows(db, case_id)
+        expected["graph"]["nodes"].sort(key=lambda n: (n["entity_type"], n["entity_value"]))
+        snapshot = db.execute(
+            "SELECT case_updated_at FROM case_snapshots WHERE case_id = ?", (case_id,)
+        ).fetchone()
+        assert snapshot["case_updated_at"] == expected["case"]["updated_at"]
+        # Nothing is left for the backfill once the pipeline has stored the snapshot.
+        assert db.execute("SELECT COUNT(*) FROM case_snapshots_stale").fetchone()[0] == 0
+        assert len(expected["timeline"]) > 10
+        assert expected["enrichments"]
+        assert _read(client, case_id, limit=3) == expected
+        # Snapshots stored before their graph rowids were have their graph read whole again.
+        db.execute("UPDATE case_snapshots SET entities_rowid = NULL, edges_rowid = NULL")
+        db.commit()
+        CaseSnapshotsRepository(db).refresh(case_id)
+        assert _read(client, case_id, limit=1000) == expected
+
+        # Cases from before snapshots, or changed outside the pipeline, are rebuilt on read
+        # without writing, then stored by the backfill.
+        db.execute("DELETE FROM case_snapshots")
+        db.commit()
+        version = db.execute("PRAGMA data_version").fetchone()[0]
+        assert _read(client, case_id, limit=1000) == expected
+        assert db.execute("SELECT COUNT(*) FROM case_snapshots").fetchone()[0] == 0
+        assert db.execute("PRAGMA data_version").fetchone()[0] == version
+        snapshots = CaseSnapshotsRepository(db)
+        assert snapshots.backfill(10) == 1
+        assert snapshots.backfill(10) == 0
+        assert db.execute("SELECT COUNT(*) FROM case_snapshots").fetchone()[0] == 1
+        db.execute(
+            "UPDATE cases SET summary = 'edited', updated_at = ? WHERE case_id = ?",
+            (datetime.now(tz=UTC).isoformat(), case_id),
+        )
+        db.commit()
+        assert client.get(f"/api/cases/{case_id}").json()["case"]["summary"] == "edited"
+        assert snapshots.backfill(10) == 1
+        assert _read(client, case_id, limit=1000)["case"]["summary"] == "edited"
+    finally:
+        db.close()
+
+    assert client.get(f"/api/cases/{case_id}", params={"cursor": "nope"}).status_code == 400
+    missing = client.get("/api/cases/no-such-case").json()
+    assert missing["case"] == {} and missing["timeline"] == []
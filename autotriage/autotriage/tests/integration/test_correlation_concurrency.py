@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import random
+from datetime import UTC, datetime
+from multiprocessing.synchronize import Event
+from pathlib import Path
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.config import load_effective_config
+from autotriage.core.correlate.batch import CorrelationInput, correlate_many
+from autotriage.core.correlate.correlator import correlate_into_case
+from autotriage.core.correlate.index import get_entity_case_index
+from autotriage.core.models.alert import CanonicalAlert
+from autotriage.core.models.entities import Entity, EntityType
+from autotriage.storage.db import get_db, init_db, unit_of_work
+
+USERS = 4
+WINDOW = 3600
+
+
+def _alert(user: str) -> CanonicalAlert:
+    return CanonicalAlert(
+        vendor="vendor_a",
+        alert_type="generic",
+        ts=datetime.now(tz=UTC),
+        title=f"login by {user}",
+        severity=10,
+        entities=[Entity(type=EntityType.user, value=user)],
+        raw={},
+    )
+
+
+def _correlate(worker: int, start: Event) -> None:
+    # Even workers correlate alert by alert with their own commits; odd ones in atomic
+    # batches. Every alert names one of a few users, so each user must end up in one case.
+    rng = random.Random(worker)
+    db = get_db()
+    index = get_entity_case_index(load_effective_config().db_path, WINDOW)
+    start.wait()
+    try:
+        for _ in range(15):
+            users = [f"user-{rng.randrange(USERS)}" for _ in range(rng.randrange(1, 5))]
+            if worker % 2 == 0:
+                for user in users:
+                    correlate_into_case(
+                        db,
+                        _alert(user),
+                        correlation_window_seconds=WINDOW,
+                        base_severity=10,
+                        decision="CREATE_TICKET",
+                        queue="triage",
+                        score={},
+                        routing={},
+                        index=index if worker % 4 == 0 else None,
+                    )
+            else:
+                inputs = [
+                    CorrelationInput(
+                        alert=_alert(user),
+                        base_severity=10,
+                        decision="CREATE_TICKET",
+                        queue="triage",
+                        score={},
+                        routing={},
+                    )
+                    for user in users
+                ]
+                with unit_of_work(db):
+                    correlate_many(
+                        db,
+                        inputs,
+                        correlation_window_seconds=WINDOW,
+                        index=index if worker % 4 == 1 else None,
+                    )
+    finally:
+        db.close()
+
+
+def test_parallel_workers_never_split_a_case(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    ctx = mp.get_context("fork")
+    start = ctx.Event()
+    procs = [ctx.Process(target=_correlate, args=(worker, start)) for worker in range(8)]
+    for proc in procs:
+        proc.start()
+    start.set()
+    for proc in procs:
+        proc.join(timeout=60)
+    assert [proc.exitcode for proc in procs] == [0] * len(procs)
+
+    db = get_db()
+    try:
+        rows = db.execute(
+            """
+            SELECT ce.entity_value, COUNT(*) AS cases
+            FROM case_entities ce
+            GROUP BY ce.entity_value
+            ORDER BY ce.entity_value
+            """
+        ).fetchall()
+        total = db.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+    finally:
+        db.close()
+    assert [(r["entity_value"], r["cases"]) for r in rows] == [
+        (f"user-{i}", 1) for i in range(USERS)
+    ]
+    assert total == USERS
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from _pytest.monkeypatch import MonkeyPatch
+from fastapi.testclient import TestClient
+
+from autotriage.app.main import create_app
+from autotriage.core.pipeline.orchestrator import process_ingest
+from autotriage.storage.db import get_db, init_db
+from autotriage.storage.repositories.events_repo import EventsRepository
+
+FIXTURES = Path(__file__).resolve().parents[1] / "fixtures"
+
+
+def _counted(db: sqlite3.Connection, since: str) -> dict[str, int]:
+    # The queries /api/overview ran before the rollups.
+    def c(sql: str) -> int:
+        return int(db.execute(sql, (since,)).fetchone()[0])
+
+    return {
+        "ingested": c("SELECT COUNT(*) FROM alerts WHERE received_at >= ?"),
+        "deduped": c("SELECT COUNT(*) FROM events WHERE stage = 'deduped' AND created_at >= ?"),
+        "cases": c("SELECT COUNT(*) FROM cases WHERE created_at >= ?"),
+        "auto_closed": c(
+            "SELECT COUNT(*) FROM cases WHERE decision = 'AUTO_CLOSE' AND created_at >= ?"
+        ),
+        "tickets": c("SELECT COUNT(*) FROM tickets WHERE created_at >= ?"),
+        "errors": c("SELECT COUNT(*) FROM events WHERE stage = 'failed' AND created_at >= ?"),
+    }
+
+
+def test_overview_rollups_match_counts(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    client = TestClient(create_app())
+    lines = (FIXTURES / "alerts.jsonl").read_text(encoding="utf-8").splitlines()
+    ingest_ids = [
+        client.post("/webhook/alerts", json=json.loads(line)).json()["ingest_id"]
+        for line in lines
+        if line.strip()
+    ]
+    db = get_db()
+    try:
+        for ingest_id in ingest_ids:
+            row = db.execute(
+                "SELECT raw_json FROM alerts WHERE ingest_id = ?", (ingest_id,)
+            ).fetchone()
+            process_ingest(db, ingest_id, json.loads(str(row["raw_json"])))
+        EventsRepository(db).append(
+            stage="failed",
+            created_at=datetime.now(tz=UTC),
+            ingest_id=ingest_ids[0],
+            case_id=None,
+            payload={},
+        )
+        # An alert and a case from two days ago count in 7d but not in 24h.
+        old = (datetime.now(tz=UTC) - timedelta(days=2)).isoformat()
+        db.execute(
+            "INSERT INTO alerts (ingest_id, idempotency_key, received_at, updated_at, vendor, raw_json, status)"
+            " VALUES ('old', 'old', ?, ?, 'vendor_a', '{}', 'processed')",
+            (old, old),
+        )
+        db.execute(
+            """
+            INSERT INTO cases (case_id, created_at, updated_at, severity, confidence, decision, queue, summary, score_json, routing_json)
+            VALUES ('old', ?, ?, 10, 0.5, 'AUTO_CLOSE', 'triage', 'old', '{}', '{}')
+            """,
+            (old, old),
+        )
+        db.commit()
+
+        def check() -> None:
+            now = datetime.now(tz=UTC)
+            for window, delta in (("24h", timedelta(hours=24)), ("7d", timedelta(days=7))):
+                body = client.get("/api/overview", params={"window": window}).json()
+                assert body["stats"] == _counted(db, (now - delta).isoformat())
+
+        check()
+        stats = client.get("/api/overview").json()["stats"]
+        assert stats["cases"] >= 1 and stats["deduped"] >= 1 and stats["errors"] == 1
+
+        # Rescoring moves cases in and out of auto_closed; deleting a case drops it and its
+        # tickets.
+        case_ids = [
+            str(r[0]) for r in db.execute("SELECT case_id FROM cases WHERE case_id != 'old'")
+        ]
+        db.execute("UPDATE cases SET decision = 'AUTO_CLOSE' WHERE case_id = ?", (case_ids[0],))
+        db.execute("UPDATE cases SET decision = 'ESCALATE' WHERE case_id = 'old'")
+        db.execute(
+            "INSERT INTO tickets (ticket_id, case_id, created_at, url, payload_json)"
+            " VALUES ('t-1', 'old', ?, 'http://tickets/1', '{}')",
+            (datetime.now(tz=UTC).isoformat(),),
+        )
+        db.commit()
+        check()
+        assert db.execute("SELECT COUNT(*) FROM tickets").fetchone()[0] >= 2
+        db.execute("DELETE FROM cases WHERE case_id IN (?, 'old')", (case_ids[-1],))
+        db.commit()
+        check()
+    finally:
+        db.close()
+
+    for step in ("60", "3600"):
+        params = {"window": "7d", "series": "true", "step": step}
+        body = client.get("/api/overview", params=params).json()
+        points = body["series"]["points"]
+        assert body["series"]["step"] == int(step)
+        assert [p["t"] for p in points] == sorted(p["t"] for p in points)
+        assert len({datetime.fromisoformat(p["t"]).timestamp() % int(step) for p in points}) == 1
+        for metric, total in body["stats"].items():
+            assert sum(p[metric] for p in points) == total
+    assert client.get("/api/overview", params={"series": "true", "step": "90"}).status_code == 400
+    assert client.get("/api/overview", params={"window": "90d"}).status_code == 400
+    assert client.get("/api/overview", params={"window": "soon"}).status_code == 422
@@ -32,5 +32,7 @@ def test_pipeline_end_to_end(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
         process_ingest(db, ingest_id, json.loads(str(row["raw_json"])))
         cases = db.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
         assert cases >= 1
+        versions = {str(r[0]) for r in db.execute("SELECT ruleset_version FROM cases")}
+        assert versions == {client.get("/api/config").json()["ruleset_version"]}
     finally:
         db.close()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from _pytest.monkeypatch import MonkeyPatch
+from fastapi.testclient import TestClient
+
+from autotriage.app.main import create_app
+from autotriage.app.middleware import response_cache
+from autotriage.app.routes import overview as overview_route
+from autotriage.storage.db import get_db, init_db
+
+
+def _counting_overview(monkeypatch: MonkeyPatch, delay_s: float = 0.0) -> list[int]:
+    calls: list[int] = []
+    real = overview_route.overview_stats
+
+    def counted(db: Any, window_seconds: int) -> dict[str, int]:
+        calls.append(window_seconds)
+        time.sleep(delay_s)
+        return real(db, window_seconds)
+
+    monkeypatch.setattr(overview_route, "overview_stats", counted)
+    return calls
+
+
+def _commit_alert(ingest_id: str) -> None:
+    db = get_db()
+    try:
+        db.execute(
+            "INSERT INTO alerts (ingest_id, idempotency_key, received_at, updated_at, vendor, raw_json, status)"
+            " VALUES (?, ?, strftime('%Y-%m-%dT%H:%M:%S+00:00', 'now'), NULL, 'vendor_a', '{}', 'processed')",
+            (ingest_id, ingest_id),
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_cache_serves_until_data_changes(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("AUTOTRIAGE_RESPONSE_CACHE_TTL_SECONDS", "60")
+    init_db()
+    calls = _counting_overview(monkeypatch)
+    with TestClient(create_app()) as client:
+        first = client.get("/api/overview")
+        etag = first.headers["ETag"]
+        assert etag.startswith('"') and first.headers["Cache-Control"] == "no-cache"
+        second = client.get("/api/overview")
+        assert second.json() == first.json() and second.headers["ETag"] == etag
+        assert len(calls) == 1
+
+        # Query parameters are part of the key, in any order.
+        client.get("/api/overview", params={"window": "1h", "series": "true"})
+        client.get("/api/overview?series=true&window=1h")
+        assert len(calls) == 2
+
+        r = client.get("/api/overview", headers={"If-None-Match": etag})
+        assert r.status_code == 304 and r.content == b"" and r.headers["ETag"] == etag
+        assert (
+            client.get("/api/overview", headers={"If-None-Match": f'"x", W/{etag}'}).status_code
+            == 304
+        )
+
+        # A commit from any other connection invalidates, even with nothing else requested.
+        _commit_alert("a-1")
+        r = client.get("/api/overview", headers={"If-None-Match": etag})
+        assert r.status_code == 200 and r.json()["stats"]["ingested"] == 1
+        assert r.headers["ETag"] != etag
+        assert len(calls) == 3
+
+        # An ingest through the API commits on a pooled connection, which invalidates too.
+        client.post("/webhook/alerts", json={"vendor": "vendor_a", "title": "x"})
+        assert client.get("/api/overview").json()["stats"]["ingested"] == 2
+        assert len(calls) == 4
+
+        # Other routes and methods pass through.
+        assert "ETag" not in client.get("/api/config").headers
+
+
+def test_cache_expires_and_can_be_disabled(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("AUTOTRIAGE_RESPONSE_CACHE_TTL_SECONDS", "0.2")
+    init_db()
+    calls = _counting_overview(monkeypatch)
+    with TestClient(create_app()) as client:
+        client.get("/api/overview")
+        client.get("/api/overview")
+        time.sleep(0.3)
+        client.get("/api/overview")
+    assert len(calls) == 2
+
+    monkeypatch.setenv("AUTOTRIAGE_RESPONSE_CACHE_TTL_SECONDS", "0")
+    with TestClient(create_app()) as client:
+        client.get("/api/overview")
+        client.get("/api/overview")
+    assert len(calls) == 4
+
+
+def test_concurrent_misses_run_the_route_once(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("AUTOTRIAGE_RESPONSE_CACHE_TTL_SECONDS", "60")
+    init_db()
+    calls = _counting_overview(monkeypatch, delay_s=0.3)
+    bodies: list[Any] = []
+    with TestClient(create_app()) as client:
+
+        def view() -> None:
+            bodies.append(client.get("/api/overview").json())
+
+        viewers = [threading.Thread(target=view) for _ in range(8)]
+        for viewer in viewers:
+            viewer.start()
+        for viewer in viewers:
+            viewer.join()
+    assert len(bodies) == 8 and all(body == bodies[0] for body in bodies)
+    assert len(calls) == 1
+
+
+def test_data_version_is_read_off_the_event_loop(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    on_loop: list[bool] = []
+    real = response_cache.data_version
+
+    def recorded() -> tuple[int, int]:
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return real()
+
+    monkeypatch.setattr(response_cache, "data_version", recorded)
+    with TestClient(create_app()) as client:
+        assert client.get("/api/overview").status_code == 200
+    assert on_loop == [False]
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import time
+from datetime import UTC, datetime
+from multiprocessing.synchronize import Barrier
+from pathlib import Path
+from typing import Any
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.core.models.alert import CanonicalAlert
+from autotriage.enrichers import registry
+from autotriage.enrichers.base import BaseEnricher
+from autotriage.storage.db import get_db, init_db
+from autotriage.storage.repositories.alerts_repo import AlertsRepository
+
+
+class _SlowRemote(BaseEnricher):
+    # Appends every upstream call to a file shared by the worker processes.
+    name = "remote"
+    timeout_seconds = 3.0
+
+    def __init__(self, calls_path: Path) -> None:
+        self._calls_path = calls_path
+
+    def keys(self, alert: CanonicalAlert) -> list[str]:
+        return [e.value for e in alert.entities if e.type.value == "src_ip"]
+
+    def enrich_one(self, key: str) -> dict[str, Any] | None:
+        with self._calls_path.open("a") as f:
+            f.write(f"{os.getpid()} {key}\n")
+        time.sleep(0.5)
+        return {"key": key}
+
+
+def _payload(i: int) -> dict[str, Any]:
+    return {
+        "vendor": "vendor_a",
+        "time": f"2025-01-01T00:0{i}:00Z",
+        "rule": f"R-LOGIN-00{i}",
+        "title": "Suspicious login",
+        "severity": 7,
+        "src_ip": "203.0.113.7",
+        "user": f"user-{i}",
+        "host": f"workstation-{i}",
+    }
+
+
+def _work(ingest_id: str, payload: dict[str, Any], calls_path: Path, start: Barrier) -> None:
+    from autotriage.core.pipeline.orchestrator import process_ingest_many
+
+    registry.ENRICHERS["remote"] = lambda _: _SlowRemote(calls_path)
+    db = get_db()
+    try:
+        start.wait()
+        outcome = process_ingest_many(db, [(ingest_id, payload)])
+        assert not outcome.failed
+    finally:
+        db.close()
+
+
+def test_worker_processes_share_one_lookup_per_key(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("AUTOTRIAGE_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("AUTOTRIAGE_ENABLED_ENRICHERS", "remote")
+    init_db()
+    calls_path = tmp_path / "calls.txt"
+    calls_path.touch()
+    db = get_db()
+    try:
+        repo = AlertsRepository(db)
+        items = [
+            (
+                repo.insert_or_get_ingest(
+                    idempotency_key=f"k{i}", received_at=datetime.now(tz=UTC), raw_payload=p
+                )[0],
+                p,
+            )
+            for i, p in enumerate([_payload(0), _payload(1)])
+        ]
+
+        ctx = mp.get_context("spawn")
+        start = ctx.Barrier(len(items) + 1)
+        procs = [
+            ctx.Process(target=_work, args=(ingest_id, payload, calls_path, start))
+            for ingest_id, payload in items
+        ]
+        for proc in procs:
+            proc.start()
+        start.wait()
+        while not calls_path.read_text():
+            time.sleep(0.01)
+        # The lookup is under way without the write lock held: a webhook insert goes through
+        # at once.
+        db.execute("PRAGMA busy_timeout = 100")
+        repo.insert_or_get_ingest(
+            idempotency_key="during", received_at=datetime.now(tz=UTC), raw_payload=_payload(2)
+        )
+        for proc in procs:
+            proc.join(timeout=60)
+        assert [proc.exitcode for proc in procs] == [0] * len(procs)
+
+        # One worker looked the address up; the other waited on its flight row.
+        assert [line.split()[1] for line in calls_path.read_text().splitlines()] == ["203.0.113.7"]
+        flights = db.execute("SELECT COUNT(*) FROM cache WHERE enricher = 'remote#flight'")
+        assert flights.fetchone()[0] == 1
+        enriched = [
+            r["payload_json"]
+            for r in db.execute("SELECT payload_json FROM events WHERE stage = 'enriched'")
+        ]
+        assert len(enriched) == 2
+        assert all('"data":{"key":"203.0.113.7"}' in payload for payload in enriched)
+    finally:
+        db.close()
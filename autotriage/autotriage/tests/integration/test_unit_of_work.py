@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+from contextlib import suppress
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.core.pipeline.orchestrator import process_ingest
+from autotriage.storage.db import (
+    get_db,
+    init_db,
+    on_rollback,
+    on_unit_of_work_end,
+    unit_of_work,
+)
+from autotriage.storage.repositories.events_repo import EventsRepository
+
+
+def test_unit_of_work_defers_repository_commits(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = get_db()
+    other = get_db()
+    try:
+        events = EventsRepository(db)
+        with unit_of_work(db):
+            events.append("x", datetime.now(tz=UTC), None, None, {})
+            with pytest.raises(RuntimeError), unit_of_work(db):
+                events.append("y", datetime.now(tz=UTC), None, None, {})
+                raise RuntimeError("inner")
+            assert int(other.execute("SELECT COUNT(*) FROM events").fetchone()[0]) == 0
+        stages = [str(r[0]) for r in other.execute("SELECT stage FROM events").fetchall()]
+        assert stages == ["x"]
+
+        with pytest.raises(RuntimeError), unit_of_work(db):
+            events.append("z", datetime.now(tz=UTC), None, None, {})
+            raise RuntimeError("outer")
+        assert int(other.execute("SELECT COUNT(*) FROM events").fetchone()[0]) == 1
+    finally:
+        other.close()
+        db.close()
+
+
+def test_failed_alert_is_rolled_back_before_deadletter(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("AUTOTRIAGE_DATA_DIR", str(tmp_path / "empty_data"))
+    monkeypatch.setenv("AUTOTRIAGE_ENABLED_ENRICHERS", "whois")
+    init_db()
+    db = get_db()
+    try:
+        raw = {
+            "vendor": "vendor_a",
+            "time": "2025-01-01T00:00:00Z",
+            "severity": 5,
+            "user": "alice",
+            "domain": "evil.example",
+            "title": "DNS query to suspicious domain",
+        }
+        db.execute(
+            "INSERT INTO alerts (ingest_id, idempotency_key, received_at, raw_json, status) VALUES (?, ?, ?, ?, 'processing')",
+            ("ing-1", "k", "2025-01-01T00:00:00Z", json.dumps(raw)),
+        )
+        db.commit()
+
+        with suppress(Exception):
+            process_ingest(db, "ing-1", raw)
+
+        stages = [str(r[0]) for r in db.execute("SELECT stage FROM events").fetchall()]
+        assert stages == ["failed"]
+        assert int(db.execute("SELECT COUNT(*) FROM cases").fetchone()[0]) == 0
+        assert int(db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]) == 0
+        row = db.execute("SELECT status, normalized_json FROM alerts").fetchone()
+        assert row["status"] == "failed"
+        assert row["normalized_json"] is None
+        dl = db.execute("SELECT stage FROM deadletter WHERE ingest_id = 'ing-1'").fetchone()
+        assert dl["stage"] == "enrich"
+    finally:
+        db.close()
+
+
+def test_unit_of_work_reports_savepoint_rollbacks_as_they_happen(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = get_db()
+    calls: list[str] = []
+    try:
+        assert not on_rollback(db, lambda: calls.append("outside"))
+        with unit_of_work(db):
+            on_unit_of_work_end(db, lambda committed: calls.append(f"end:{committed}"))
+            with pytest.raises(RuntimeError), unit_of_work(db):
+                on_rollback(db, lambda: calls.append("undo-a"))
+                on_rollback(db, lambda: calls.append("undo-b"))
+                raise RuntimeError("inner")
+            assert calls == ["undo-b", "undo-a"]
+            with unit_of_work(db):
+                on_rollback(db, lambda: calls.append("released"))
+        # A rolled-back savepoint does not make the committed transaction a rollback.
+        assert calls == ["undo-b", "undo-a", "end:True"]
+
+        calls.clear()
+        with pytest.raises(RuntimeError), unit_of_work(db):
+            on_unit_of_work_end(db, lambda committed: calls.append(f"end:{committed}"))
+            with unit_of_work(db):
+                on_rollback(db, lambda: calls.append("released"))
+            raise RuntimeError("outer")
+        assert calls == ["released", "end:False"]
+    finally:
+        db.close()
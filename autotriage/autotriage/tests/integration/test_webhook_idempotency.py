@@ -7,6 +7,7 @@ from _pytest.monkeypatch import MonkeyPatch
 from fastapi.testclient import TestClient
 
 from autotriage.app.main import create_app
+from autotriage.app.routes import ingest
 from autotriage.core.pipeline.orchestrator import process_ingest
 from autotriage.storage.db import get_db, init_db
 
@@ -42,3 +43,53 @@ def test_webhook_idempotency_computed_key(tmp_path: Path, monkeypatch: MonkeyPat
     r2 = client.post("/webhook/alerts", json=payload)
     assert r1.status_code == 202 and r2.status_code == 202
     assert r1.json()["ingest_id"] == r2.json()["ingest_id"]
+
+
+def test_webhook_rejects_malformed_json(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    client = TestClient(create_app())
+    r = client.post(
+        "/webhook/alerts", content=b"{not json", headers={"Content-Type": "application/json"}
+    )
+    assert r.status_code == 400
+    assert client.post("/webhook/alerts", json=[1, 2]).status_code == 400
+
+
+def test_webhook_stores_the_body_as_received(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    client = TestClient(create_app())
+    headers = {"Content-Type": "application/json"}
+    body = '{ "vendor": "vendor_a",\n  "title": "café", "severity": 1, "time": "2025-01-01T00:00:00Z" }'
+    r1 = client.post("/webhook/alerts", content=body.encode("utf-8"), headers=headers)
+    # Same alert, keys reordered and compact: the computed key still matches.
+    reordered = '{"time":"2025-01-01T00:00:00Z","severity":1,"title":"café","vendor":"vendor_a"}'
+    r2 = client.post("/webhook/alerts", content=reordered.encode("utf-8"), headers=headers)
+    assert r1.status_code == 202 and r2.status_code == 202
+    assert r1.json()["ingest_id"] == r2.json()["ingest_id"]
+    r3 = client.post(
+        "/webhook/alerts", content=b"\xff\xfe{}", headers={**headers, "Idempotency-Key": "bad"}
+    )
+    assert r3.status_code == 400
+
+    db = get_db()
+    try:
+        row = db.execute(
+            "SELECT raw_json FROM alerts WHERE ingest_id = ?", (r1.json()["ingest_id"],)
+        ).fetchone()
+    finally:
+        db.close()
+    assert row["raw_json"] == body
+
+
+def test_webhook_rings_with_the_pools_db_path(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    client = TestClient(create_app())
+    # Passed in, so ring_soon never resolves it from the config on the ingest path.
+    rung: list[Path | None] = []
+    monkeypatch.setattr(ingest, "ring_soon", rung.append)
+    r = client.post("/webhook/alerts", json={"vendor": "vendor_a", "title": "x", "severity": 1})
+    assert r.status_code == 202
+    assert rung == [tmp_path / "db.sqlite"]
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import sqlite3
-from datetime import UTC, datetime, timedelta
+import time
+from datetime import UTC, datetime
 
 from autotriage.storage.repositories.cache_repo import CacheRepository
 
 
-def test_cache_ttl_expires_and_is_deleted() -> None:
+def _cache_db() -> sqlite3.Connection:
     db = sqlite3.connect(":memory:")
     db.row_factory = sqlite3.Row
     db.executescript(
@@ -15,31 +16,52 @@ def test_cache_ttl_expires_and_is_deleted() -> None:
           enricher TEXT NOT NULL,
           cache_key TEXT NOT NULL,
           created_at TEXT NOT NULL,
-          expires_at TEXT NOT NULL,
+          expires_at INTEGER NOT NULL,
           value_json TEXT NOT NULL,
           PRIMARY KEY (enricher, cache_key)
         );
+        CREATE INDEX idx_cache_expires_at ON cache(expires_at);
         """
     )
+    return db
+
+
+def test_cache_ttl_expired_rows_are_hidden_then_swept() -> None:
+    db = _cache_db()
     repo = CacheRepository(db)
 
-    now = datetime.now(tz=UTC)
+    now = int(time.time())
     db.execute(
         "INSERT INTO cache (enricher, cache_key, created_at, expires_at, value_json) VALUES (?, ?, ?, ?, ?)",
-        ("x", "k", now.isoformat(), (now + timedelta(seconds=60)).isoformat(), '{"a":1}'),
+        ("x", "k", datetime.now(tz=UTC).isoformat(), now + 60, '{"a":1}'),
     )
     db.commit()
     assert repo.get("x", "k") == {"a": 1}
 
     db.execute(
-        "UPDATE cache SET expires_at = ? WHERE enricher = ? AND cache_key = ?",
-        ((now - timedelta(seconds=60)).isoformat(), "x", "k"),
+        "UPDATE cache SET expires_at = ? WHERE enricher = ? AND cache_key = ?", (now - 60, "x", "k")
     )
     db.commit()
+    statements: list[str] = []
+    db.set_trace_callback(statements.append)
     assert repo.get("x", "k") is None
-    assert (
-        db.execute(
-            "SELECT COUNT(*) FROM cache WHERE enricher = ? AND cache_key = ?", ("x", "k")
-        ).fetchone()[0]
-        == 0
-    )
+    db.set_trace_callback(None)
+    # The read path is one SELECT and leaves the expired row for the sweeper.
+    assert len(statements) == 1 and statements[0].lstrip().startswith("SELECT")
+    assert db.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 1
+
+    assert repo.sweep_expired() == 1
+    assert db.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 0
+
+
+def test_sweep_deletes_in_bounded_batches() -> None:
+    db = _cache_db()
+    repo = CacheRepository(db)
+    repo.set_many("x", [(f"old-{i}", {"i": i}) for i in range(5)], -10)
+    repo.set_many("x", [("live", {"i": -1})], 60)
+
+    assert repo.sweep_expired(batch_size=2) == 2
+    assert repo.sweep_expired(batch_size=2) == 2
+    assert repo.sweep_expired(batch_size=2) == 1
+    assert repo.sweep_expired(batch_size=2) == 0
+    assert repo.get("x", "live") == {"i": -1}
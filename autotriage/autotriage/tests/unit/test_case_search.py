@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from pathlib import Path
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.core.correlate.correlator import correlate_into_case
+from autotriage.core.models.alert import CanonicalAlert
+from autotriage.core.models.entities import Entity, EntityType
+from autotriage.storage.db import get_db, init_db
+from autotriage.storage.repositories import cases_repo
+from autotriage.storage.repositories.cases_repo import CasesRepository
+
+
+def _alert(title: str, *entities: Entity) -> CanonicalAlert:
+    return CanonicalAlert(
+        vendor="vendor_a",
+        alert_type="generic",
+        ts=datetime.now(tz=UTC),
+        title=title,
+        severity=40,
+        entities=list(entities),
+        raw={},
+    )
+
+
+def test_search_follows_case_writes(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = get_db()
+    try:
+
+        def correlate(alert: CanonicalAlert) -> str:
+            return correlate_into_case(
+                db,
+                alert,
+                correlation_window_seconds=3600,
+                base_severity=alert.severity,
+                decision="CREATE_TICKET",
+                queue="triage",
+                score={},
+                routing={},
+            )
+
+        def search(q: str) -> list[str]:
+            return [
+                c["case_id"]
+                for c in CasesRepository(db).list_cases(None, None, None, None, q).items
+            ]
+
+        host = Entity(type=EntityType.host, value="workstation-42")
+        first = correlate(_alert("Suspicious login", host))
+        other = correlate(
+            _alert('Mail from "ceo"', Entity(type=EntityType.user, value="ceo@corp.example"))
+        )
+        assert search("workstation-42") == [first]
+        assert search("WORKSTATION-4") == [first]
+        assert search("suspicious work") == [first]
+        assert search("station") == []
+        assert search(first[:8]) == [first]
+        assert search('"ceo"') == [other]
+        assert search("ceo@corp") == [other]
+        assert sorted(search("   ")) == sorted([first, other])
+
+        # Joining a case adds its entities and replaces its summary.
+        joined = correlate(
+            _alert("Impossible travel", host, Entity(type=EntityType.user, value="alice"))
+        )
+        assert joined == first
+        assert search("alice") == [first]
+        assert search("travel") == [first]
+        assert search("suspicious") == []
+
+        # Searches with many matches walk cases by time instead; same results.
+        monkeypatch.setattr(cases_repo, "_SEARCH_FEW", 0)
+        assert search("travel") == [first]
+        assert search("mail ceo@") == [other]
+        assert search("nothing-here") == []
+
+        db.execute("DELETE FROM case_entities WHERE case_id = ?", (other,))
+        db.execute("DELETE FROM cases WHERE case_id = ?", (other,))
+        db.commit()
+        assert search("ceo") == []
+        assert db.execute("SELECT COUNT(*) FROM cases_fts").fetchone()[0] == 1
+    finally:
+        db.close()
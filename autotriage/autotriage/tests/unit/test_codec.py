@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.util import codec
+
+
+@dataclass
+class _Point:
+    x: int
+
+
+@pytest.mark.parametrize("backend", ["installed", "stdlib"])
+def test_codec_matches_stdlib(backend: str, monkeypatch: MonkeyPatch) -> None:
+    if backend == "stdlib":
+        monkeypatch.setattr(codec, "_orjson", None)
+    doc = {"name": "zoë", "n": [1, 2.5, None, True], "nested": {"k": "v"}, "big": 2**70}
+    assert codec.loads(codec.dumps(doc)) == doc
+    assert codec.loads(codec.dumpb(doc)) == doc
+    assert json.loads(codec.dumps(doc)) == doc
+    # Text written by the stdlib encoder, NaN included, reads back the same.
+    assert codec.loads(json.dumps({"x": 1.0})) == {"x": 1.0}
+    assert codec.loads('{"x": NaN}')["x"] != codec.loads('{"x": NaN}')["x"]
+    assert codec.loads(codec.dumps({1: "a"})) == {"1": "a"}
+    # Non-finite floats are written as the stdlib writes them, not as null.
+    odd = {"nan": float("nan"), "inf": [float("inf"), -float("inf")], float("nan"): None}
+    assert codec.dumps(odd) == json.dumps(odd, separators=(",", ":"))
+    # Only JSON types encode, whichever backend is installed.
+    for value in (datetime.now(tz=UTC), _Point(1), {1, 2}):
+        with pytest.raises(TypeError):
+            codec.dumps({"v": value})
+    with pytest.raises(ValueError):
+        codec.loads("{not json")
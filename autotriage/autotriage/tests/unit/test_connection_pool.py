@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.storage.db import ConnectionPool, close_pools, data_version, get_pool
+
+
+def test_pool_reuses_connections_and_bounds_checkouts(tmp_path: Path) -> None:
+    pool = ConnectionPool(tmp_path / "db.sqlite", size=2, cached_statements=64)
+    try:
+        with pool.connection() as db:
+            first = db
+            db.execute("CREATE TABLE t (x INTEGER)")
+            db.commit()
+            assert int(db.execute("PRAGMA foreign_keys").fetchone()[0]) == 1
+        with pool.connection() as db:
+            assert db is first
+            # Left open by the borrower: rolled back when the connection is returned.
+            db.execute("INSERT INTO t VALUES (1)")
+            assert pool.in_use == 1
+
+        with pool.connection() as a, pool.connection() as b:
+            assert a is not b
+            assert int(a.execute("SELECT COUNT(*) FROM t").fetchone()[0]) == 0
+            with pytest.raises(TimeoutError), pool.connection(timeout_s=0.05):
+                pass
+        assert pool.in_use == 0
+    finally:
+        pool.close()
+
+
+def test_pool_and_watcher_are_resolved_once_per_process(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "a.sqlite"))
+    pool = get_pool()
+    generation, _ = data_version()
+    # Checkouts and cache checks do not read the config again.
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "b.sqlite"))
+    assert get_pool() is pool
+    assert data_version()[0] == generation
+    with pool.connection() as db:
+        assert db.execute("PRAGMA database_list").fetchone()["file"].endswith("a.sqlite")
+
+    close_pools()
+    assert get_pool() is not pool
+    assert data_version()[0] != generation
+    with get_pool().connection() as db:
+        assert db.execute("PRAGMA database_list").fetchone()["file"].endswith("b.sqlite")
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import random
+import sqlite3
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.core.correlate.batch import CorrelationInput, correlate_many
+from autotriage.core.correlate.correlator import correlate_into_case
+from autotriage.core.correlate.hot import HotEntities
+from autotriage.core.correlate.index import EntityCaseIndex
+from autotriage.core.models.alert import CanonicalAlert
+from autotriage.core.models.entities import Entity, EntityType
+from autotriage.storage.db import init_db, unit_of_work
+
+WINDOW = 3600
+KINDS = [EntityType.user, EntityType.host, EntityType.src_ip, EntityType.domain]
+
+
+def _db(path: Path, rng: random.Random, monkeypatch: MonkeyPatch) -> sqlite3.Connection:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(path))
+    init_db()
+    db = sqlite3.connect(str(path))
+    db.row_factory = sqlite3.Row
+    now = datetime.now(tz=UTC)
+    # Existing cases, some already outside the correlation window.
+    for i in range(12):
+        created = (now - timedelta(seconds=rng.choice([60, 600, 3000, 7200]) + i)).isoformat()
+        db.execute(
+            """
+            INSERT INTO cases (case_id, created_at, updated_at, severity, confidence, decision, queue, summary, score_json, routing_json)
+            VALUES (?, ?, ?, 30, 0.5, 'CREATE_TICKET', 'triage', 'old', '{}', '{}')
+            """,
+            (f"old-{i}", created, created),
+        )
+        for kind in rng.sample(KINDS, 2):
+            db.execute(
+                "INSERT INTO case_entities (case_id, entity_type, entity_value) VALUES (?, ?, ?)",
+                (f"old-{i}", kind.value, f"{kind.value}-{rng.randrange(6)}"),
+            )
+    # One entity is hot from the start.
+    db.execute(
+        "INSERT INTO entity_frequency (bucket, entity_type, entity_value, alert_count)"
+        " VALUES (strftime('%s', 'now') / 3600 * 3600, 'src_ip', 'src_ip-0', 100)"
+    )
+    db.commit()
+    return db
+
+
+def _inputs(rng: random.Random, n: int) -> list[CorrelationInput]:
+    out: list[CorrelationInput] = []
+    for i in range(n):
+        entities = [
+            Entity(type=kind, value=f"{kind.value}-{rng.randrange(6)}")
+            for kind in rng.sample(KINDS, rng.randrange(0, 3))
+        ]
+        alert = CanonicalAlert(
+            vendor="vendor_a",
+            alert_type="generic",
+            ts=datetime.now(tz=UTC),
+            title=f"alert {i}",
+            severity=rng.randrange(100),
+            entities=entities,
+            raw={},
+        )
+        out.append(
+            CorrelationInput(
+                alert=alert,
+                base_severity=alert.severity,
+                decision=rng.choice(["CREATE_TICKET", "AUTO_CLOSE"]),
+                queue=rng.choice(["triage", "soc"]),
+                score={"confidence": rng.random()},
+                routing={"queue": "triage"},
+            )
+        )
+    return out
+
+
+def _state(db: sqlite3.Connection, labels: dict[str, str]) -> list[tuple[object, ...]]:
+    cases = db.execute(
+        "SELECT case_id, severity, decision, queue, summary, confidence FROM cases"
+    ).fetchall()
+    entities: dict[str, set[tuple[str, str]]] = {}
+    for r in db.execute("SELECT case_id, entity_type, entity_value FROM case_entities"):
+        entities.setdefault(str(r[0]), set()).add((str(r[1]), str(r[2])))
+    return sorted(
+        (labels.get(str(r[0]), str(r[0])), *tuple(r)[1:], sorted(entities.get(str(r[0]), set())))
+        for r in cases
+    )
+
+
+@pytest.mark.parametrize("use_index", [False, True])
+def test_batch_assignments_match_serial(
+    tmp_path: Path, monkeypatch: MonkeyPatch, use_index: bool
+) -> None:
+    serial = _db(tmp_path / "serial.sqlite", random.Random(5), monkeypatch)
+    batched = _db(tmp_path / "batched.sqlite", random.Random(5), monkeypatch)
+    rng = random.Random(9)
+    # Refreshed only once, so both sides see the same hot set throughout.
+    hot_serial = HotEntities(threshold=50, window_seconds=WINDOW, refresh_seconds=3600)
+    hot_batched = HotEntities(threshold=50, window_seconds=WINDOW, refresh_seconds=3600)
+    index = EntityCaseIndex(WINDOW) if use_index else None
+    serial_labels: dict[str, str] = {}
+    batched_labels: dict[str, str] = {}
+    try:
+        for _ in range(8):
+            inputs = _inputs(rng, rng.randrange(1, 40))
+            with unit_of_work(serial):
+                expected = [
+                    correlate_into_case(
+                        serial,
+                        item.alert,
+                        correlation_window_seconds=WINDOW,
+                        base_severity=item.base_severity,
+                        decision=item.decision,
+                        queue=item.queue,
+                        score=item.score,
+                        routing=item.routing,
+                        hot=hot_serial,
+                    )
+                    for item in inputs
+                ]
+            with unit_of_work(batched):
+                got = correlate_many(
+                    batched,
+                    inputs,
+                    correlation_window_seconds=WINDOW,
+                    index=index,
+                    hot=hot_batched,
+                )
+            # New cases get fresh ids on each side; label them by the alert that created them.
+            for case_id in expected:
+                serial_labels.setdefault(case_id, f"new-{len(serial_labels)}")
+            for case_id in got:
+                batched_labels.setdefault(case_id, f"new-{len(batched_labels)}")
+            assert [serial_labels.get(c, c) for c in expected] == [
+                batched_labels.get(c, c) for c in got
+            ]
+        for labels in (serial_labels, batched_labels):
+            for case_id in list(labels):
+                if case_id.startswith("old-"):
+                    del labels[case_id]
+        assert _state(serial, serial_labels) == _state(batched, batched_labels)
+        frequencies = (
+            "SELECT entity_type, entity_value, alert_count FROM entity_frequency ORDER BY 1, 2"
+        )
+        assert serial.execute(frequencies).fetchall() == batched.execute(frequencies).fetchall()
+    finally:
+        serial.close()
+        batched.close()
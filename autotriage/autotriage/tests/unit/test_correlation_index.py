@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import random
+import sqlite3
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.core.correlate.index import EntityCaseIndex
+from autotriage.storage.db import init_db, unit_of_work
+from autotriage.storage.repositories.case_entities_repo import CaseEntitiesRepository
+
+WINDOW = 3600
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    db = sqlite3.connect(str(path))
+    db.row_factory = sqlite3.Row
+    return db
+
+
+def _insert_case(db: sqlite3.Connection, case_id: str, created_at: datetime) -> None:
+    db.execute(
+        """
+        INSERT INTO cases (case_id, created_at, updated_at, severity, confidence, decision, queue, summary, score_json, routing_json)
+        VALUES (?, ?, ?, 10, 0.5, 'CREATE_TICKET', 'triage', 't', '{}', '{}')
+        """,
+        (case_id, created_at.isoformat(), created_at.isoformat()),
+    )
+
+
+def test_index_lookups_match_sql(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = _connect(tmp_path / "db.sqlite")
+    other = _connect(tmp_path / "db.sqlite")
+    rng = random.Random(11)
+    entities = [(kind, f"{kind}-{i}") for kind in ("user", "host", "src_ip") for i in range(8)]
+    # A synthetic clock far enough in the past that nothing depends on the wall clock.
+    clock = datetime(2025, 1, 1, tzinfo=UTC)
+    cases: list[tuple[str, datetime]] = []
+    index = EntityCaseIndex(WINDOW)
+    try:
+        for step in range(800):
+            clock += timedelta(seconds=rng.randrange(30))
+            since = clock - timedelta(seconds=WINDOW)
+            pairs = rng.sample(entities, rng.randrange(1, 4))
+            roll = rng.random()
+            if roll < 0.1:
+                # Another worker correlates through its own connection.
+                case_id = f"other-{step}"
+                _insert_case(other, case_id, clock)
+                CaseEntitiesRepository(other).add(case_id, pairs)
+                other.commit()
+                cases.append((case_id, clock))
+                continue
+            if roll < 0.13:
+                with pytest.raises(RuntimeError), unit_of_work(db):
+                    index.find(db, pairs, since)
+                    _insert_case(db, f"lost-{step}", clock)
+                    rowids = CaseEntitiesRepository(db).add(f"lost-{step}", pairs)
+                    index.record(db, f"lost-{step}", clock.isoformat(), pairs, rowids)
+                    raise RuntimeError("batch failed")
+                continue
+            if step == 400:
+                # A restarted process warms a fresh index from the table.
+                index = EntityCaseIndex(WINDOW)
+            with unit_of_work(db):
+                repo = CaseEntitiesRepository(db)
+                expected = repo.latest_case(pairs, since.isoformat())
+                found = index.find(db, pairs, since)
+                assert (found[0] if found else None) == expected
+                if found is None:
+                    case_id, created_at = f"case-{step}", clock
+                    _insert_case(db, case_id, created_at)
+                    cases.append((case_id, created_at))
+                else:
+                    # Sometimes attach to an older case still inside the window instead.
+                    live = [c for c in cases if c[1] >= since]
+                    if roll > 0.8:
+                        case_id, created_at = rng.choice(live)
+                    else:
+                        case_id, created_at = found[0], datetime.fromisoformat(found[1])
+                rowids = repo.add(case_id, pairs)
+                index.record(db, case_id, created_at.isoformat(), pairs, rowids)
+        assert 0 < len(index) <= len(entities)
+    finally:
+        db.close()
+        other.close()
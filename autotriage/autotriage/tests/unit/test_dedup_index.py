@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import random
+import sqlite3
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.core.dedup.deduper import find_duplicate_of, record_fingerprint
+from autotriage.core.dedup.index import FingerprintIndex
+from autotriage.core.fingerprint.strategies import Fingerprint
+from autotriage.storage.db import init_db, unit_of_work
+from autotriage.storage.repositories.fingerprints_repo import FingerprintsRepository
+
+WINDOW = 600
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    db = sqlite3.connect(str(path))
+    db.row_factory = sqlite3.Row
+    return db
+
+
+@pytest.mark.parametrize("bloom_bits", [0, 4096])
+def test_index_decisions_match_sql(
+    tmp_path: Path, monkeypatch: MonkeyPatch, bloom_bits: int
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = _connect(tmp_path / "db.sqlite")
+    other = _connect(tmp_path / "db.sqlite")
+    rng = random.Random(7)
+    current = int(time.time()) // WINDOW * WINDOW
+    # The current window is served from memory, the older ones from SQL or the Bloom filter.
+    windows = [datetime.fromtimestamp(current - k * WINDOW, tz=UTC) for k in (0, 1, 5)]
+    ingests = [f"a-{i}" for i in range(60)]
+
+    def random_fp() -> Fingerprint:
+        return Fingerprint(
+            strategy=rng.choice(["default", "lp-blake2b-v1"]),
+            fp_hash=f"h{rng.randrange(6)}",
+            window_start=rng.choice(windows),
+        )
+
+    index = FingerprintIndex(WINDOW, bloom_bits=bloom_bits)
+    try:
+        for step in range(600):
+            roll = rng.random()
+            if roll < 0.1:
+                # Another worker records through its own connection.
+                record_fingerprint(other, rng.choice(ingests), random_fp())
+                continue
+            if roll < 0.13:
+                with pytest.raises(RuntimeError), unit_of_work(db):
+                    index.check_and_record(db, rng.choice(ingests), random_fp())
+                    raise RuntimeError("batch failed")
+                continue
+            if roll < 0.2:
+                # A batch stage fails in its savepoint; the transaction goes on and commits.
+                with unit_of_work(db):
+                    with pytest.raises(RuntimeError), unit_of_work(db):
+                        index.check_and_record(db, rng.choice(ingests), random_fp())
+                        raise RuntimeError("batch stage failed")
+                    ingest_id, fp = rng.choice(ingests), random_fp()
+                    expected = find_duplicate_of(db, fp)
+                    assert index.check_and_record(db, ingest_id, fp) == expected
+                continue
+            if step == 300:
+                # A restarted process warms a fresh index from the table.
+                index = FingerprintIndex(WINDOW, bloom_bits=bloom_bits)
+            ingest_id, fp = rng.choice(ingests), random_fp()
+            expected = find_duplicate_of(db, fp)
+            if roll < 0.5:
+                with unit_of_work(db):
+                    assert index.check_and_record(db, ingest_id, fp) == expected
+            else:
+                assert index.check_and_record(db, ingest_id, fp) == expected
+        assert len(index) > 0
+    finally:
+        db.close()
+        other.close()
+
+
+def test_prune_keeps_recent_windows(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = _connect(tmp_path / "db.sqlite")
+    try:
+        now = int(time.time())
+        for i, age in enumerate([0, WINDOW, 3 * WINDOW, 4 * WINDOW]):
+            fp = Fingerprint(
+                strategy="default",
+                fp_hash="h",
+                window_start=datetime.fromtimestamp(now - age, tz=UTC),
+            )
+            record_fingerprint(db, f"a-{i}", fp)
+        repo = FingerprintsRepository(db)
+        cutoff = datetime.fromtimestamp(now - 2 * WINDOW, tz=UTC).isoformat()
+        assert repo.prune(cutoff, batch_size=1) == 1
+        assert repo.prune(cutoff, batch_size=1) == 1
+        assert repo.prune(cutoff, batch_size=1) == 0
+        remaining = [r["ingest_id"] for r in db.execute("SELECT ingest_id FROM fingerprints")]
+        assert remaining == ["a-0", "a-1"]
+    finally:
+        db.close()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import socket
+import threading
+import time
+from pathlib import Path
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage import doorbell
+from autotriage.doorbell import Doorbell, doorbell_dir, ring
+
+
+async def test_ring_wakes_local_and_socket_listeners(tmp_path: Path) -> None:
+    db_path = tmp_path / "db.sqlite"
+    bell = Doorbell(doorbell_dir(db_path))
+    try:
+        assert not await bell.wait(0.01)
+        ring(db_path)
+        assert await bell.wait(1.0)
+
+        # A ring from another process arrives as a datagram on the listener's socket.
+        bell.clear()
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            sender.sendto(b"\x01", str(bell.path))
+        finally:
+            sender.close()
+        assert await bell.wait(1.0)
+    finally:
+        bell.close()
+    assert not bell.path.exists()
+
+
+def test_ring_removes_stale_sockets(tmp_path: Path) -> None:
+    db_path = tmp_path / "db.sqlite"
+    sock_dir = doorbell_dir(db_path)
+    sock_dir.mkdir()
+    stale = sock_dir / "1-dead.sock"
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(str(stale))
+    sock.close()
+
+    ring(db_path)
+    assert not stale.exists()
+
+
+def test_ring_soon_folds_a_burst_into_few_scans(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    db_path = tmp_path / "db.sqlite"
+    scanning = threading.Event()
+    release = threading.Event()
+    scans: list[Path] = []
+
+    def slow_scan(path: Path) -> None:
+        scans.append(path)
+        scanning.set()
+        release.wait(5)
+
+    monkeypatch.setattr(doorbell, "_ring_sockets", slow_scan)
+    t0 = time.perf_counter()
+    doorbell.ring_soon(db_path)
+    assert scanning.wait(5)
+    # The first scan is stuck; the caller is not, and the rest of the burst waits for one pass.
+    for _ in range(100):
+        doorbell.ring_soon(db_path)
+    assert time.perf_counter() - t0 < 1.0
+    release.set()
+    for _ in range(100):
+        if len(scans) == 2:
+            break
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert scans == [db_path, db_path]
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.core.models.alert import CanonicalAlert
+from autotriage.core.models.entities import Entity, EntityType
+from autotriage.enrichers.base import BaseEnricher
+from autotriage.enrichers.manager import EnricherManager
+from autotriage.enrichers.registry import EnricherRegistry
+from autotriage.storage.db import init_db
+from autotriage.storage.repositories.cache_repo import CacheRepository
+
+
+class _BulkEnricher(BaseEnricher):
+    name = "bulk"
+    in_memory = True
+
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def keys(self, alert: CanonicalAlert) -> list[str]:
+        return sorted(e.value for e in alert.entities)
+
+    def enrich_one(self, key: str) -> dict[str, Any] | None:
+        raise AssertionError("bulk enrichers are called through enrich_many")
+
+    def enrich_many(self, keys: list[str]) -> dict[str, dict[str, Any] | None]:
+        self.calls.append(list(keys))
+        return {key: {"ip": key} for key in keys if key != "10.0.0.9"}
+
+
+def test_bulk_lookup_and_cache_round_trips(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = sqlite3.connect(str(tmp_path / "db.sqlite"))
+    db.row_factory = sqlite3.Row
+    try:
+        repo = CacheRepository(db)
+        repo.set_many("bulk", [("10.0.0.1", {"ip": "cached"}), ("10.0.0.2", {"ip": "old"})], 60)
+        db.execute(
+            "UPDATE cache SET expires_at = ? WHERE cache_key = '10.0.0.2'",
+            (int(time.time()) - 1,),
+        )
+        db.commit()
+
+        statements: list[str] = []
+        db.set_trace_callback(statements.append)
+        assert repo.get_many("bulk", ["10.0.0.1", "10.0.0.2", "10.0.0.3"]) == {
+            "10.0.0.1": {"ip": "cached"}
+        }
+        db.set_trace_callback(None)
+        assert sum(s.lstrip().startswith("SELECT") for s in statements) == 1
+        # The expired row is hidden from reads and left for the sweeper.
+        assert int(db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]) == 2
+
+        enricher = _BulkEnricher()
+        registry = EnricherRegistry(tmp_path, factories={"bulk": lambda _: enricher})
+        mgr = EnricherManager(db=db, data_dir=tmp_path, enabled=["bulk"], registry=registry)
+        ips = ["10.0.0.1", "10.0.0.4", "10.0.0.5", "10.0.0.9"]
+        alert = CanonicalAlert(
+            vendor="vendor_a",
+            alert_type="net",
+            ts=datetime.now(tz=UTC),
+            title="Scan",
+            severity=10,
+            entities=[Entity(type=EntityType.dst_ip, value=ip) for ip in ips],
+            raw={},
+        )
+        out = mgr.enrich(alert)["bulk"]
+        assert enricher.calls == [["10.0.0.4", "10.0.0.5", "10.0.0.9"]]
+        assert list(out) == ips
+        assert out["10.0.0.1"]["status"] == "cache_hit"
+        assert out["10.0.0.4"] == {"status": "ok", "data": {"ip": "10.0.0.4"}}
+        assert out["10.0.0.9"] == {"status": "miss"}
+        assert mgr.enrich(alert)["bulk"]["10.0.0.5"]["status"] == "cache_hit"
+    finally:
+        db.close()
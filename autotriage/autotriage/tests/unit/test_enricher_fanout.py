@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.core.models.alert import CanonicalAlert
+from autotriage.core.models.entities import Entity, EntityType
+from autotriage.enrichers.base import BaseEnricher
+from autotriage.enrichers.ip_reputation import IpReputationEnricher
+from autotriage.enrichers.manager import EnricherManager
+from autotriage.enrichers.registry import EnricherRegistry
+from autotriage.storage.db import init_db
+
+
+class _SlowEnricher(BaseEnricher):
+    def __init__(self, name: str, delay_s: float, timeout_s: float) -> None:
+        self.name = name
+        self.delay_s = delay_s
+        self.timeout_seconds = timeout_s
+
+    def keys(self, alert: CanonicalAlert) -> list[str]:
+        return sorted(e.value for e in alert.entities)
+
+    def enrich_one(self, key: str) -> dict[str, Any] | None:
+        time.sleep(self.delay_s)
+        return {"key": key}
+
+
+def test_enrichers_fan_out_and_time_out(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    registry = EnricherRegistry(
+        tmp_path,
+        factories={
+            "slow_a": lambda _: _SlowEnricher("slow_a", 0.2, 1.0),
+            "slow_b": lambda _: _SlowEnricher("slow_b", 0.2, 1.0),
+            "hung": lambda _: _SlowEnricher("hung", 2.0, 0.3),
+        },
+    )
+    alert = CanonicalAlert(
+        vendor="vendor_a",
+        alert_type="auth",
+        ts=datetime.now(tz=UTC),
+        title="Login",
+        severity=10,
+        entities=[
+            Entity(type=EntityType.src_ip, value="1.2.3.4"),
+            Entity(type=EntityType.user, value="alice"),
+        ],
+        raw={},
+    )
+    db = sqlite3.connect(str(tmp_path / "db.sqlite"))
+    db.row_factory = sqlite3.Row
+    try:
+        mgr = EnricherManager(
+            db=db, data_dir=tmp_path, enabled=["slow_a", "slow_b", "hung"], registry=registry
+        )
+        t0 = time.monotonic()
+        out = mgr.enrich(alert)
+        elapsed = time.monotonic() - t0
+
+        # Four 200 ms lookups run side by side; the hung enricher is cut off at 300 ms.
+        assert elapsed < 0.7
+        assert out["slow_a"]["alice"] == {"status": "ok", "data": {"key": "alice"}}
+        assert out["slow_b"]["1.2.3.4"]["status"] == "ok"
+        assert out["hung"] == {"1.2.3.4": {"status": "timeout"}, "alice": {"status": "timeout"}}
+        assert mgr.enrich(alert)["slow_a"]["alice"]["status"] == "cache_hit"
+    finally:
+        db.close()
+
+
+class _RemoteIpReputation(IpReputationEnricher):
+    # The built-in enricher as a deployment that reaches its backend over the network would
+    # run it: through the thread pool, per-call timeouts and single-flight.
+    in_memory = False
+    threads: list[str] = []
+
+    def enrich_many(self, keys: list[str]) -> dict[str, dict[str, Any] | None]:
+        self.threads.append(threading.current_thread().name)
+        return super().enrich_many(keys)
+
+
+def test_builtin_enricher_runs_through_the_blocking_path(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    data_dir = Path(__file__).resolve().parents[3] / "data"
+    registry = EnricherRegistry(data_dir, factories={"ip_reputation": _RemoteIpReputation})
+    alert = CanonicalAlert(
+        vendor="vendor_a",
+        alert_type="auth",
+        ts=datetime.now(tz=UTC),
+        title="Login",
+        severity=10,
+        entities=[
+            Entity(type=EntityType.src_ip, value="1.2.3.4"),
+            Entity(type=EntityType.dst_ip, value="192.0.2.1"),
+        ],
+        raw={},
+    )
+    db = sqlite3.connect(str(tmp_path / "db.sqlite"))
+    db.row_factory = sqlite3.Row
+    try:
+        mgr = EnricherManager(
+            db=db, data_dir=data_dir, enabled=["ip_reputation"], registry=registry
+        )
+        out = mgr.enrich(alert)["ip_reputation"]
+
+        assert out["1.2.3.4"] == {
+            "status": "ok",
+            "data": {"ip": "1.2.3.4", "rep": "bad", "score": "90", "source": "offline"},
+        }
+        assert out["192.0.2.1"] == {"status": "miss"}
+        # One bulk call for both keys, on the enrichment pool, led through a shared flight row.
+        assert [name.startswith("enricher") for name in _RemoteIpReputation.threads] == [True]
+        flights = db.execute("SELECT COUNT(*) FROM cache WHERE enricher = 'ip_reputation#flight'")
+        assert flights.fetchone()[0] == 2
+        assert mgr.enrich(alert)["ip_reputation"]["1.2.3.4"]["status"] == "cache_hit"
+    finally:
+        db.close()
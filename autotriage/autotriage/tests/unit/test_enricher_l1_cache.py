@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.core.models.alert import CanonicalAlert
+from autotriage.core.models.entities import Entity, EntityType
+from autotriage.enrichers.base import BaseEnricher
+from autotriage.enrichers.lru import TtlLru
+from autotriage.enrichers.manager import EnricherManager
+from autotriage.enrichers.registry import EnricherRegistry
+from autotriage.storage.db import init_db
+
+
+class _CountingEnricher(BaseEnricher):
+    name = "counting"
+    in_memory = True
+
+    def __init__(self) -> None:
+        self.lookups: list[str] = []
+
+    def keys(self, alert: CanonicalAlert) -> list[str]:
+        return sorted(e.value for e in alert.entities)
+
+    def enrich_one(self, key: str) -> dict[str, Any] | None:
+        self.lookups.append(key)
+        return None if key.startswith("unknown") else {"key": key}
+
+
+def test_lru_evicts_least_recent_and_expired() -> None:
+    lru = TtlLru(2)
+    far = time.time() + 60
+    lru.put(("e", "a"), {"v": 1}, far)
+    lru.put(("e", "b"), None, far)
+    assert lru.get(("e", "a")) == (True, {"v": 1})
+    lru.put(("e", "c"), {"v": 3}, far)
+    assert lru.get(("e", "b")) == (False, None)
+    assert lru.get(("e", "a")) == (True, {"v": 1})
+    lru.put(("e", "d"), {"v": 4}, time.time() - 1)
+    assert lru.get(("e", "d")) == (False, None)
+    assert len(lru) == 1
+
+
+def test_l1_tier_and_negative_caching(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = sqlite3.connect(str(tmp_path / "db.sqlite"))
+    db.row_factory = sqlite3.Row
+    try:
+        enricher = _CountingEnricher()
+        registry = EnricherRegistry(tmp_path, factories={"counting": lambda _: enricher})
+        mgr = EnricherManager(db=db, data_dir=tmp_path, enabled=["counting"], registry=registry)
+        alert = CanonicalAlert(
+            vendor="vendor_a",
+            alert_type="auth",
+            ts=datetime.now(tz=UTC),
+            title="Login",
+            severity=10,
+            entities=[
+                Entity(type=EntityType.user, value="alice"),
+                Entity(type=EntityType.user, value="unknown-1"),
+            ],
+            raw={},
+        )
+        first = mgr.enrich(alert)["counting"]
+        assert first == {
+            "alice": {"status": "ok", "data": {"key": "alice"}},
+            "unknown-1": {"status": "miss"},
+        }
+
+        statements: list[str] = []
+        db.set_trace_callback(statements.append)
+        second = mgr.enrich(alert)["counting"]
+        db.set_trace_callback(None)
+        assert second == {
+            "alice": {"status": "cache_hit", "data": {"key": "alice"}},
+            "unknown-1": {"status": "miss"},
+        }
+        assert enricher.lookups == ["alice", "unknown-1"]
+        assert statements == []
+
+        # Another worker's registry starts with an empty l1: the hit comes from SQLite, the
+        # negative result does not.
+        other = EnricherRegistry(tmp_path, factories={"counting": lambda _: enricher})
+        mgr2 = EnricherManager(db=db, data_dir=tmp_path, enabled=["counting"], registry=other)
+        assert mgr2.enrich(alert)["counting"]["alice"]["status"] == "cache_hit"
+        assert enricher.lookups == ["alice", "unknown-1", "unknown-1"]
+        assert other.l1.get(("counting", "alice"))[0]
+    finally:
+        db.close()
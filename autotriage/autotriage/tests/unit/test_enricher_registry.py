@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+from datetime import UTC, datetime
+from pathlib import Path
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.core.models.alert import CanonicalAlert
+from autotriage.core.models.entities import Entity, EntityType
+from autotriage.enrichers.manager import EnricherManager
+from autotriage.enrichers.registry import EnricherRegistry
+from autotriage.enrichers.whois import WhoisEnricher
+from autotriage.storage.db import init_db
+
+
+def _alert(domain: str) -> CanonicalAlert:
+    return CanonicalAlert(
+        vendor="vendor_a",
+        alert_type="dns",
+        ts=datetime.now(tz=UTC),
+        title="DNS query",
+        severity=10,
+        entities=[Entity(type=EntityType.domain, value=domain)],
+        raw={},
+    )
+
+
+def test_registry_shares_state_and_reloads_datasets(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    whois_csv = data_dir / "mock_whois.csv"
+    whois_csv.write_text("domain,registrar\nevil.example,OldRegistrar\n", encoding="utf-8")
+
+    registry = EnricherRegistry(data_dir, check_interval_s=0)
+    db = sqlite3.connect(str(tmp_path / "db.sqlite"))
+    db.row_factory = sqlite3.Row
+    try:
+        # Nothing is loaded until an enricher is used; other datasets may be absent.
+        first = EnricherManager(db=db, data_dir=data_dir, enabled=["whois"], registry=registry)
+        second = EnricherManager(db=db, data_dir=data_dir, enabled=["whois"], registry=registry)
+        out = first.enrich(_alert("evil.example"))
+        assert out["whois"]["evil.example"]["data"]["registrar"] == "OldRegistrar"
+        enricher = registry.enricher("whois")
+        assert second.enrich(_alert("evil.example"))["whois"]["evil.example"]["status"] == (
+            "cache_hit"
+        )
+        assert registry.enricher("whois") is enricher
+
+        whois_csv.write_text(
+            "domain,registrar\nnew.example,NewRegistrar\nother.example,X\n", encoding="utf-8"
+        )
+        reloaded = registry.enricher("whois")
+        assert reloaded is not enricher
+        out = second.enrich(_alert("new.example"))
+        assert out["whois"]["new.example"]["data"]["registrar"] == "NewRegistrar"
+
+        # A broken dataset keeps the last good enricher in service.
+        whois_csv.unlink()
+        os.mkdir(whois_csv)
+        assert registry.enricher("whois") is reloaded
+
+        def boom(self: WhoisEnricher, key: str) -> None:
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(WhoisEnricher, "enrich_one", boom)
+        for i in range(5):
+            first.enrich(_alert(f"down{i}.example"))
+        assert second.enrich(_alert("down9.example"))["whois"] == {"status": "circuit_open"}
+    finally:
+        db.close()
+
+
+def test_reloaded_dataset_is_not_answered_from_the_shared_cache(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    whois_csv = data_dir / "mock_whois.csv"
+    whois_csv.write_text("domain,registrar\nevil.example,OldRegistrar\n", encoding="utf-8")
+
+    # Two workers' registries over one cache table.
+    registries = [EnricherRegistry(data_dir, check_interval_s=0) for _ in range(2)]
+    db = sqlite3.connect(str(tmp_path / "db.sqlite"))
+    db.row_factory = sqlite3.Row
+    try:
+        managers = [
+            EnricherManager(db=db, data_dir=data_dir, enabled=["whois"], registry=registry)
+            for registry in registries
+        ]
+        out = managers[0].enrich(_alert("evil.example"))
+        assert out["whois"]["evil.example"]["data"]["registrar"] == "OldRegistrar"
+        out = managers[1].enrich(_alert("evil.example"))
+        assert out["whois"]["evil.example"]["status"] == "cache_hit"
+
+        whois_csv.write_text("domain,registrar\nevil.example,NewerRegistrar\n", encoding="utf-8")
+        for manager in managers:
+            out = manager.enrich(_alert("evil.example"))["whois"]["evil.example"]
+            assert out["data"]["registrar"] == "NewerRegistrar"
+        # The first lookup after the reload is cached for the other worker.
+        assert out["status"] == "cache_hit"
+    finally:
+        db.close()
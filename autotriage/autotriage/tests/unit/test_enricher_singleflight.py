@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.core.models.alert import CanonicalAlert
+from autotriage.core.models.entities import Entity, EntityType
+from autotriage.enrichers.base import BaseEnricher
+from autotriage.enrichers.manager import EnricherManager
+from autotriage.enrichers.registry import EnricherRegistry
+from autotriage.enrichers.singleflight import FlightRows
+from autotriage.storage.db import init_db
+
+
+class _CountingEnricher(BaseEnricher):
+    name = "remote"
+    timeout_seconds = 2.0
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self._lock = threading.Lock()
+
+    def keys(self, alert: CanonicalAlert) -> list[str]:
+        return [e.value for e in alert.entities]
+
+    def enrich_one(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            self.calls.append(key)
+        time.sleep(0.2)
+        return {"key": key}
+
+
+def _alert() -> CanonicalAlert:
+    return CanonicalAlert(
+        vendor="vendor_a",
+        alert_type="auth",
+        ts=datetime.now(tz=UTC),
+        title="Login",
+        severity=10,
+        entities=[Entity(type=EntityType.src_ip, value="1.2.3.4")],
+        raw={},
+    )
+
+
+def _setup(tmp_path: Path, monkeypatch: MonkeyPatch) -> tuple[_CountingEnricher, EnricherRegistry]:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    enricher = _CountingEnricher()
+    return enricher, EnricherRegistry(tmp_path, factories={"remote": lambda _: enricher})
+
+
+def test_concurrent_lookups_for_one_key_share_a_call(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    enricher, registry = _setup(tmp_path, monkeypatch)
+    start = threading.Barrier(4)
+    outputs: list[dict[str, Any]] = []
+
+    def run() -> None:
+        db = sqlite3.connect(str(tmp_path / "db.sqlite"))
+        db.row_factory = sqlite3.Row
+        try:
+            mgr = EnricherManager(db=db, data_dir=tmp_path, enabled=["remote"], registry=registry)
+            start.wait()
+            outputs.append(mgr.enrich(_alert()))
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert enricher.calls == ["1.2.3.4"]
+    assert len(outputs) == 4
+    for out in outputs:
+        assert out["remote"]["1.2.3.4"]["data"] == {"key": "1.2.3.4"}
+
+
+def test_lookup_led_by_another_worker_is_awaited(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    enricher, registry = _setup(tmp_path, monkeypatch)
+    # Another worker process holds the flight for this key.
+    other = FlightRows(tmp_path / "db.sqlite")
+    claimed, elsewhere = other.claim("remote", ["1.2.3.4"], lease_seconds=5)
+    assert claimed == {"1.2.3.4"} and elsewhere == {}
+
+    def settle_later() -> None:
+        time.sleep(0.1)
+        other.settle("remote", {"1.2.3.4": {"status": "ok", "data": {"from": "other"}}})
+
+    db = sqlite3.connect(str(tmp_path / "db.sqlite"))
+    db.row_factory = sqlite3.Row
+    try:
+        mgr = EnricherManager(db=db, data_dir=tmp_path, enabled=["remote"], registry=registry)
+        settler = threading.Thread(target=settle_later)
+        settler.start()
+        out = mgr.enrich(_alert())
+        settler.join()
+        # Flight rows live beside cache entries but never show up as cached values.
+        rows = db.execute("SELECT enricher FROM cache").fetchall()
+    finally:
+        db.close()
+
+    assert out["remote"]["1.2.3.4"] == {"status": "ok", "data": {"from": "other"}}
+    assert enricher.calls == []
+    assert [r["enricher"] for r in rows] == ["remote#flight"]
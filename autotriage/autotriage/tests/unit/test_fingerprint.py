@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import json
 from datetime import UTC, datetime
 
-from autotriage.core.fingerprint.strategies import compute_fingerprint
+from autotriage.core.fingerprint.hasher import stable_hash
+from autotriage.core.fingerprint.strategies import (
+    STRATEGIES,
+    FieldSelection,
+    FingerprintStrategy,
+    compute_fingerprint,
+)
 from autotriage.core.models.alert import CanonicalAlert
 from autotriage.core.models.entities import Entity, EntityType
+from autotriage.core.normalize.registry import normalize
+from autotriage.tools.alert_generator import generate_alerts
 
 
 def test_fingerprint_deterministic() -> None:
@@ -25,3 +34,63 @@ def test_fingerprint_deterministic() -> None:
     b = compute_fingerprint(alert, 600)
     assert a.fp_hash == b.fp_hash
     assert a.window_start == b.window_start
+
+
+def _alert(**overrides: object) -> CanonicalAlert:
+    fields: dict[str, object] = {
+        "vendor": "vendor_a",
+        "alert_type": "auth",
+        "ts": datetime(2025, 1, 1, 0, 0, 0, tzinfo=UTC),
+        "title": "Suspicious login",
+        "rule_id": "R-1",
+        "severity": 70,
+        "entities": [
+            Entity(type=EntityType.user, value="alice"),
+            Entity(type=EntityType.user, value="bob"),
+            Entity(type=EntityType.src_ip, value="1.2.3.4"),
+            Entity(type=EntityType.asn, value="AS1"),
+        ],
+        "raw": {},
+    }
+    fields.update(overrides)
+    return CanonicalAlert.model_validate(fields)
+
+
+def test_default_strategy_keeps_legacy_hashes() -> None:
+    fp = compute_fingerprint(_alert(), 600, strategy="default")
+    assert fp.strategy == "default"
+    assert fp.fp_hash == stable_hash(
+        {
+            "vendor": "vendor_a",
+            "type": "auth",
+            "title": "Suspicious login",
+            "rule_id": "R-1",
+            "src_ip": "1.2.3.4",
+            "user": "bob",
+        }
+    )
+
+
+def test_strategies_agree_on_which_alerts_match() -> None:
+    alerts = [normalize(json.loads(line)).alert for line in generate_alerts(300, seed=3)]
+    alerts += [_alert(), _alert(entities=list(reversed(_alert().entities))), _alert(rule_id=None)]
+    legacy = [compute_fingerprint(a, 600, strategy="default").fp_hash for a in alerts]
+    fast = [compute_fingerprint(a, 600, strategy="lp-blake2b-v1") for a in alerts]
+    assert all(fp.strategy == "lp-blake2b-v1" and len(fp.fp_hash) == 32 for fp in fast)
+    for i in range(len(alerts)):
+        for j in range(i + 1, len(alerts)):
+            assert (legacy[i] == legacy[j]) == (fast[i].fp_hash == fast[j].fp_hash)
+
+
+def test_field_selection_per_vendor() -> None:
+    strategy = FingerprintStrategy(
+        name="test-no-title",
+        encode=STRATEGIES["lp-blake2b-v1"].encode,
+        selections={("vendor_a", "*"): FieldSelection(title=False)},
+    )
+    assert strategy.fingerprint_hash(_alert(title="a")) == strategy.fingerprint_hash(
+        _alert(title="b")
+    )
+    assert strategy.fingerprint_hash(
+        _alert(vendor="vendor_b", title="a")
+    ) != strategy.fingerprint_hash(_alert(vendor="vendor_b", title="b"))
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import UTC, datetime
+from pathlib import Path
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from autotriage.core.correlate.correlator import correlate_into_case
+from autotriage.core.correlate.hot import HotEntities
+from autotriage.core.models.alert import CanonicalAlert
+from autotriage.core.models.entities import Entity, EntityType
+from autotriage.storage.db import get_db, init_db
+
+
+def _alert(user: str) -> CanonicalAlert:
+    return CanonicalAlert(
+        vendor="vendor_a",
+        alert_type="generic",
+        ts=datetime.now(tz=UTC),
+        title=f"login by {user}",
+        severity=40,
+        entities=[
+            Entity(type=EntityType.user, value=user),
+            Entity(type=EntityType.src_ip, value="10.0.0.10"),
+        ],
+        raw={},
+    )
+
+
+def _correlate(db: sqlite3.Connection, alert: CanonicalAlert, hot: HotEntities) -> str:
+    return correlate_into_case(
+        db,
+        alert,
+        correlation_window_seconds=3600,
+        base_severity=alert.severity,
+        decision="CREATE_TICKET",
+        queue="triage",
+        score={},
+        routing={},
+        hot=hot,
+    )
+
+
+def test_hot_entity_stops_chaining_but_stays_on_the_case(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("AUTOTRIAGE_DB_PATH", str(tmp_path / "db.sqlite"))
+    init_db()
+    db = get_db()
+    hot = HotEntities(threshold=3, window_seconds=3600, refresh_seconds=0)
+    try:
+        # Below the threshold the shared address still chains users into one case.
+        first = {_correlate(db, _alert(user), hot) for user in ("alice", "bob", "carol")}
+        assert len(first) == 1
+        assert hot.current(db) == {("src_ip", "10.0.0.10")}
+
+        dave = _correlate(db, _alert("dave"), hot)
+        erin = _correlate(db, _alert("erin"), hot)
+        assert len({dave, erin} | first) == 3
+        # The user still correlates, and the address is still recorded on each case.
+        assert _correlate(db, _alert("dave"), hot) == dave
+        values = {
+            r["case_id"]
+            for r in db.execute(
+                "SELECT case_id FROM case_entities WHERE entity_value = '10.0.0.10'"
+            )
+        }
+        assert values == {dave, erin} | first
+        counts = db.execute(
+            "SELECT SUM(alert_count) FROM entity_frequency WHERE entity_value = '10.0.0.10'"
+        ).fetchone()[0]
+        assert counts == 6
+    finally:
+        db.close()
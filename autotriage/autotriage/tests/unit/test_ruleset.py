@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+from autotriage.core.ruleset import RULE_FILES, RuleSetStore, compile_ruleset
+
+RULES_DIR = Path(__file__).resolve().parents[2] / "rules"
+
+
+def test_ruleset_reloads_on_change_and_keeps_last_good(tmp_path: Path) -> None:
+    for name in RULE_FILES:
+        shutil.copy(RULES_DIR / name, tmp_path / name)
+    store = RuleSetStore(tmp_path, check_interval_s=0)
+    first = store.current()
+    assert first.version == compile_ruleset(RULES_DIR).version
+    assert store.current() is first
+
+    routing = tmp_path / "routing.yml"
+    routing.write_text("default_queue: overflow\nrules: []\n", encoding="utf-8")
+    second = store.current()
+    assert second.version != first.version
+    assert second.routing.default_queue == "overflow"
+    assert second.scoring == first.scoring
+
+    routing.write_text("rules: [unclosed\n", encoding="utf-8")
+    assert store.current() is second
+
+    routing.write_text("default_queue: overflow\nrules: []\n", encoding="utf-8")
+    store.request_reload()
+    assert store.current().version == second.version
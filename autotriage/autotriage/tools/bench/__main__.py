@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import typer
+
+from autotriage.tools.bench import api, dedup, enrich, pipeline
+
+# Every area's benchmarks as one command line. Each area module also runs on its own, e.g.
+# python -m autotriage.tools.bench.enrich burst.
+app = typer.Typer(add_completion=False)
+for area in (pipeline, enrich, dedup, api):
+    app.add_typer(area.app)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,472 @@
+from __future__ import annotations
+
+import json
+import random
+import sqlite3
+import statistics
+import threading
+import time
+from datetime import UTC, datetime
+from functools import partial
+from typing import Any
+
+import typer
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from autotriage.app.main import create_app
+from autotriage.app.routes.ingest import _compute_idempotency_key, _decode_payload
+from autotriage.config import load_effective_config
+from autotriage.core.pipeline.orchestrator import process_ingest_many
+from autotriage.storage.db import unit_of_work
+from autotriage.storage.repositories.alerts_repo import AlertsRepository
+from autotriage.storage.repositories.case_snapshots_repo import CaseSnapshotsRepository
+from autotriage.storage.repositories.cases_repo import CasesRepository
+from autotriage.storage.repositories.events_repo import EventsRepository
+from autotriage.storage.views.aggregates import overview as overview_stats
+from autotriage.storage.views.aggregates import overview_series
+from autotriage.tools.alert_generator import generate_alerts
+from autotriage.tools.bench.common import emit, parse_sizes, scratch_db
+
+app = typer.Typer(add_completion=False)
+
+
+def _webhook_before(body: bytes, keyed: bool) -> str:
+    # The webhook's JSON work before it kept the body: parse (request.json()), hash the
+    # canonical form when no Idempotency-Key came, and encode the payload again for raw_json.
+    payload = json.loads(body)
+    if not keyed:
+        _compute_idempotency_key(payload)
+    return json.dumps(payload)
+
+
+def _webhook_after(body: bytes, keyed: bool) -> str:
+    text, payload = _decode_payload(body)
+    if not keyed:
+        _compute_idempotency_key(payload)
+    return text
+
+
+@app.command()
+def webhook(n: int = 5000, seed: int = 1337, repeat: int = 5) -> None:
+    # JSON work per webhook request, with and without an Idempotency-Key header: parsing and
+    # re-encoding the payload for raw_json versus storing the body as received.
+    bodies = [line.encode("utf-8") for line in generate_alerts(n, seed=seed)]
+    for keyed in (True, False):
+        for variant, run in (("reencoded", _webhook_before), ("as_received", _webhook_after)):
+            timings: list[float] = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                for body in bodies:
+                    run(body, keyed)
+                timings.append(time.perf_counter() - t0)
+            emit(
+                {
+                    "bench": "webhook",
+                    "variant": variant,
+                    "idempotency_key_header": keyed,
+                    "n": n,
+                    "us_per_request": round(min(timings) / n * 1e6, 2),
+                }
+            )
+
+
+_SEARCH_TITLES = ("Suspicious login", "Impossible travel", "Malware beacon", "Password spray")
+
+
+# Legacy case search, kept here for comparison with the FTS5 index.
+_LIKE_SEARCH = """
+    SELECT case_id, created_at, severity, decision, queue, summary FROM cases
+    WHERE summary LIKE ? OR case_id LIKE ? OR EXISTS (
+      SELECT 1 FROM case_entities ce WHERE ce.case_id = cases.case_id AND ce.entity_value LIKE ?
+    )
+    ORDER BY created_at DESC LIMIT 200
+"""
+
+
+@app.command()
+def search(sizes: str = "100000,1000000", queries: int = 10, every_s: int = 3) -> None:
+    # Dashboard case search against `size` cases with three entities each: the old LIKE scan
+    # versus the FTS5 index. Query kinds: an exact entity held by one case, a host prefix held
+    # by about a hundred, a title word held by a quarter of all cases, and a term nothing holds.
+    for size in parse_sizes(sizes):
+        rng = random.Random(size)
+        now = int(time.time())
+        with scratch_db() as db:
+            t0 = time.perf_counter()
+            # Entities first, so the case insert trigger indexes each case once, complete.
+            db.execute("PRAGMA foreign_keys = OFF")
+            db.executemany(
+                "INSERT INTO case_entities (case_id, entity_type, entity_value) VALUES (?, ?, ?)",
+                (
+                    (f"c{i}", kind, value)
+                    for i in range(size)
+                    for kind, value in (
+                        ("user", f"user-{i}"),
+                        ("host", f"ws-{i // 3}"),
+                        ("src_ip", f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"),
+                    )
+                ),
+            )
+            db.executemany(
+                "INSERT INTO cases (case_id, created_at, updated_at, severity, confidence,"
+                " decision, queue, summary, score_json, routing_json)"
+                " VALUES (?, ?, ?, 10, 0.5, 'CREATE_TICKET', 'triage', ?, '{}', '{}')",
+                (
+                    (f"c{i}", ts, ts, f"{_SEARCH_TITLES[i % 4]} on ws-{i // 3}")
+                    for i in range(size)
+                    for ts in [
+                        datetime.fromtimestamp(now - (size - i) * every_s, tz=UTC).isoformat()
+                    ]
+                ),
+            )
+            db.commit()
+            db.execute("PRAGMA foreign_keys = ON")
+            load_s = time.perf_counter() - t0
+            kinds: dict[str, list[str]] = {
+                "entity": [f"user-{rng.randrange(size)}" for _ in range(queries)],
+                "prefix": [f"ws-{rng.randrange(size // 300) or 1}" for _ in range(queries)],
+                "word": [rng.choice(("travel", "beacon", "spray")) for _ in range(queries)],
+                "miss": [f"nomatch-{i}" for i in range(queries)],
+            }
+            repo = CasesRepository(db)
+            for kind, terms in kinds.items():
+                for variant in ("like", "fts"):
+                    rows = 0
+                    latencies: list[float] = []
+                    for term in terms:
+                        t0 = time.perf_counter()
+                        if variant == "like":
+                            pattern = f"%{term}%"
+                            rows += len(
+                                db.execute(_LIKE_SEARCH, (pattern, pattern, pattern)).fetchall()
+                            )
+                        else:
+                            rows += len(repo.list_cases(None, None, None, None, term).items)
+                        latencies.append(time.perf_counter() - t0)
+                    latencies.sort()
+                    emit(
+                        {
+                            "bench": "search",
+                            "variant": variant,
+                            "query": kind,
+                            "cases": size,
+                            "load_s": round(load_s, 1),
+                            "rows": rows,
+                            "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+                            "max_ms": round(latencies[-1] * 1000, 2),
+                        }
+                    )
+
+
+# The queries /api/overview ran before the rollups, kept here for comparison.
+_COUNT_OVERVIEW = (
+    "SELECT COUNT(*) FROM alerts WHERE received_at >= ?",
+    "SELECT COUNT(*) FROM events WHERE stage = 'deduped' AND created_at >= ?",
+    "SELECT COUNT(*) FROM cases WHERE created_at >= ?",
+    "SELECT COUNT(*) FROM cases WHERE decision = 'AUTO_CLOSE' AND created_at >= ?",
+    "SELECT COUNT(*) FROM tickets WHERE created_at >= ?",
+    "SELECT COUNT(*) FROM events WHERE stage = 'failed' AND created_at >= ?",
+)
+
+
+def _count_overview(db: sqlite3.Connection, since: str) -> list[int]:
+    return [int(db.execute(sql, (since,)).fetchone()[0]) for sql in _COUNT_OVERVIEW]
+
+
+@app.command()
+def overview(sizes: str = "100000,1000000", days: int = 7, repeat: int = 10) -> None:
+    # /api/overview cost against `size` alerts spread over `days`, with as many events, a
+    # case per four alerts and a ticket per twenty: the six COUNT queries versus the rollups.
+    now = time.time()
+
+    def stamp(i: int, n: int) -> str:
+        return datetime.fromtimestamp(now - days * 86400 * (n - i) / n, tz=UTC).isoformat()
+
+    for size in parse_sizes(sizes):
+        with scratch_db() as db:
+            t0 = time.perf_counter()
+            db.execute("PRAGMA foreign_keys = OFF")
+            db.executemany(
+                "INSERT INTO alerts (ingest_id, idempotency_key, received_at, updated_at, vendor,"
+                " raw_json, status) VALUES (?, ?, ?, ?, 'bench', '{}', 'processed')",
+                ((f"a{i}", f"a{i}", ts, ts) for i in range(size) for ts in [stamp(i, size)]),
+            )
+            db.executemany(
+                "INSERT INTO events (event_id, created_at, stage, ingest_id, case_id, payload_json)"
+                " VALUES (?, ?, ?, ?, NULL, '{}')",
+                (
+                    (
+                        f"e{i}",
+                        stamp(i, size),
+                        ("processed", "deduped", "scored", "failed")[i % 4],
+                        f"a{i}",
+                    )
+                    for i in range(size)
+                ),
+            )
+            db.executemany(
+                "INSERT INTO cases (case_id, created_at, updated_at, severity, confidence,"
+                " decision, queue, summary, score_json, routing_json)"
+                " VALUES (?, ?, ?, 10, 0.5, ?, 'triage', 'bench', '{}', '{}')",
+                (
+                    (f"c{i}", ts, ts, ("AUTO_CLOSE", "CREATE_TICKET")[i % 2])
+                    for i in range(size // 4)
+                    for ts in [stamp(i, size // 4)]
+                ),
+            )
+            db.executemany(
+                "INSERT INTO tickets (ticket_id, case_id, created_at, url, payload_json)"
+                " VALUES (?, ?, ?, 'http://tickets', '{}')",
+                ((f"t{i}", f"c{i}", stamp(i, size // 20)) for i in range(size // 20)),
+            )
+            db.commit()
+            db.execute("PRAGMA foreign_keys = ON")
+            load_s = time.perf_counter() - t0
+            for window in ("24h", "7d"):
+                window_s = 86400 if window == "24h" else 7 * 86400
+                since = datetime.fromtimestamp(now - window_s, tz=UTC).isoformat()
+                variants: dict[str, Any] = {
+                    "count": partial(_count_overview, db, since),
+                    "rollups": partial(overview_stats, db, window_s),
+                    "rollups_series": partial(overview_series, db, window_s),
+                    "rollups_series_hourly": partial(overview_series, db, window_s, 3600),
+                }
+                for variant, run in variants.items():
+                    timings: list[float] = []
+                    for _ in range(repeat):
+                        t0 = time.perf_counter()
+                        run()
+                        timings.append(time.perf_counter() - t0)
+                    emit(
+                        {
+                            "bench": "overview",
+                            "variant": variant,
+                            "window": window,
+                            "alerts": size,
+                            "load_s": round(load_s, 1),
+                            "p50_ms": round(statistics.median(timings) * 1000, 2),
+                        }
+                    )
+
+
+def _rebuilt_case_detail(db: sqlite3.Connection, case_id: str) -> dict[str, Any]:
+    # How the case view was assembled before snapshots: five queries, every event decoded.
+    case = dict(db.execute("SELECT * FROM cases WHERE case_id = ?", (case_id,)).fetchone())
+    timeline = []
+    enrichments: dict[str, Any] = {}
+    for r in db.execute(
+        "SELECT * FROM events WHERE case_id = ? ORDER BY created_at ASC", (case_id,)
+    ).fetchall():
+        ev = dict(r)
+        ev["payload"] = json.loads(str(ev["payload_json"]))
+        timeline.append(ev)
+        if ev["stage"] == "enriched":
+            enrichments = ev["payload"].get("enrichments") or enrichments
+    nodes = [
+        dict(r)
+        for r in db.execute("SELECT * FROM case_entities WHERE case_id = ?", (case_id,)).fetchall()
+    ]
+    edges = [
+        dict(r)
+        for r in db.execute("SELECT * FROM case_edges WHERE case_id = ?", (case_id,)).fetchall()
+    ]
+    ticket = db.execute("SELECT * FROM tickets WHERE case_id = ?", (case_id,)).fetchone()
+    return {
+        "case": case,
+        "timeline": timeline,
+        "graph": {"nodes": nodes, "edges": edges},
+        "ticket": dict(ticket) if ticket else None,
+        "enrichments": enrichments,
+        "scoring": json.loads(str(case["score_json"])),
+        "routing": json.loads(str(case["routing_json"])),
+    }
+
+
+def _snapshot_case_detail(db: sqlite3.Connection, case_id: str) -> dict[str, Any]:
+    doc = CaseSnapshotsRepository(db).get(case_id) or {}
+    page = EventsRepository(db).case_timeline(case_id)
+    return {**doc, "timeline": page.items, "timeline_next_cursor": page.next_cursor}
+
+
+@app.command()
+def casedetail(sizes: str = "10,100,1000", repeat: int = 20) -> None:
+    # Case view cost for a case `size` alerts correlated into (about eight events each):
+    # rebuilt from its rows and every event versus the snapshot and the first timeline page.
+    for size in parse_sizes(sizes):
+        with scratch_db() as db:
+            repo = AlertsRepository(db)
+            for i in range(size):
+                repo.insert_or_get_ingest(
+                    idempotency_key=f"bench-{i}",
+                    received_at=datetime.now(tz=UTC),
+                    raw_payload={
+                        "vendor": "vendor_a",
+                        "time": "2025-01-01T00:00:00Z",
+                        "rule": f"R-{i}",
+                        "title": f"Suspicious login {i}",
+                        "severity": 7,
+                        "src_ip": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+                        "user": "alice",
+                        "host": f"workstation-{i % 50}",
+                    },
+                )
+            while rows := repo.claim_batch(64, owner="bench"):
+                items = [(str(r["ingest_id"]), json.loads(str(r["raw_json"]))) for r in rows]
+                process_ingest_many(db, items, cfg=load_effective_config(), owner="bench")
+                repo.mark_processed_many([str(r["ingest_id"]) for r in rows], "bench")
+            case_id = str(db.execute("SELECT case_id FROM cases").fetchone()[0])
+            events = int(
+                db.execute("SELECT COUNT(*) FROM events WHERE case_id = ?", (case_id,)).fetchone()[
+                    0
+                ]
+            )
+            variants = {"rebuilt": _rebuilt_case_detail, "snapshot": _snapshot_case_detail}
+            for variant, run in variants.items():
+                timings: list[float] = []
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    run(db, case_id)
+                    timings.append(time.perf_counter() - t0)
+                emit(
+                    {
+                        "bench": "casedetail",
+                        "variant": variant,
+                        "alerts": size,
+                        "events": events,
+                        "p50_ms": round(statistics.median(timings) * 1000, 2),
+                    }
+                )
+            # What finalizing one more alert on the case spends on its snapshot, inside the
+            # batch's write transaction: a new entity and edge, then the refresh.
+            snapshots = CaseSnapshotsRepository(db)
+            timings = []
+            for r in range(repeat):
+                with unit_of_work(db):
+                    db.execute(
+                        "INSERT INTO case_entities (case_id, entity_type, entity_value)"
+                        " VALUES (?, 'host', ?)",
+                        (case_id, f"extra-{r}"),
+                    )
+                    db.execute(
+                        "INSERT INTO case_edges"
+                        " (case_id, src_type, src_value, dst_type, dst_value, edge_type)"
+                        " VALUES (?, 'user', 'alice', 'host', ?, 'seen_with')",
+                        (case_id, f"extra-{r}"),
+                    )
+                    db.execute(
+                        "UPDATE cases SET updated_at = ? WHERE case_id = ?",
+                        (datetime.now(tz=UTC).isoformat(), case_id),
+                    )
+                    t0 = time.perf_counter()
+                    snapshots.refresh(case_id)
+                    timings.append(time.perf_counter() - t0)
+            emit(
+                {
+                    "bench": "casedetail",
+                    "variant": "refresh",
+                    "alerts": size,
+                    "events": events,
+                    "p50_ms": round(statistics.median(timings) * 1000, 2),
+                }
+            )
+
+
+@app.command()
+def viewers(
+    counts: str = "1,10,30",
+    seconds: float = 3.0,
+    poll_ms: float = 250.0,
+    write_ms: float = 500.0,
+    n: int = 300,
+    seed: int = 1337,
+) -> None:
+    # Dashboard viewers polling /api/overview and /api/cases while alerts keep arriving, without
+    # and with the response cache: requests served, pool checkouts (route runs that touched the
+    # database) and request latency.
+    payloads = [json.loads(line) for line in generate_alerts(n, seed=seed)]
+    for ttl in ("0", "5"):
+        for count in parse_sizes(counts):
+            with scratch_db(AUTOTRIAGE_RESPONSE_CACHE_TTL_SECONDS=ttl) as db:
+                repo = AlertsRepository(db)
+                for i, payload in enumerate(payloads):
+                    repo.insert_or_get_ingest(
+                        idempotency_key=f"bench-{i}",
+                        received_at=datetime.now(tz=UTC),
+                        raw_payload=payload,
+                    )
+                process_ingest_many(
+                    db,
+                    [
+                        (str(r["ingest_id"]), json.loads(str(r["raw_json"])))
+                        for r in repo.claim_batch(n, owner="bench")
+                    ],
+                    cfg=load_effective_config(),
+                    atomic=True,
+                    owner="bench",
+                )
+                stop = threading.Event()
+                latencies: list[float] = []
+                with TestClient(create_app()) as client:
+                    checkouts = _pool_checkouts()
+                    threads = [
+                        threading.Thread(
+                            target=_view, args=(client, stop, latencies, poll_ms / 1000)
+                        )
+                        for _ in range(count)
+                    ]
+                    threads.append(
+                        threading.Thread(
+                            target=_trickle, args=(repo, stop, payloads, write_ms / 1000)
+                        )
+                    )
+                    for thread in threads:
+                        thread.start()
+                    time.sleep(seconds)
+                    stop.set()
+                    for thread in threads:
+                        thread.join()
+                    checkouts = _pool_checkouts() - checkouts
+            latencies.sort()
+            emit(
+                {
+                    "bench": "viewers",
+                    "cache_ttl_s": float(ttl),
+                    "viewers": count,
+                    "requests": len(latencies),
+                    "db_checkouts_per_s": round(checkouts / seconds, 1),
+                    "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+                    "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+                }
+            )
+
+
+def _view(client: TestClient, stop: threading.Event, latencies: list[float], poll_s: float) -> None:
+    # One dashboard tab: the overview cards and chart, then the case list, every poll_s.
+    while not stop.is_set():
+        for path in ("/api/overview?window=24h&series=true&step=3600", "/api/cases?time_range=24h"):
+            t0 = time.perf_counter()
+            client.get(path)
+            latencies.append(time.perf_counter() - t0)
+        stop.wait(poll_s)
+
+
+def _trickle(
+    repo: AlertsRepository, stop: threading.Event, payloads: list[dict[str, Any]], interval_s: float
+) -> None:
+    i = 0
+    while not stop.wait(interval_s):
+        i += 1
+        repo.insert_or_get_ingest(
+            idempotency_key=f"bench-late-{i}",
+            received_at=datetime.now(tz=UTC),
+            raw_payload=payloads[i % len(payloads)],
+        )
+
+
+def _pool_checkouts() -> float:
+    return REGISTRY.get_sample_value("autotriage_db_pool_checkout_seconds_count") or 0.0
+
+
+if __name__ == "__main__":
+    app()
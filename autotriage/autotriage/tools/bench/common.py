@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import typer
+
+from autotriage.storage.db import close_pools, get_db, init_db
+
+
+def emit(row: dict[str, Any]) -> None:
+    typer.echo(json.dumps(row, separators=(",", ":")))
+
+
+def parse_sizes(spec: str) -> list[int]:
+    return [int(s) for s in spec.split(",") if s.strip()]
+
+
+@contextmanager
+def patched_env(**values: str) -> Iterator[None]:
+    previous = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@contextmanager
+def scratch_db(**env: str) -> Iterator[sqlite3.Connection]:
+    with (
+        tempfile.TemporaryDirectory(prefix="autotriage-bench-") as tmp,
+        patched_env(AUTOTRIAGE_DB_PATH=str(Path(tmp) / "bench.db"), **env),
+    ):
+        init_db()
+        db = get_db()
+        try:
+            yield db
+        finally:
+            db.close()
+            close_pools()
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import json
+import random
+import time
+from datetime import UTC, datetime
+
+import typer
+
+from autotriage.core.correlate.index import EntityCaseIndex
+from autotriage.core.dedup.deduper import find_duplicate_of, record_fingerprint
+from autotriage.core.dedup.index import FingerprintIndex
+from autotriage.core.fingerprint.strategies import STRATEGIES, Fingerprint, compute_fingerprint
+from autotriage.core.normalize.registry import normalize
+from autotriage.storage.db import unit_of_work
+from autotriage.storage.repositories.case_entities_repo import CaseEntitiesRepository
+from autotriage.tools.alert_generator import generate_alerts
+from autotriage.tools.bench.common import emit, parse_sizes, scratch_db
+
+app = typer.Typer(add_completion=False)
+
+
+@app.command()
+def fingerprint(n: int = 20_000, seed: int = 1337, repeat: int = 5) -> None:
+    # Fingerprints per second for each registered strategy over the same normalized alerts
+    # (best of `repeat` runs).
+    alerts = [normalize(json.loads(line)).alert for line in generate_alerts(n, seed=seed)]
+    for name in STRATEGIES:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for alert in alerts:
+                compute_fingerprint(alert, 600, strategy=name)
+            best = min(best, time.perf_counter() - t0)
+        emit({"bench": "fingerprint", "strategy": name, "n": n, "hashes_per_s": round(n / best)})
+
+
+@app.command()
+def dedup(n: int = 5000, existing: int = 200_000, batch_size: int = 64, window: int = 600) -> None:
+    # Per-alert cost of the fingerprint stage's lookup and write against a table that already
+    # holds `existing` fingerprints: SQL lookup per alert versus the in-memory index.
+    rng = random.Random(1)
+    now = int(time.time())
+    current = datetime.fromtimestamp(now // window * window, tz=UTC)
+    fps = [
+        Fingerprint(
+            strategy="default", fp_hash=f"{rng.randrange(n // 4):064x}", window_start=current
+        )
+        for _ in range(n)
+    ]
+    for indexed in (False, True):
+        with scratch_db() as db:
+            db.execute("PRAGMA foreign_keys=OFF")
+            db.executemany(
+                "INSERT INTO fingerprints (ingest_id, created_at, strategy, fp_hash, window_start)"
+                " VALUES (?, datetime('now'), 'default', ?, ?)",
+                (
+                    (
+                        f"old-{i}",
+                        f"{rng.randrange(existing):064x}",
+                        datetime.fromtimestamp(now - (i % 288) * window, tz=UTC).isoformat(),
+                    )
+                    for i in range(existing)
+                ),
+            )
+            db.commit()
+            index = FingerprintIndex(window, bloom_bits=1 << 20)
+            t0 = time.perf_counter()
+            if indexed:
+                index.warm(db)
+            warm_ms = (time.perf_counter() - t0) * 1000
+            statements = 0
+
+            def trace(statement: str) -> None:
+                nonlocal statements
+                statements += 1
+
+            db.set_trace_callback(trace)
+            duplicates = 0
+            t0 = time.perf_counter()
+            for start in range(0, n, batch_size):
+                with unit_of_work(db):
+                    for i in range(start, min(n, start + batch_size)):
+                        if indexed:
+                            dup_of = index.check_and_record(db, f"new-{i}", fps[i])
+                        else:
+                            dup_of = find_duplicate_of(db, fps[i])
+                            record_fingerprint(db, f"new-{i}", fps[i])
+                        duplicates += dup_of is not None
+            elapsed = time.perf_counter() - t0
+            db.set_trace_callback(None)
+        emit(
+            {
+                "bench": "dedup",
+                "index": indexed,
+                "n": n,
+                "existing": existing,
+                "duplicates": duplicates,
+                "warm_ms": round(warm_ms, 1),
+                "us_per_alert": round(elapsed / max(n, 1) * 1e6, 1),
+                "statements_per_alert": round(statements / max(n, 1), 2),
+            }
+        )
+
+
+@app.command()
+def correlate(
+    sizes: str = "10000,100000,1000000", lookups: int = 2000, every_s: int = 3, window: int = 3600
+) -> None:
+    # Latency of the correlation lookup against `size` historical cases, one created every
+    # `every_s` seconds with three entities each: SQL without the entity index (the old
+    # schema), SQL with it, and the in-memory entity index. Lookups draw from recent entities,
+    # so most of them find a case.
+    for size in parse_sizes(sizes):
+        rng = random.Random(size)
+        now = int(time.time())
+        with scratch_db() as db:
+            # Entities first, so the case insert trigger indexes each case for search once.
+            db.execute("PRAGMA foreign_keys = OFF")
+            db.executemany(
+                "INSERT INTO case_entities (case_id, entity_type, entity_value) VALUES (?, ?, ?)",
+                (
+                    (f"c{i}", kind, f"{kind}-{(i * 7 + k) // 5}")
+                    for i in range(size)
+                    for k, kind in enumerate(("user", "host", "src_ip"))
+                ),
+            )
+            db.executemany(
+                "INSERT INTO cases (case_id, created_at, updated_at, severity, confidence,"
+                " decision, queue, summary, score_json, routing_json)"
+                " VALUES (?, ?, ?, 10, 0.5, 'CREATE_TICKET', 'triage', 'bench', '{}', '{}')",
+                (
+                    (f"c{i}", ts, ts)
+                    for i in range(size)
+                    for ts in [
+                        datetime.fromtimestamp(now - (size - i) * every_s, tz=UTC).isoformat()
+                    ]
+                ),
+            )
+            db.commit()
+            db.execute("PRAGMA foreign_keys = ON")
+            recent = max(1, window // every_s)
+            probes = [
+                [(kind, f"{kind}-{(i * 7 + k) // 5}") for k, kind in enumerate(("host", "user"))]
+                for i in (size - 1 - rng.randrange(recent * 2) for _ in range(lookups))
+            ]
+            since = datetime.fromtimestamp(now - window, tz=UTC)
+            repo = CaseEntitiesRepository(db)
+            for variant in ("sql_no_index", "sql", "memory"):
+                if variant == "sql_no_index":
+                    db.execute("DROP INDEX idx_case_entities_entity")
+                elif variant == "sql":
+                    db.execute(
+                        "CREATE INDEX idx_case_entities_entity"
+                        " ON case_entities(entity_type, entity_value, case_id)"
+                    )
+                index = EntityCaseIndex(window)
+                t0 = time.perf_counter()
+                if variant == "memory":
+                    # Warms from the table, with the same horizon as the lookups below.
+                    index.find(db, [], since)
+                warm_ms = (time.perf_counter() - t0) * 1000
+                hits = 0
+                latencies: list[float] = []
+                for pairs in probes:
+                    t0 = time.perf_counter()
+                    if variant == "memory":
+                        hits += index.find(db, pairs, since) is not None
+                    else:
+                        hits += repo.latest_case(pairs, since.isoformat()) is not None
+                    latencies.append(time.perf_counter() - t0)
+                latencies.sort()
+                emit(
+                    {
+                        "bench": "correlate",
+                        "variant": variant,
+                        "cases": size,
+                        "lookups": lookups,
+                        "hits": hits,
+                        "warm_ms": round(warm_ms, 1),
+                        "p50_us": round(latencies[len(latencies) // 2] * 1e6, 1),
+                        "p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 1),
+                    }
+                )
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+import statistics
+import threading
+import time
+from datetime import UTC, datetime
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import typer
+
+from autotriage.config import load_effective_config
+from autotriage.core.models.alert import CanonicalAlert
+from autotriage.core.models.entities import Entity, EntityType
+from autotriage.core.normalize.registry import normalize
+from autotriage.enrichers.base import BaseEnricher
+from autotriage.enrichers.manager import EnricherManager
+from autotriage.enrichers.registry import EnricherRegistry
+from autotriage.storage.db import get_db
+from autotriage.tools.alert_generator import generate_alerts
+from autotriage.tools.bench.common import emit, scratch_db
+
+app = typer.Typer(add_completion=False)
+
+
+@app.command()
+def enrich(n: int = 500, seed: int = 1337) -> None:
+    # Per-alert enrichment cost when every alert builds its own manager (datasets re-read,
+    # buckets and breakers fresh) versus the process-wide registry, with the SQL statements
+    # each alert costs in cache lookups and writes.
+    cfg = load_effective_config()
+    alerts = [normalize(json.loads(line)).alert for line in generate_alerts(n, seed=seed)]
+    for shared in (False, True):
+        with scratch_db() as db:
+            registry = EnricherRegistry(cfg.data_dir) if shared else None
+            statements = 0
+
+            def trace(statement: str) -> None:
+                nonlocal statements
+                statements += 1
+
+            db.set_trace_callback(trace)
+            t0 = time.perf_counter()
+            for alert in alerts:
+                EnricherManager(
+                    db=db, data_dir=cfg.data_dir, enabled=cfg.enabled_enrichers, registry=registry
+                ).enrich(alert)
+            elapsed = time.perf_counter() - t0
+            db.set_trace_callback(None)
+        emit(
+            {
+                "bench": "enrich",
+                "shared_registry": shared,
+                "n": n,
+                "us_per_alert": round(elapsed / max(n, 1) * 1e6, 1),
+                "statements_per_alert": round(statements / max(n, 1), 2),
+            }
+        )
+
+
+class _SlowStub(BaseEnricher):
+    # Stands in for a network-backed enricher: every lookup sleeps delay_s.
+    def __init__(self, name: str, delay_s: float, *, in_memory: bool) -> None:
+        self.name = name
+        self.delay_s = delay_s
+        self.in_memory = in_memory
+        self.calls = 0
+
+    def keys(self, alert: CanonicalAlert) -> list[str]:
+        return sorted({e.value for e in alert.entities})
+
+    def enrich_one(self, key: str) -> dict[str, Any] | None:
+        self.calls += 1
+        time.sleep(self.delay_s)
+        return {"key": key}
+
+
+@app.command()
+def fanout(n: int = 10, enrichers: int = 3, keys: int = 4, delay_ms: float = 50.0) -> None:
+    # Per-alert enrichment latency with slow lookups run one after another (inline) versus fanned
+    # out on the enrichment thread pool.
+    names = [f"slow_{i}" for i in range(enrichers)]
+    alerts = [
+        CanonicalAlert(
+            vendor="bench",
+            alert_type="bench",
+            ts=datetime.now(tz=UTC),
+            title="bench",
+            severity=10,
+            entities=[Entity(type=EntityType.user, value=f"u{i}-{k}") for k in range(keys)],
+            raw={},
+        )
+        for i in range(n)
+    ]
+    for concurrent in (False, True):
+        with scratch_db() as db:
+            registry = EnricherRegistry(
+                Path("."),
+                factories={
+                    name: partial(_slow_stub, name, delay_ms / 1000, not concurrent)
+                    for name in names
+                },
+            )
+            mgr = EnricherManager(db=db, data_dir=Path("."), enabled=names, registry=registry)
+            latencies = []
+            for alert in alerts:
+                t0 = time.perf_counter()
+                mgr.enrich(alert)
+                latencies.append(time.perf_counter() - t0)
+        emit(
+            {
+                "bench": "fanout",
+                "concurrent": concurrent,
+                "lookups_per_alert": enrichers * keys,
+                "delay_ms": delay_ms,
+                "p50_alert_ms": round(statistics.median(latencies) * 1000, 1),
+            }
+        )
+
+
+@app.command()
+def burst(threads: int = 32, keys: int = 4, delay_ms: float = 50.0) -> None:
+    # A burst of alerts sharing their entities, enriched at once from many threads: backend
+    # lookups and wall time with every caller looking up for itself (the stub run inline)
+    # versus single-flight lookups on the enrichment pool.
+    entities = [Entity(type=EntityType.src_ip, value=f"10.0.0.{k}") for k in range(keys)]
+    alert = CanonicalAlert(
+        vendor="bench",
+        alert_type="bench",
+        ts=datetime.now(tz=UTC),
+        title="bench",
+        severity=10,
+        entities=entities,
+        raw={},
+    )
+    for single_flight in (False, True):
+        stub = _SlowStub("burst", delay_ms / 1000, in_memory=not single_flight)
+        stub.rate_limit_per_minute = 100_000
+        with scratch_db():
+            elapsed = _burst_once(stub, alert, threads)
+        emit(
+            {
+                "bench": "burst",
+                "single_flight": single_flight,
+                "alerts": threads,
+                "distinct_keys": keys,
+                "backend_lookups": stub.calls,
+                "wall_ms": round(elapsed * 1000, 1),
+            }
+        )
+
+
+def _burst_once(stub: _SlowStub, alert: CanonicalAlert, threads: int) -> float:
+    registry = EnricherRegistry(Path("."), factories={stub.name: lambda _: stub}, l1_size=0)
+    start = threading.Barrier(threads)
+
+    def run() -> None:
+        db = get_db()
+        try:
+            mgr = EnricherManager(db=db, data_dir=Path("."), enabled=[stub.name], registry=registry)
+            start.wait()
+            mgr.enrich(alert)
+        finally:
+            db.close()
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - t0
+
+
+def _slow_stub(name: str, delay_s: float, in_memory: bool, data_dir: Path) -> BaseEnricher:
+    return _SlowStub(name, delay_s, in_memory=in_memory)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import statistics
+import threading
+import time
+from contextlib import suppress
+from datetime import UTC, datetime
+from typing import Any
+
+import typer
+
+from autotriage.config import load_effective_config
+from autotriage.core.pipeline.orchestrator import process_ingest_many
+from autotriage.doorbell import doorbell_dir, ring
+from autotriage.storage.db import get_pool, unit_of_work
+from autotriage.storage.repositories.alerts_repo import AlertsRepository
+from autotriage.tools.alert_generator import generate_alerts
+from autotriage.tools.bench.common import emit, parse_sizes, scratch_db
+from autotriage.util import codec as json_codec
+from autotriage.worker import worker_loop
+from autotriage.worker_pool import run_worker_pool
+
+app = typer.Typer(add_completion=False)
+
+
+@app.command()
+def pipeline(n: int = 500, batch_sizes: str = "1,64", seed: int = 1337) -> None:
+    # Commits per alert and alerts/s with repository-level commits (atomic=False) versus one
+    # unit of work per batch (atomic=True).
+    payloads = [json.loads(line) for line in generate_alerts(n, seed=seed)]
+    for atomic in (False, True):
+        for batch_size in parse_sizes(batch_sizes):
+            with scratch_db() as db:
+                cfg = load_effective_config()
+                repo = AlertsRepository(db)
+                for i, payload in enumerate(payloads):
+                    repo.insert_or_get_ingest(
+                        idempotency_key=f"bench-{i}",
+                        received_at=datetime.now(tz=UTC),
+                        raw_payload=payload,
+                    )
+
+                commits = 0
+
+                def trace(statement: str) -> None:
+                    nonlocal commits
+                    if statement.strip().upper() == "COMMIT":
+                        commits += 1
+
+                db.set_trace_callback(trace)
+                t0 = time.perf_counter()
+                while rows := repo.claim_batch(batch_size, owner="bench"):
+                    items = [(str(r["ingest_id"]), json.loads(str(r["raw_json"]))) for r in rows]
+                    outcome = process_ingest_many(db, items, cfg=cfg, atomic=atomic, owner="bench")
+                    repo.mark_processed_many([st.ingest_id for st in outcome.processed], "bench")
+                elapsed = time.perf_counter() - t0
+                db.set_trace_callback(None)
+
+            emit(
+                {
+                    "bench": "pipeline",
+                    "atomic": atomic,
+                    "batch_size": batch_size,
+                    "n": n,
+                    "commits_per_alert": round(commits / max(n, 1), 2),
+                    "alerts_per_s": round(n / max(elapsed, 1e-9), 1),
+                }
+            )
+
+
+def _time_write_lock(stop: threading.Event, waits: list[float]) -> None:
+    with get_pool().connection() as db:
+        db.execute("PRAGMA busy_timeout = 60000")
+        while not stop.wait(0.01):
+            t0 = time.perf_counter()
+            db.execute("BEGIN IMMEDIATE")
+            waits.append(time.perf_counter() - t0)
+            db.rollback()
+
+
+@app.command()
+def workers(
+    n: int = 2000, counts: str = "1,2,4", transaction_sizes: str = "64,16", seed: int = 1337
+) -> None:
+    # Alerts/s for a backlog drained by 1, 2 and 4 worker processes claiming up to 64 alerts at a
+    # time, committing each claimed batch as one transaction versus in sub-batches of 16, and how
+    # long another writer (a webhook insert, a lease heartbeat) waits for the write lock meanwhile.
+    payloads = [json.loads(line) for line in generate_alerts(n, seed=seed)]
+    for transaction_size in parse_sizes(transaction_sizes):
+        for count in parse_sizes(counts):
+            env = {"AUTOTRIAGE_WORKER_TRANSACTION_SIZE": str(transaction_size)}
+            with scratch_db(**env) as db:
+                stop = threading.Event()
+                pool = threading.Thread(
+                    target=run_worker_pool,
+                    args=(count,),
+                    kwargs={"batch_size": 64, "stats_interval_s": 3600.0, "stop": stop},
+                )
+                pool.start()
+                sock_dir = doorbell_dir(load_effective_config().db_path)
+                while len(list(sock_dir.glob("*.sock"))) < count:
+                    time.sleep(0.05)
+
+                repo = AlertsRepository(db)
+                with unit_of_work(db):
+                    for i, payload in enumerate(payloads):
+                        repo.insert_or_get_ingest(
+                            idempotency_key=f"bench-{i}",
+                            received_at=datetime.now(tz=UTC),
+                            raw_payload=payload,
+                        )
+                waits: list[float] = []
+                drained = threading.Event()
+                t0 = time.perf_counter()
+                ring()
+                other = threading.Thread(target=_time_write_lock, args=(drained, waits))
+                other.start()
+                unsettled = (
+                    "SELECT COUNT(*) FROM alerts WHERE status NOT IN ('processed', 'failed')"
+                )
+                while db.execute(unsettled).fetchone()[0]:
+                    time.sleep(0.05)
+                elapsed = time.perf_counter() - t0
+                drained.set()
+                other.join()
+                stop.set()
+                pool.join()
+
+            emit(
+                {
+                    "bench": "workers",
+                    "transaction_size": transaction_size,
+                    "workers": count,
+                    "n": n,
+                    "alerts_per_s": round(n / max(elapsed, 1e-9), 1),
+                    "p99_lock_wait_ms": round(
+                        statistics.quantiles(waits, n=100, method="inclusive")[98] * 1000, 1
+                    ),
+                    "max_lock_wait_ms": round(max(waits) * 1000, 1),
+                }
+            )
+
+
+@app.command()
+def wakeup(n: int = 50, interval_ms: float = 100.0, idle_s: float = 3.0, seed: int = 1337) -> None:
+    # Ingest-to-processed latency for a trickle of alerts, and worker CPU while the queue is
+    # empty, with fixed 250 ms polling versus the doorbell.
+    payloads = [json.loads(line) for line in generate_alerts(n, seed=seed)]
+
+    async def trickle(db: sqlite3.Connection) -> tuple[float, list[float]]:
+        worker = asyncio.create_task(worker_loop())
+        await asyncio.sleep(0.5)
+        cpu0 = time.process_time()
+        await asyncio.sleep(idle_s)
+        idle_cpu = (time.process_time() - cpu0) / idle_s
+
+        repo = AlertsRepository(db)
+        for i, payload in enumerate(payloads):
+            repo.insert_or_get_ingest(
+                idempotency_key=f"bench-{i}",
+                received_at=datetime.now(tz=UTC),
+                raw_payload=payload,
+            )
+            ring()
+            await asyncio.sleep(interval_ms / 1000)
+        while repo.count_pending(limit=1):
+            await asyncio.sleep(0.05)
+        latencies = [
+            (datetime.fromisoformat(str(r[1])) - datetime.fromisoformat(str(r[0]))).total_seconds()
+            for r in db.execute(
+                "SELECT received_at, processed_at FROM alerts WHERE processed_at IS NOT NULL"
+            )
+        ]
+        worker.cancel()
+        with suppress(asyncio.CancelledError):
+            await worker
+        return idle_cpu, latencies
+
+    for doorbell in (False, True):
+        with scratch_db(AUTOTRIAGE_WORKER_DOORBELL="1" if doorbell else "0") as db:
+            idle_cpu, latencies = asyncio.run(trickle(db))
+        emit(
+            {
+                "bench": "wakeup",
+                "doorbell": doorbell,
+                "n": n,
+                "idle_cpu_ms_per_s": round(idle_cpu * 1000, 2),
+                "p50_latency_ms": round(statistics.median(latencies) * 1000, 2),
+            }
+        )
+
+
+@app.command()
+def codec(n: int = 500, seed: int = 1337, repeat: int = 5) -> None:
+    # JSON encode and decode time per alert over what the pipeline and the case view write and
+    # read for it (raw payload, its events, its case's score, routing and snapshot), with the
+    # stdlib json module versus util.codec.
+    payloads = [json.loads(line) for line in generate_alerts(n, seed=seed)]
+    with scratch_db() as db:
+        repo = AlertsRepository(db)
+        for i, payload in enumerate(payloads):
+            repo.insert_or_get_ingest(
+                idempotency_key=f"bench-{i}", received_at=datetime.now(tz=UTC), raw_payload=payload
+            )
+        while rows := repo.claim_batch(64, owner="bench"):
+            items = [(str(r["ingest_id"]), json.loads(str(r["raw_json"]))) for r in rows]
+            outcome = process_ingest_many(db, items, cfg=load_effective_config(), owner="bench")
+            repo.mark_processed_many([st.ingest_id for st in outcome.processed], "bench")
+        docs: list[Any] = [json.loads(str(r[0])) for r in db.execute("SELECT raw_json FROM alerts")]
+        for column, table in (
+            ("payload_json", "events"),
+            ("score_json", "cases"),
+            ("routing_json", "cases"),
+            ("doc_json", "case_snapshots"),
+        ):
+            docs.extend(json.loads(str(r[0])) for r in db.execute(f"SELECT {column} FROM {table}"))
+    texts = [json.dumps(doc) for doc in docs]
+    backends: dict[str, tuple[Any, Any]] = {
+        "json": (json.dumps, json.loads),
+        f"codec[{json_codec.BACKEND}]": (json_codec.dumps, json_codec.loads),
+    }
+    for backend, (dumps, loads) in backends.items():
+        encode: list[float] = []
+        decode: list[float] = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for doc in docs:
+                dumps(doc)
+            encode.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            for text in texts:
+                loads(text)
+            decode.append(time.perf_counter() - t0)
+        emit(
+            {
+                "bench": "codec",
+                "backend": backend,
+                "n": n,
+                "documents": len(docs),
+                "encode_us_per_alert": round(min(encode) / n * 1e6, 1),
+                "decode_us_per_alert": round(min(decode) / n * 1e6, 1),
+            }
+        )
+
+
+if __name__ == "__main__":
+    app()
@@ -22,6 +22,7 @@ app = typer.Typer(add_completion=False)
 @dataclass(frozen=True)
 class PerfResult:
     n: int
+    batch_size: int
     ingest_seconds: float
     processing_seconds: float
     cases: int
@@ -63,7 +64,7 @@ def _db_counts(db_path: str) -> tuple[int, int, int]:
 
 
 def _final_result(
-    db_path: str, *, n: int, ingest_seconds: float, processing_seconds: float
+    db_path: str, *, n: int, batch_size: int, ingest_seconds: float, processing_seconds: float
 ) -> PerfResult:
     with sqlite3.connect(db_path) as db:
         db.row_factory = sqlite3.Row
@@ -79,6 +80,7 @@ def _final_result(
 
     return PerfResult(
         n=n,
+        batch_size=batch_size,
         ingest_seconds=ingest_seconds,
         processing_seconds=processing_seconds,
         cases=cases,
@@ -112,17 +114,51 @@ def _payloads(n: int, *, start: datetime) -> list[dict[str, Any]]:
     return out
 
 
-@app.command()
-def main(
-    n: int = 1000,
-    port: int = 18081,
-    seed_db: bool = True,
-    startup_timeout_s: float = 15.0,
-    completion_timeout_s: float = 120.0,
-    max_processing_seconds: float = 120.0,
-    max_deadletters: int = 0,
-    max_failed_events: int = 0,
-) -> None:
+def _spawn(mode: str, env: dict[str, str], port: int, workers: int = 1) -> subprocess.Popen[bytes]:
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "autotriage.cli.main",
+            "run",
+            "--mode",
+            mode,
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def _stop(proc: subprocess.Popen[bytes] | None) -> None:
+    if proc is None:
+        return
+    try:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=5)
+    except Exception:  # noqa: BLE001
+        with suppress(Exception):
+            proc.kill()
+
+
+def _run_once(
+    *,
+    n: int,
+    port: int,
+    batch_size: int,
+    workers: int,
+    seed_db: bool,
+    startup_timeout_s: float,
+    completion_timeout_s: float,
+) -> PerfResult:
+    # The backlog is ingested with the API alone, then a worker is started to drain it, so
+    # processing_seconds measures pure worker throughput at the given batch size.
     base_url = f"http://127.0.0.1:{port}"
     db_fd, db_path = tempfile.mkstemp(prefix="autotriage-perf-", suffix=".db")
     os.close(db_fd)
@@ -131,6 +167,7 @@ def main(
         **os.environ,
         "AUTOTRIAGE_DB_PATH": db_path,
         "AUTOTRIAGE_LOG_LEVEL": "ERROR",
+        "AUTOTRIAGE_WORKER_BATCH_SIZE": str(batch_size),
     }
 
     if seed_db:
@@ -140,23 +177,8 @@ def main(
             env=env,
         )
 
-    proc = subprocess.Popen(
-        [
-            sys.executable,
-            "-m",
-            "autotriage.cli.main",
-            "run",
-            "--mode",
-            "all",
-            "--host",
-            "127.0.0.1",
-            "--port",
-            str(port),
-        ],
-        env=env,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
+    api = _spawn("api", env, port)
+    worker: subprocess.Popen[bytes] | None = None
     try:
         _wait_ready(base_url, startup_timeout_s)
 
@@ -174,12 +196,13 @@ def main(
         t1 = time.monotonic()
         ingest_seconds = t1 - t0
 
+        worker = _spawn("worker", env, port, workers)
         deadline = time.monotonic() + completion_timeout_s
         while time.monotonic() < deadline:
             pending, _failed, processed = _db_counts(db_path)
             if pending == 0 and processed >= n:
                 break
-            time.sleep(0.2)
+            time.sleep(0.05)
         else:
             pending, failed, processed = _db_counts(db_path)
             raise RuntimeError(
@@ -187,49 +210,83 @@ def main(
             )
 
         t2 = time.monotonic()
-        processing_seconds = t2 - t1
-        result = _final_result(
-            db_path, n=n, ingest_seconds=ingest_seconds, processing_seconds=processing_seconds
+        return _final_result(
+            db_path,
+            n=n,
+            batch_size=batch_size,
+            ingest_seconds=ingest_seconds,
+            processing_seconds=t2 - t1,
         )
+    finally:
+        _stop(worker)
+        _stop(api)
+        for suffix in ("", "-wal", "-shm"):
+            with suppress(OSError):
+                os.unlink(db_path + suffix)
 
-        ingest_rps = result.n / max(result.ingest_seconds, 1e-9)
-        typer.echo(
-            json.dumps(
-                {
-                    "n": result.n,
-                    "ingest_seconds": round(result.ingest_seconds, 3),
-                    "ingest_rps": round(ingest_rps, 1),
-                    "processing_seconds": round(result.processing_seconds, 3),
-                    "cases": result.cases,
-                    "tickets": result.tickets,
-                    "deduped": result.deduped,
-                    "failed_events": result.failed_events,
-                    "deadletters": result.deadletters,
-                },
-                separators=(",", ":"),
-            )
-        )
 
-        if result.processing_seconds > max_processing_seconds:
-            raise RuntimeError(
-                f"processing_seconds={result.processing_seconds:.2f} exceeded {max_processing_seconds:.2f}"
+@app.command()
+def main(
+    n: int = 1000,
+    port: int = 18081,
+    batch_sizes: str = "1,16,64,256",
+    workers: int = 1,
+    seed_db: bool = True,
+    startup_timeout_s: float = 15.0,
+    completion_timeout_s: float = 120.0,
+    max_processing_seconds: float = 120.0,
+    max_deadletters: int = 0,
+    max_failed_events: int = 0,
+) -> None:
+    throughput: dict[str, float] = {}
+    try:
+        for batch_size in [int(b) for b in batch_sizes.split(",") if b.strip()]:
+            result = _run_once(
+                n=n,
+                port=port,
+                batch_size=batch_size,
+                workers=workers,
+                seed_db=seed_db,
+                startup_timeout_s=startup_timeout_s,
+                completion_timeout_s=completion_timeout_s,
+            )
+            ingest_rps = result.n / max(result.ingest_seconds, 1e-9)
+            alerts_per_s = result.n / max(result.processing_seconds, 1e-9)
+            throughput[str(batch_size)] = round(alerts_per_s, 1)
+            typer.echo(
+                json.dumps(
+                    {
+                        "n": result.n,
+                        "batch_size": result.batch_size,
+                        "workers": workers,
+                        "ingest_seconds": round(result.ingest_seconds, 3),
+                        "ingest_rps": round(ingest_rps, 1),
+                        "processing_seconds": round(result.processing_seconds, 3),
+                        "alerts_per_s": round(alerts_per_s, 1),
+                        "cases": result.cases,
+                        "tickets": result.tickets,
+                        "deduped": result.deduped,
+                        "failed_events": result.failed_events,
+                        "deadletters": result.deadletters,
+                    },
+                    separators=(",", ":"),
+                )
             )
-        if result.deadletters > max_deadletters:
-            raise RuntimeError(f"deadletters={result.deadletters} exceeded {max_deadletters}")
-        if result.failed_events > max_failed_events:
-            raise RuntimeError(f"failed_events={result.failed_events} exceeded {max_failed_events}")
+
+            if result.processing_seconds > max_processing_seconds:
+                raise RuntimeError(
+                    f"processing_seconds={result.processing_seconds:.2f} exceeded {max_processing_seconds:.2f}"
+                )
+            if result.deadletters > max_deadletters:
+                raise RuntimeError(f"deadletters={result.deadletters} exceeded {max_deadletters}")
+            if result.failed_events > max_failed_events:
+                raise RuntimeError(
+                    f"failed_events={result.failed_events} exceeded {max_failed_events}"
+                )
+        typer.echo(json.dumps({"alerts_per_s_by_batch_size": throughput}, separators=(",", ":")))
     except Exception as e:  # noqa: BLE001
         typer.echo(f"perf_failed: {e}")
         raise typer.Exit(code=1) from e
-    finally:
-        try:
-            proc.send_signal(signal.SIGTERM)
-            proc.wait(timeout=5)
-        except Exception:  # noqa: BLE001
-            with suppress(Exception):
-                proc.kill()
-        with suppress(OSError):
-            os.unlink(db_path)
 
 
 if __name__ == "__main__":
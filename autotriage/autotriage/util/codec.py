@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import json
+import math
+from typing import Any
+
+try:
+    import orjson as _orjson
+except ImportError:  # the "fast" extra is not installed
+    _orjson = None  # type: ignore[assignment]
+
+BACKEND = "orjson" if _orjson is not None else "json"
+
+# Datetimes and dataclasses are left to the fallback, so they fail alike on either backend
+# instead of only serializing when orjson happens to be installed.
+_OPTIONS = (
+    _orjson.OPT_NON_STR_KEYS | _orjson.OPT_PASSTHROUGH_DATETIME | _orjson.OPT_PASSTHROUGH_DATACLASS
+    if _orjson is not None
+    else 0
+)
+
+
+def _has_non_finite(obj: Any) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite(k) or _has_non_finite(v) for k, v in obj.items())
+    if isinstance(obj, list | tuple):
+        return any(_has_non_finite(v) for v in obj)
+    return False
+
+
+def dumpb(obj: Any) -> bytes:
+    # Compact UTF-8 JSON. Anything orjson rejects (integers beyond 64 bits, say) goes through
+    # the stdlib, which accepts or rejects it as it always did. So does NaN or an infinity,
+    # which orjson writes as null; only output with a null in it can hide one.
+    if _orjson is not None:
+        try:
+            out = _orjson.dumps(obj, option=_OPTIONS)
+        except TypeError:
+            pass
+        else:
+            if b"null" not in out or not _has_non_finite(obj):
+                return out
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    return dumpb(obj).decode("utf-8")
+
+
+def loads(data: str | bytes) -> Any:
+    # Raises ValueError for malformed input. Text only the stdlib parses (NaN, big numbers
+    # written before this codec) still loads.
+    if _orjson is not None:
+        try:
+            return _orjson.loads(data)
+        except ValueError:
+            pass
+    return json.loads(data)
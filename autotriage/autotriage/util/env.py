@@ -9,6 +9,11 @@ def env_int(name: str, default: int) -> int:
     return default if val is None or val == "" else int(val)
 
 
+def env_float(name: str, default: float) -> float:
+    val = os.getenv(name)
+    return default if val is None or val == "" else float(val)
+
+
 def env_path(name: str, default: Path) -> Path:
     val = os.getenv(name)
     return default if val is None or val == "" else Path(val)
@@ -24,3 +29,10 @@ def env_str_list(name: str, default: list[str]) -> list[str]:
 def env_str(name: str, default: str) -> str:
     val = os.getenv(name)
     return default if val is None or val.strip() == "" else val.strip()
+
+
+def env_bool(name: str, default: bool) -> bool:
+    val = os.getenv(name)
+    if val is None or val.strip() == "":
+        return default
+    return val.strip().lower() in {"1", "true", "yes", "on"}
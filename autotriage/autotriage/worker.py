@@ -1,41 +1,300 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from contextlib import suppress
+from datetime import UTC, datetime
+from functools import partial
+from typing import Any, ParamSpec, TypeVar
 
 import structlog
 
-from autotriage.core.pipeline.orchestrator import process_ingest
-from autotriage.storage.db import get_db, init_db
+from autotriage.config import load_effective_config
+from autotriage.core.correlate.index import get_entity_case_index
+from autotriage.core.dedup.index import get_fingerprint_index
+from autotriage.core.pipeline.orchestrator import process_ingest_many
+from autotriage.doorbell import Doorbell, doorbell_dir
+from autotriage.storage.db import get_pool, init_db
 from autotriage.storage.repositories.alerts_repo import AlertsRepository
+from autotriage.storage.repositories.cache_repo import CacheRepository
+from autotriage.storage.repositories.case_snapshots_repo import CaseSnapshotsRepository
+from autotriage.storage.repositories.entity_frequency_repo import EntityFrequencyRepository
+from autotriage.storage.repositories.fingerprints_repo import FingerprintsRepository
+from autotriage.storage.repositories.rollups_repo import RollupsRepository
+from autotriage.util import codec
 
 log = structlog.get_logger(__name__)
 
+P = ParamSpec("P")
+T = TypeVar("T")
 
-async def worker_loop(poll_interval_s: float = 0.25) -> None:
-    init_db()
-    log.info("worker_started")
-    while True:
-        db = get_db()
-        row = None
-        try:
-            repo = AlertsRepository(db)
-            row = repo.claim_next()
-            if row is not None:
-                ingest_id = str(row["ingest_id"])
-                raw = json.loads(str(row["raw_json"]))
-                log.info("worker_processing", ingest_id=ingest_id)
-                process_ingest(db, ingest_id, raw)
-                repo.mark_processed(ingest_id)
-                log.info("worker_processed", ingest_id=ingest_id)
-        except Exception as e:  # noqa: BLE001
+
+def adaptive_batch_size(queue_depth: int, max_batch: int) -> int:
+    # Claim about a quarter of the visible backlog, rounded up to a power of two: a trickle is
+    # processed one alert at a time, a deep backlog in batches of up to max_batch.
+    if queue_depth <= 0:
+        return 0
+    target = 1
+    while target * 4 < queue_depth:
+        target *= 2
+    return max(1, min(max_batch, target))
+
+
+def is_transient_db_error(error: BaseException) -> bool:
+    # SQLite gave up waiting for a lock: the alerts being processed are not at fault.
+    return isinstance(error, sqlite3.OperationalError) and (
+        "locked" in str(error) or "busy" in str(error)
+    )
+
+
+async def _off_loop(fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    # asyncio.to_thread for work on a pooled connection: if the caller is cancelled, this still
+    # waits for the thread to finish, so the connection is never handed back while in use.
+    work = asyncio.ensure_future(asyncio.to_thread(fn, *args, **kwargs))
+    try:
+        return await asyncio.shield(work)
+    except asyncio.CancelledError:
+        with suppress(Exception):
+            await work
+        raise
+
+
+def new_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseHeartbeat(threading.Thread):
+    # Keeps this worker's leases alive while a batch is being processed, and fails alerts whose
+    # lease has expired too many times. While this process's batch holds the write lock the
+    # heartbeat cannot write; the worker then renews its leases itself between transactions.
+    def __init__(self, owner: str, *, lease_seconds: int, max_attempts: int) -> None:
+        super().__init__(name=f"lease-heartbeat-{owner}", daemon=True)
+        self._owner = owner
+        self._lease_seconds = lease_seconds
+        self._max_attempts = max_attempts
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        interval = max(1.0, self._lease_seconds / 3)
+        while not self._stop_event.wait(interval):
             try:
-                if "ingest_id" in locals():
-                    AlertsRepository(db).mark_failed(ingest_id, repr(e))
+                with get_pool().connection() as db:
+                    repo = AlertsRepository(db)
+                    repo.extend_leases(self._owner, self._lease_seconds)
+                    exhausted = repo.fail_exhausted_leases(self._max_attempts)
+                if exhausted:
+                    log.warning("worker_leases_exhausted", count=exhausted)
+            except Exception as e:  # noqa: BLE001
+                if is_transient_db_error(e):
+                    log.warning("worker_heartbeat_busy", worker_id=self._owner)
+                else:
+                    log.exception("worker_heartbeat_error", worker_id=self._owner)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+class RetentionSweeper(threading.Thread):
+    # Deletes expired enrichment cache rows, fingerprints older than the dedup window can reach,
+    # entity counts older than the hot-entity window and overview rollups past their retention,
+    # and stores missing or stale case snapshots, off the hot path. Each batch is its own short
+    # transaction, so writers are never blocked for long; a short batch ends that table.
+    def __init__(
+        self,
+        *,
+        interval_s: float,
+        fingerprint_retention_s: int,
+        frequency_retention_s: int,
+        rollup_retention_s: int,
+        batch_size: int = 500,
+        pause_s: float = 0.05,
+    ) -> None:
+        super().__init__(name="retention-sweeper", daemon=True)
+        self._interval_s = interval_s
+        self._fingerprint_retention_s = fingerprint_retention_s
+        self._frequency_retention_s = frequency_retention_s
+        self._rollup_retention_s = rollup_retention_s
+        self._batch_size = batch_size
+        self._pause_s = pause_s
+        self._stop_event = threading.Event()
+
+    def sweep(self) -> dict[str, int]:
+        now = int(time.time())
+        fingerprints_before = datetime.fromtimestamp(
+            now - self._fingerprint_retention_s, tz=UTC
+        ).isoformat()
+        jobs: dict[str, Callable[[sqlite3.Connection], int]] = {
+            "cache": lambda db: CacheRepository(db).sweep_expired(self._batch_size, now=now),
+            "fingerprints": lambda db: FingerprintsRepository(db).prune(
+                fingerprints_before, self._batch_size
+            ),
+            "entity_frequency": lambda db: EntityFrequencyRepository(db).prune(
+                now - self._frequency_retention_s, self._batch_size
+            ),
+            "rollups": lambda db: RollupsRepository(db).prune(
+                now - self._rollup_retention_s, self._batch_size
+            ),
+            "snapshots": lambda db: CaseSnapshotsRepository(db).backfill(self._batch_size),
+        }
+        totals: dict[str, int] = {}
+        for name, job in jobs.items():
+            totals[name] = 0
+            while not self._stop_event.is_set():
+                with get_pool().connection() as db:
+                    deleted = job(db)
+                totals[name] += deleted
+                if deleted < self._batch_size:
+                    break
+                self._stop_event.wait(self._pause_s)
+        return totals
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self._interval_s):
+            try:
+                deleted = self.sweep()
+                if any(deleted.values()):
+                    log.info("retention_swept", **deleted)
             except Exception:  # noqa: BLE001
-                pass
-            log.exception("worker_error")
-        finally:
-            db.close()
-        if row is None:
-            await asyncio.sleep(poll_interval_s)
+                log.exception("retention_sweep_error")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+async def worker_loop(
+    poll_interval_s: float = 0.25,
+    batch_size: int | None = None,
+    max_poll_interval_s: float = 5.0,
+    *,
+    worker_id: str | None = None,
+    on_processed: Callable[[int], None] | None = None,
+) -> None:
+    init_db()
+    cfg = load_effective_config()
+    max_batch = max(1, batch_size or cfg.worker_batch_size)
+    owner = worker_id or new_worker_id()
+    with get_pool().connection() as db:
+        if cfg.dedup_index:
+            get_fingerprint_index(cfg.db_path, cfg.dedup_window_seconds, cfg.dedup_bloom_bits).warm(
+                db
+            )
+        if cfg.correlation_index:
+            get_entity_case_index(cfg.db_path, cfg.correlation_window_seconds).warm(db)
+    heartbeat = LeaseHeartbeat(
+        owner, lease_seconds=cfg.worker_lease_seconds, max_attempts=cfg.worker_max_attempts
+    )
+    heartbeat.start()
+    # A fingerprint is needed while alerts can still fall into its window: one window after
+    # it started, plus a window of slack for late alerts.
+    sweeper = RetentionSweeper(
+        interval_s=cfg.sweep_interval_seconds,
+        fingerprint_retention_s=2 * cfg.dedup_window_seconds,
+        frequency_retention_s=cfg.hot_entity_window_seconds,
+        rollup_retention_s=cfg.rollup_retention_seconds,
+    )
+    if cfg.sweep_interval_seconds > 0:
+        sweeper.start()
+    # New alerts ring the doorbell; polling only backs it up (missed rings, reclaimable leases),
+    # so its interval doubles while the queue stays empty.
+    bell = Doorbell(doorbell_dir(cfg.db_path)) if cfg.worker_doorbell else None
+    if bell is None:
+        max_poll_interval_s = poll_interval_s
+    idle_interval_s = poll_interval_s
+    pool = get_pool()
+    # Alerts to hand back to the queue after a transient error, kept until that succeeds: the
+    # heartbeat would otherwise keep their leases alive for as long as this worker runs.
+    unreleased: list[str] = []
+    log.info("worker_started", worker_id=owner, max_batch=max_batch, doorbell=bell is not None)
+    try:
+        while True:
+            if bell is not None:
+                bell.clear()
+            with pool.connection() as db:
+                repo = AlertsRepository(db)
+                claimed = 0
+                items: list[tuple[str, dict[str, Any]]] = []
+                try:
+                    if unreleased:
+                        repo.release(unreleased, owner)
+                        unreleased = []
+                    depth = repo.count_pending(limit=max_batch * 4)
+                    rows = (
+                        repo.claim_batch(
+                            adaptive_batch_size(depth, max_batch),
+                            owner=owner,
+                            lease_seconds=cfg.worker_lease_seconds,
+                        )
+                        if depth
+                        else []
+                    )
+                    claimed = len(rows)
+                    for row in rows:
+                        ingest_id = str(row["ingest_id"])
+                        try:
+                            items.append((ingest_id, codec.loads(str(row["raw_json"]))))
+                        except Exception as e:  # noqa: BLE001
+                            repo.mark_failed(ingest_id, repr(e), owner)
+                            log.exception("worker_error", ingest_id=ingest_id)
+                    if items:
+                        log.info("worker_processing", batch_size=len(items))
+                        # Failing alerts are marked failed by the pipeline itself. The batch
+                        # runs off the event loop, which keeps answering doorbell wakeups.
+                        outcome = await _off_loop(
+                            process_ingest_many,
+                            db,
+                            items,
+                            cfg=cfg,
+                            owner=owner,
+                            between_transactions=partial(
+                                repo.extend_leases, owner, cfg.worker_lease_seconds
+                            ),
+                        )
+                        done = [st.ingest_id for st in outcome.processed]
+                        marked = await _off_loop(repo.mark_processed_many, done, owner)
+                        lost = len(done) - marked
+                        lost += len(outcome.lost)
+                        if lost:
+                            # Their leases lapsed during the batch: they were claimed again or
+                            # failed, and their status is left to whoever did that.
+                            log.warning("worker_leases_lost", worker_id=owner, lost=lost)
+                        log.info(
+                            "worker_processed",
+                            batch_size=len(items),
+                            processed=len(outcome.processed),
+                            failed=len(outcome.failed),
+                        )
+                        if on_processed is not None:
+                            on_processed(len(items))
+                except Exception as e:  # noqa: BLE001
+                    if is_transient_db_error(e):
+                        unreleased += [ingest_id for ingest_id, _ in items]
+                        with suppress(Exception):
+                            repo.release(unreleased, owner)
+                            unreleased = []
+                        log.warning("worker_db_busy", error=repr(e), released=len(items))
+                        claimed = 0  # back off before claiming them again
+                    else:
+                        with suppress(Exception):
+                            for ingest_id, _ in items:
+                                repo.mark_failed(ingest_id, repr(e), owner)
+                        log.exception("worker_error")
+            if claimed:
+                idle_interval_s = poll_interval_s
+                continue
+            if bell is None:
+                await asyncio.sleep(idle_interval_s)
+            elif await bell.wait(idle_interval_s):
+                idle_interval_s = poll_interval_s
+                continue
+            idle_interval_s = min(idle_interval_s * 2, max_poll_interval_s)
+    finally:
+        heartbeat.stop()
+        sweeper.stop()
+        if bell is not None:
+            bell.close()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing as mp
+import os
+import signal
+import threading
+import time
+from contextlib import suppress
+from multiprocessing.process import BaseProcess
+from multiprocessing.sharedctypes import SynchronizedArray
+from types import FrameType
+
+import structlog
+from prometheus_client import start_http_server
+
+from autotriage.config import load_effective_config
+from autotriage.core.ruleset import install_sighup_reload
+from autotriage.logging import configure_logging
+from autotriage.metrics.prom import WORKER_PROCESSED_TOTAL, WORKER_RESTARTS_TOTAL, WORKER_THROUGHPUT
+from autotriage.worker import new_worker_id, worker_loop
+
+log = structlog.get_logger(__name__)
+
+
+def _exit_with_parent(parent_pid: int) -> None:
+    while True:
+        if os.getppid() != parent_pid:
+            os._exit(0)
+        time.sleep(1.0)
+
+
+def _worker_main(
+    slot: int, counters: SynchronizedArray[int], batch_size: int | None, parent_pid: int
+) -> None:
+    configure_logging(load_effective_config().log_level)
+    install_sighup_reload()
+    threading.Thread(target=_exit_with_parent, args=(parent_pid,), daemon=True).start()
+
+    def on_processed(n: int) -> None:
+        with counters.get_lock():
+            counters[slot] += n
+
+    with suppress(KeyboardInterrupt):
+        asyncio.run(
+            worker_loop(
+                batch_size=batch_size,
+                worker_id=f"{new_worker_id()}:slot{slot}",
+                on_processed=on_processed,
+            )
+        )
+
+
+def run_worker_pool(
+    workers: int,
+    *,
+    batch_size: int | None = None,
+    metrics_port: int | None = None,
+    stats_interval_s: float = 5.0,
+    stop: threading.Event | None = None,
+) -> None:
+    ctx = mp.get_context("spawn")
+    counters: SynchronizedArray[int] = ctx.Array("q", workers)
+    stop_event = stop or threading.Event()
+    reload_event = threading.Event()
+    if threading.current_thread() is threading.main_thread():
+
+        def on_signal(signum: int, frame: FrameType | None) -> None:
+            stop_event.set()
+
+        def on_sighup(signum: int, frame: FrameType | None) -> None:
+            reload_event.set()
+
+        signal.signal(signal.SIGTERM, on_signal)
+        signal.signal(signal.SIGINT, on_signal)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, on_sighup)
+    if metrics_port:
+        start_http_server(metrics_port)
+
+    def spawn(slot: int) -> BaseProcess:
+        proc = ctx.Process(
+            target=_worker_main,
+            args=(slot, counters, batch_size, os.getpid()),
+            name=f"autotriage-worker-{slot}",
+            daemon=True,
+        )
+        proc.start()
+        return proc
+
+    procs = [spawn(slot) for slot in range(workers)]
+    log.info("worker_pool_started", workers=workers, pids=[p.pid for p in procs])
+    last_counts = [0] * workers
+    last_stats = time.monotonic()
+    try:
+        while not stop_event.wait(0.5):
+            if reload_event.is_set():
+                # Rules are compiled per process, so pass the reload on to every worker.
+                reload_event.clear()
+                for proc in procs:
+                    if proc.pid is not None:
+                        with suppress(OSError):
+                            os.kill(proc.pid, signal.SIGHUP)
+            for slot, proc in enumerate(procs):
+                if not proc.is_alive():
+                    log.warning("worker_exited", slot=slot, pid=proc.pid, exitcode=proc.exitcode)
+                    WORKER_RESTARTS_TOTAL.labels(str(slot)).inc()
+                    procs[slot] = spawn(slot)
+
+            now = time.monotonic()
+            if now - last_stats < stats_interval_s:
+                continue
+            with counters.get_lock():
+                counts = list(counters[:])
+            rates: dict[str, float] = {}
+            for slot, count in enumerate(counts):
+                label = str(slot)
+                WORKER_PROCESSED_TOTAL.labels(label).inc(count - last_counts[slot])
+                rates[label] = round((count - last_counts[slot]) / (now - last_stats), 2)
+                WORKER_THROUGHPUT.labels(label).set(rates[label])
+            log.info("worker_pool_stats", alerts_per_s=rates, total=sum(counts))
+            last_counts = counts
+            last_stats = now
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.join(timeout=5)
+        log.info("worker_pool_stopped", workers=workers)
@@ -16,8 +16,31 @@ export default function CaseView() {
     });
   }, [caseId]);
 
+  // Big cases return their timeline in pages; later pages are appended to the first.
+  function loadMoreEvents() {
+    if (!caseId || !data?.timeline_next_cursor) return;
+    const p = new URLSearchParams({ cursor: data.timeline_next_cursor });
+    apiGet<any>(`/api/cases/${caseId}?${p.toString()}`).then((r) => {
+      if (!r.ok) return setError(r.error);
+      setData((prev: any) => ({
+        ...prev,
+        timeline: [...prev.timeline, ...r.data.timeline],
+        timeline_next_cursor: r.data.timeline_next_cursor,
+      }));
+    });
+  }
+
   if (error) return <div className="error">{error}</div>;
   if (!data) return <div className="muted">Loading…</div>;
-  return <CaseDetail data={data} />;
+  return (
+    <>
+      <CaseDetail data={data} />
+      {data.timeline_next_cursor ? (
+        <button className="btn" onClick={loadMoreEvents}>
+          Load more events
+        </button>
+      ) : null}
+    </>
+  );
 }
 
@@ -1,33 +1,100 @@
-import React, { useEffect, useMemo, useState } from "react";
+import React, { useEffect, useMemo, useRef, useState } from "react";
 import { apiGet } from "../api/client";
 import CaseTable from "../components/CaseTable";
 
 type CaseRow = {
   case_id: string;
   created_at: string;
+  updated_at: string;
   severity: number;
   decision: string;
   queue: string;
   summary: string;
 };
 
+type CasePage = { items: CaseRow[]; next_cursor: string | null };
+
+const POLL_MS = 15000;
+// Cases are stamped just before their write commits, so polls overlap the last one a little.
+const POLL_OVERLAP_MS = 5000;
+
+function newestFirst(a: CaseRow, b: CaseRow) {
+  if (a.created_at !== b.created_at) return a.created_at < b.created_at ? 1 : -1;
+  return a.case_id < b.case_id ? 1 : a.case_id > b.case_id ? -1 : 0;
+}
+
+function merge(items: CaseRow[], changed: CaseRow[]) {
+  const byId = new Map(items.map((c) => [c.case_id, c]));
+  for (const c of changed) byId.set(c.case_id, c);
+  return Array.from(byId.values()).sort(newestFirst);
+}
+
+function latestUpdate(items: CaseRow[], previous: string) {
+  return items.reduce((max, c) => (c.updated_at > max ? c.updated_at : max), previous);
+}
+
 export default function Cases() {
   const [items, setItems] = useState<CaseRow[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [q, setQ] = useState("");
   const [decision, setDecision] = useState("");
   const [severityMin, setSeverityMin] = useState(0);
+  const lastUpdate = useRef("");
+
+  const params = useMemo(() => {
+    const p = new URLSearchParams();
+    p.set("time_range", "24h");
+    if (q) p.set("q", q);
+    if (decision) p.set("decision", decision);
+    if (severityMin) p.set("severity_min", String(severityMin));
+    return p;
+  }, [q, decision, severityMin]);
 
   useEffect(() => {
-    const params = new URLSearchParams();
-    params.set("time_range", "24h");
-    if (q) params.set("q", q);
-    if (decision) params.set("decision", decision);
-    if (severityMin) params.set("severity_min", String(severityMin));
-    apiGet<{ items: CaseRow[] }>(`/api/cases?${params.toString()}`).then((r) => {
-      if (!r.ok) return;
+    let alive = true;
+    lastUpdate.current = "";
+    apiGet<CasePage>(`/api/cases?${params.toString()}`).then((r) => {
+      if (!alive || !r.ok) return;
       setItems(r.data.items);
+      setNextCursor(r.data.next_cursor);
+      lastUpdate.current = latestUpdate(r.data.items, "");
     });
-  }, [q, decision, severityMin]);
+
+    // Fetch only the cases changed since the last poll, following pages if there are many.
+    async function poll() {
+      if (!lastUpdate.current) return;
+      const since = new Date(Date.parse(lastUpdate.current) - POLL_OVERLAP_MS).toISOString();
+      let cursor: string | null = null;
+      do {
+        const p = new URLSearchParams(params);
+        p.set("updated_since", since);
+        if (cursor) p.set("cursor", cursor);
+        const r = await apiGet<CasePage>(`/api/cases?${p.toString()}`);
+        if (!alive || !r.ok) return;
+        const changed = r.data.items;
+        setItems((prev) => merge(prev, changed));
+        lastUpdate.current = latestUpdate(changed, lastUpdate.current);
+        cursor = r.data.next_cursor;
+      } while (cursor);
+    }
+    const timer = window.setInterval(poll, POLL_MS);
+    return () => {
+      alive = false;
+      window.clearInterval(timer);
+    };
+  }, [params]);
+
+  function loadMore() {
+    if (!nextCursor) return;
+    const p = new URLSearchParams(params);
+    p.set("cursor", nextCursor);
+    apiGet<CasePage>(`/api/cases?${p.toString()}`).then((r) => {
+      if (!r.ok) return;
+      setItems((prev) => merge(prev, r.data.items));
+      setNextCursor(r.data.next_cursor);
+      lastUpdate.current = latestUpdate(r.data.items, lastUpdate.current);
+    });
+  }
 
   const counts = useMemo(() => items.length, [items]);
 
@@ -51,11 +118,18 @@ export default function Cases() {
             max={100}
             placeholder="Severity min"
           />
-          <div className="muted">{counts} results</div>
+          <div className="muted">
+            {counts}
+            {nextCursor ? "+" : ""} results
+          </div>
         </div>
         <CaseTable items={items} />
+        {nextCursor ? (
+          <button className="btn" onClick={loadMore}>
+            Load more
+          </button>
+        ) : null}
       </div>
     </div>
   );
 }
-
@@ -3,32 +3,19 @@ import { apiGet } from "../api/client";
 import StatCard from "../components/StatCard";
 import Timeseries from "../charts/Timeseries";
 
-type CaseRow = {
-  case_id: string;
-  created_at: string;
-  severity: number;
-  decision: string;
-  queue: string;
-  summary: string;
-};
+type SeriesPoint = { t: string; cases: number };
 
 export default function Dashboard() {
-  const [cases, setCases] = useState<CaseRow[]>([]);
   const [overview, setOverview] = useState<any>(null);
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
     let alive = true;
-    apiGet<any>("/api/overview").then((r) => {
+    apiGet<any>("/api/overview?window=24h&series=true&step=3600").then((r) => {
       if (!alive) return;
       if (!r.ok) return setError(r.error);
       setOverview(r.data);
     });
-    apiGet<{ items: CaseRow[] }>("/api/cases?time_range=24h").then((r) => {
-      if (!alive) return;
-      if (!r.ok) return setError(r.error);
-      setCases(r.data.items);
-    });
     return () => {
       alive = false;
     };
@@ -39,24 +26,23 @@ export default function Dashboard() {
     return {
       ingested: Number(s.ingested ?? 0),
       deduped: Number(s.deduped ?? 0),
-      cases: Number(s.cases ?? cases.length),
+      cases: Number(s.cases ?? 0),
       autoClosed: Number(s.auto_closed ?? 0),
       tickets: Number(s.tickets ?? 0),
       errors: Number(s.errors ?? 0)
     };
-  }, [cases, overview]);
+  }, [overview]);
 
   const points = useMemo(() => {
-    const byHour = new Map<string, number>();
-    for (const c of cases) {
-      const d = new Date(c.created_at);
-      const k = `${d.getUTCFullYear()}-${d.getUTCMonth() + 1}-${d.getUTCDate()} ${d.getUTCHours()}:00`;
-      byHour.set(k, (byHour.get(k) ?? 0) + 1);
-    }
-    return Array.from(byHour.entries())
-      .sort((a, b) => a[0].localeCompare(b[0]))
-      .map(([t, v]) => ({ t, v }));
-  }, [cases]);
+    const series: SeriesPoint[] = overview?.series?.points ?? [];
+    return series.map((p) => {
+      const d = new Date(p.t);
+      return {
+        t: `${d.getUTCFullYear()}-${d.getUTCMonth() + 1}-${d.getUTCDate()} ${d.getUTCHours()}:00`,
+        v: p.cases
+      };
+    });
+  }, [overview]);
 
   return (
     <div className="grid">